@@ -0,0 +1,531 @@
+"""Load test for the routes of routers/project_router.py.
+
+Usage:
+    python -m benchmarks.load [--projects 10 --tasks 200 ...] [--output benchmarks/results.json]
+    python -m benchmarks.load --compare benchmarks/baseline.json [--tolerance 0.25]
+
+Seeds a temporary SQLite database, then sends ``--requests`` requests per route
+through an in-process ASGI client, ``--concurrency`` at a time. For every route
+it reports p50/p95/p99 latency, requests per second and SQL statements per
+request (writer and reader engines), and writes the results as JSON.
+
+With ``--compare`` the run reuses the seed sizes of the baseline file and exits
+with status 1 when a route got slower than the tolerance allows, issues more SQL
+statements, or returns errors. Record a baseline by writing ``--output`` to the
+baseline path on the machine that runs the comparison.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+DATA_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DB_PATH", os.path.join(DATA_DIR, "load.db"))
+os.environ.setdefault("ARCHIVE_DB_PATH", os.path.join(DATA_DIR, "archive.db"))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.routing import APIRoute  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from config import settings  # noqa: E402
+from core.database import Base, engine, read_engine, async_session  # noqa: E402
+from core.metrics import RequestMetricsMiddleware  # noqa: E402
+from core.pagination import format_timestamp  # noqa: E402
+from core.query_counter import QueryCounter  # noqa: E402
+from models.project_models import (  # noqa: E402
+    Project,
+    Stage,
+    Task,
+    TaskAssignee,
+    ProjectMember,
+    ProjectMemberPermission,
+    ProjectPermission,
+    ImportJob,
+    StageDependency,
+    TaskDependency
+)
+from models.user_models import User  # noqa: E402
+from routers import project_router  # noqa: E402
+from services.activity_log import activity_log  # noqa: E402
+from services.rollups import rebuild as rebuild_rollups  # noqa: E402
+
+DEFAULTS = {
+    "users": 50,
+    "projects": 10,
+    "stages": 5,  # per project
+    "tasks": 200,  # per project
+    "assignees": 2,  # per task; every 4th task is left unassigned for claims
+    "members": 10,  # per project
+    "requests": 100,  # per route
+    "concurrency": 10,
+    "fast_serialization": False,
+}
+AGENTS = 20
+BENCH_USER_ID = "bench-user"
+
+# The project routes behind the same middleware as main.app; authentication is
+# replaced by BENCH_USER_ID, so the fastapi-users routers are left out
+app = FastAPI()
+app.add_middleware(RequestMetricsMiddleware)
+app.include_router(project_router.router)
+
+# Streams that never finish on their own are not load tested
+EXCLUDED = {
+    ("GET", "/api/projects/{project_id}/events"): "long-lived event stream",
+}
+
+
+def pick(items: List[Any], i: int) -> Any:
+    return items[i % len(items)]
+
+
+@dataclass
+class Dataset:
+    project_ids: List[str] = field(default_factory=list)
+    task_ids: List[str] = field(default_factory=list)
+    assignees: List[Tuple[str, str]] = field(default_factory=list)  # (task_id, assignee row id)
+    members: List[Tuple[str, str, str]] = field(default_factory=list)  # (project_id, member row id, user id)
+    user_ids: List[str] = field(default_factory=list)
+    permission_ids: List[str] = field(default_factory=list)
+    stages: List[Tuple[str, str]] = field(default_factory=list)  # (project_id, stage_id)
+    project_tasks: Dict[str, List[str]] = field(default_factory=dict)
+    import_job_id: str = ""
+
+
+async def seed(config: Dict[str, Any]) -> Dataset:
+    data = Dataset()
+    rows: Dict[Any, List[Dict[str, Any]]] = {model: [] for model in (
+        User, Project, ProjectPermission, Stage, ProjectMember, ProjectMemberPermission, Task, TaskAssignee,
+        StageDependency, TaskDependency
+    )}
+
+    for i in range(config["users"]):
+        rows[User].append({"id": f"user-{i}", "username": f"user-{i}", "email": f"user-{i}@example.com", "hashed_password": "x"})
+        data.user_ids.append(f"user-{i}")
+    rows[User].append({"id": BENCH_USER_ID, "username": "bench", "email": "bench@example.com", "hashed_password": "x"})
+
+    for i in range(5):
+        permission_id = str(uuid.uuid4())
+        rows[ProjectPermission].append({"id": permission_id, "name": f"permission-{i}"})
+        data.permission_ids.append(permission_id)
+
+    for p in range(config["projects"]):
+        project_id = str(uuid.uuid4())
+        data.project_ids.append(project_id)
+        rows[Project].append({"id": project_id, "name": f"Project {p}", "creator_id": BENCH_USER_ID})
+        stage_ids = [str(uuid.uuid4()) for _ in range(config["stages"])]
+        rows[Stage].extend({"id": s, "project_id": project_id, "name": f"Stage {n}"} for n, s in enumerate(stage_ids))
+        data.stages.extend((project_id, s) for s in stage_ids)
+        # Stages run one after another
+        rows[StageDependency].extend(
+            {"stage_id": after, "depends_on_id": before, "project_id": project_id}
+            for before, after in zip(stage_ids, stage_ids[1:])
+        )
+        task_ids = data.project_tasks[project_id] = []
+
+        for m in range(config["members"]):
+            member_id = str(uuid.uuid4())
+            user_id = pick(data.user_ids, p + m)
+            rows[ProjectMember].append({"id": member_id, "project_id": project_id, "member_id": user_id, "member_type": "USER", "role": "developer"})
+            rows[ProjectMemberPermission].append({"id": str(uuid.uuid4()), "member_id": member_id, "permission_id": pick(data.permission_ids, m)})
+            data.members.append((project_id, member_id, user_id))
+
+        for t in range(config["tasks"]):
+            task_id = str(uuid.uuid4())
+            data.task_ids.append(task_id)
+            task_ids.append(task_id)
+            if t >= len(stage_ids) > 0:
+                # Tasks of a stage form a chain
+                rows[TaskDependency].append({"task_id": task_id, "depends_on_id": task_ids[t - len(stage_ids)], "project_id": project_id})
+            rows[Task].append({
+                "id": task_id,
+                "project_id": project_id,
+                "stage_id": pick(stage_ids, t) if stage_ids else None,
+                "name": f"Task {t}",
+                "priority": t % 5 + 1,
+            })
+            if t % 4 == 3:
+                continue
+            for a in range(config["assignees"]):
+                assignee_id = str(uuid.uuid4())
+                rows[TaskAssignee].append({"id": assignee_id, "task_id": task_id, "assignee_id": f"agent-{(t + a) % AGENTS}", "assignee_type": "AGENT", "role": "worker"})
+                data.assignees.append((task_id, assignee_id))
+
+    data.import_job_id = str(uuid.uuid4())
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        for model, values in rows.items():
+            if values:
+                await connection.execute(insert(model), values)
+        await connection.execute(insert(ImportJob), [{"id": data.import_job_id, "status": "COMPLETED"}])
+    # Seed rows bypass the routes, so the summary counters are computed once here
+    async with async_session() as session:
+        async with session.begin():
+            await rebuild_rollups(session)
+    return data
+
+
+# A request is (url, httpx keyword arguments); builders may call the API to set
+# up what the timed request needs, which happens before the timing starts
+Request = Tuple[str, Dict[str, Any]]
+Builder = Callable[[AsyncClient, Dataset, int], Union[Request, Awaitable[Request]]]
+
+
+@dataclass
+class Scenario:
+    method: str
+    route: str
+    build: Builder
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.route}"
+
+
+async def claimed_assignee(client: AsyncClient, data: Dataset, i: int) -> Tuple[str, str]:
+    response = await client.post(
+        f"/api/projects/{pick(data.project_ids, i)}/tasks:claim",
+        json={"assignee_id": f"worker-{i}", "assignee_type": "AGENT"}
+    )
+    response.raise_for_status()
+    task = response.json()
+    lease = next(a for a in task["assignees"] if a["lease_expires_at"])
+    return task["id"], lease["id"]
+
+
+async def new_assignee(client: AsyncClient, data: Dataset, i: int) -> Tuple[str, str]:
+    task_id = pick(data.task_ids, i)
+    response = await client.post(f"/api/tasks/{task_id}/assignees", json={"assignee_id": f"user-{i}", "assignee_type": "USER", "role": "reviewer"})
+    response.raise_for_status()
+    return task_id, response.json()["id"]
+
+
+async def new_member(client: AsyncClient, data: Dataset, i: int) -> Tuple[str, str]:
+    project_id = pick(data.project_ids, i)
+    response = await client.post(f"/api/projects/{project_id}/members", json={"member_id": pick(data.user_ids, i), "member_type": "USER", "role": "viewer"})
+    response.raise_for_status()
+    return project_id, response.json()["id"]
+
+
+def import_line(i: int) -> bytes:
+    now = format_timestamp(datetime.utcnow())
+    project = {"id": str(uuid.uuid4()), "name": f"Imported {i}", "status": "INIT", "created_at": now, "updated_at": now}
+    return json.dumps({"type": "project", "data": project}).encode() + b"\n"
+
+
+def batch(i: int) -> List[Dict[str, Any]]:
+    # Batch tasks have no assignees, which keeps the claim scenarios supplied
+    return [{"name": f"Batch {i}.{n}", "priority": n % 5 + 1} for n in range(100)]
+
+
+def status_burst(data: Dataset, i: int) -> List[Dict[str, Any]]:
+    # 100 tasks of one project moving through three statuses
+    task_ids = data.project_tasks[pick(data.project_ids, i)]
+    return [
+        {"id": pick(task_ids, i * 100 + n), "status": ("IN_PROGRESS", "REVIEW", "DONE")[n % 3], "priority": n % 5 + 1}
+        for n in range(100)
+    ]
+
+
+async def renew_lease(client, data, i):
+    task_id, assignee_id = await claimed_assignee(client, data, i)
+    return f"/api/tasks/{task_id}/assignees/{assignee_id}/lease", {"json": {"lease_seconds": 600}}
+
+
+async def release_lease(client, data, i):
+    task_id, assignee_id = await claimed_assignee(client, data, i)
+    return f"/api/tasks/{task_id}/assignees/{assignee_id}/lease", {}
+
+
+async def remove_assignee(client, data, i):
+    task_id, assignee_id = await new_assignee(client, data, i)
+    return f"/api/tasks/{task_id}/assignees/{assignee_id}", {}
+
+
+async def new_stage_dependency(client, data, i):
+    # The new stage has no dependents, so the edge can never close a cycle
+    project_id, depends_on_id = pick(data.stages, i)
+    response = await client.post(f"/api/projects/{project_id}/stages", json={"name": f"Stage {i}"})
+    response.raise_for_status()
+    return f"/api/projects/{project_id}/stages/{response.json()['id']}/dependencies", {"json": {"depends_on_id": depends_on_id}}
+
+
+async def remove_stage_dependency(client, data, i):
+    url, kwargs = await new_stage_dependency(client, data, i)
+    response = await client.post(url, **kwargs)
+    response.raise_for_status()
+    return f"{url}/{kwargs['json']['depends_on_id']}", {}
+
+
+async def new_task_dependency(client, data, i):
+    project_id = pick(data.project_ids, i)
+    response = await client.post(f"/api/projects/{project_id}/tasks", json={"name": f"Task {i}"})
+    response.raise_for_status()
+    depends_on_id = pick(data.project_tasks[project_id], i)
+    return f"/api/tasks/{response.json()['id']}/dependencies", {"json": {"depends_on_id": depends_on_id}}
+
+
+async def remove_task_dependency(client, data, i):
+    url, kwargs = await new_task_dependency(client, data, i)
+    response = await client.post(url, **kwargs)
+    response.raise_for_status()
+    return f"{url}/{kwargs['json']['depends_on_id']}", {}
+
+
+def agents(i: int, count: int, role: str) -> List[Dict[str, Any]]:
+    return [{"assignee_id": f"agent-{(i + n) % AGENTS}", "assignee_type": "AGENT", "role": role} for n in range(count)]
+
+
+async def replace_assignees(client, data, i):
+    # A fresh task, so the seeded assignees used by other scenarios stay in place
+    response = await client.post(f"/api/projects/{pick(data.project_ids, i)}/tasks", json={"name": f"Task {i}", "assignees": agents(i, 3, "worker")})
+    response.raise_for_status()
+    # Keeps two, changes the role of one, drops one and adds one
+    return f"/api/tasks/{response.json()['id']}/assignees", {"json": agents(i + 1, 3, "worker")[:1] + agents(i + 2, 1, "reviewer") + agents(i + 7, 1, "worker")}
+
+
+async def replace_assignees_batch(client, data, i):
+    project_id = pick(data.project_ids, i)
+    response = await client.post(
+        f"/api/projects/{project_id}/tasks:batch",
+        json=[{"name": f"Batch {i}.{n}", "assignees": agents(n, 2, "worker")} for n in range(100)]
+    )
+    response.raise_for_status()
+    task_ids = response.json()["created"]
+    return "/api/tasks/assignees:batch", {"json": [
+        {"task_id": task_id, "assignees": agents(n + 1, 2, "reviewer" if n % 2 else "worker")}
+        for n, task_id in enumerate(task_ids)
+    ]}
+
+
+async def archive_project(client, data, i):
+    # A fresh project with a few stages and tasks, so the seeded projects stay live
+    response = await client.post("/api/projects", json={"name": f"Archive {i}"})
+    response.raise_for_status()
+    project_id = response.json()["id"]
+    for n in range(3):
+        response = await client.post(f"/api/projects/{project_id}/stages", json={"name": f"Stage {n}"})
+        response.raise_for_status()
+    response = await client.post(f"/api/projects/{project_id}/tasks:batch", json=[{**task, "assignees": agents(n, 2, "worker")} for n, task in enumerate(batch(i))])
+    response.raise_for_status()
+    return f"/api/projects/{project_id}/archive", {}
+
+
+async def remove_member(client, data, i):
+    project_id, member_id = await new_member(client, data, i)
+    return f"/api/projects/{project_id}/members/{member_id}", {}
+
+
+SCENARIOS = [
+    Scenario("POST", "/api/projects", lambda c, d, i: ("/api/projects", {"json": {"name": f"Bench {i}"}})),
+    Scenario("GET", "/api/projects", lambda c, d, i: ("/api/projects", {"params": {"page": i % 5 + 1, "pageSize": 50}})),
+    Scenario("GET", "/api/projects?include_archived=true", lambda c, d, i: (
+        "/api/projects", {"params": {"page": i % 5 + 1, "pageSize": 50, "include_archived": "true"}}
+    )),
+    Scenario("POST", "/api/projects/{project_id}/archive", archive_project),
+    Scenario("POST", "/api/projects/import", lambda c, d, i: ("/api/projects/import", {"content": import_line(i)})),
+    Scenario("GET", "/api/projects/import/{job_id}", lambda c, d, i: (f"/api/projects/import/{d.import_job_id}", {})),
+    Scenario("GET", "/api/projects/{project_id}/export", lambda c, d, i: (f"/api/projects/{pick(d.project_ids, i)}/export", {})),
+    Scenario("GET", "/api/projects/{project_id}/summary", lambda c, d, i: (f"/api/projects/{pick(d.project_ids, i)}/summary", {})),
+    Scenario("GET", "/api/projects:summary", lambda c, d, i: ("/api/projects:summary", {"params": [("project_id", p) for p in d.project_ids]})),
+    Scenario("GET", "/api/projects/{project_id}/schedule", lambda c, d, i: (f"/api/projects/{pick(d.project_ids, i)}/schedule", {})),
+    Scenario("GET", "/api/projects/{project_id}/activity", lambda c, d, i: (f"/api/projects/{pick(d.project_ids, i)}/activity", {})),
+    Scenario("GET", "/api/projects/{project_id}/stages", lambda c, d, i: (f"/api/projects/{pick(d.project_ids, i)}/stages", {})),
+    Scenario("POST", "/api/projects/{project_id}/stages", lambda c, d, i: (f"/api/projects/{pick(d.project_ids, i)}/stages", {"json": {"name": f"Stage {i}"}})),
+    Scenario("POST", "/api/projects/{project_id}/stages/{stage_id}/dependencies", new_stage_dependency),
+    Scenario("DELETE", "/api/projects/{project_id}/stages/{stage_id}/dependencies/{depends_on_id}", remove_stage_dependency),
+    Scenario("POST", "/api/projects/{project_id}/tasks", lambda c, d, i: (
+        f"/api/projects/{pick(d.project_ids, i)}/tasks",
+        {"json": {"name": f"Task {i}", "priority": 3, "assignees": [{"assignee_id": f"agent-{i % AGENTS}", "assignee_type": "AGENT", "role": "worker"}]}}
+    )),
+    Scenario("GET", "/api/projects/{project_id}/tasks", lambda c, d, i: (f"/api/projects/{pick(d.project_ids, i)}/tasks", {"params": {"pageSize": 100}})),
+    Scenario("POST", "/api/projects/{project_id}/tasks:batch", lambda c, d, i: (f"/api/projects/{pick(d.project_ids, i)}/tasks:batch", {"json": batch(i)})),
+    Scenario("PATCH", "/api/tasks:batch", lambda c, d, i: ("/api/tasks:batch", {"json": status_burst(d, i)})),
+    Scenario("PUT", "/api/tasks/{task_id}/assignees", replace_assignees),
+    Scenario("PUT", "/api/tasks/assignees:batch", replace_assignees_batch),
+    Scenario("POST", "/api/tasks/{task_id}/dependencies", new_task_dependency),
+    Scenario("DELETE", "/api/tasks/{task_id}/dependencies/{depends_on_id}", remove_task_dependency),
+    Scenario("POST", "/api/projects/{project_id}/tasks:claim", lambda c, d, i: (
+        f"/api/projects/{pick(d.project_ids, i)}/tasks:claim",
+        {"json": {"assignee_id": f"worker-{i}", "assignee_type": "AGENT"}}
+    )),
+    Scenario("PUT", "/api/tasks/{task_id}/assignees/{assignee_id}/lease", renew_lease),
+    Scenario("DELETE", "/api/tasks/{task_id}/assignees/{assignee_id}/lease", release_lease),
+    Scenario("GET", "/api/search", lambda c, d, i: ("/api/search", {"params": {"q": f"task {i % 100}", "project_id": pick(d.project_ids, i)}})),
+    Scenario("GET", "/api/assignees/{assignee_id}/tasks", lambda c, d, i: (f"/api/assignees/agent-{i % AGENTS}/tasks", {"params": {"pageSize": 100}})),
+    Scenario("POST", "/api/tasks/{task_id}/assignees", lambda c, d, i: (
+        f"/api/tasks/{pick(d.task_ids, i)}/assignees",
+        {"json": {"assignee_id": f"user-{i}", "assignee_type": "USER", "role": "reviewer"}}
+    )),
+    Scenario("GET", "/api/tasks/{task_id}/assignees", lambda c, d, i: (f"/api/tasks/{pick(d.task_ids, i)}/assignees", {})),
+    Scenario("PUT", "/api/tasks/{task_id}/assignees/{assignee_id}", lambda c, d, i: (
+        "/api/tasks/{}/assignees/{}".format(*pick(d.assignees, i)),
+        {"json": {"assignee_id": f"agent-{i % AGENTS}", "assignee_type": "AGENT", "role": "developer"}}
+    )),
+    Scenario("DELETE", "/api/tasks/{task_id}/assignees/{assignee_id}", remove_assignee),
+    Scenario("POST", "/api/projects/{project_id}/members", lambda c, d, i: (
+        f"/api/projects/{pick(d.project_ids, i)}/members",
+        {"json": {"member_id": pick(d.user_ids, i), "member_type": "USER", "role": "viewer", "permissions": [{"permission_id": pick(d.permission_ids, i)}]}}
+    )),
+    Scenario("DELETE", "/api/projects/{project_id}/members/{member_id}", remove_member),
+    Scenario("GET", "/api/projects/{project_id}/effective-permissions/{member_id}", lambda c, d, i: (
+        "/api/projects/{}/effective-permissions/{}".format(pick(d.members, i)[0], pick(d.members, i)[2]), {}
+    )),
+    Scenario("GET", "/api/projects/{project_id}/members", lambda c, d, i: (f"/api/projects/{pick(d.project_ids, i)}/members", {})),
+    Scenario("POST", "/api/permissions", lambda c, d, i: ("/api/permissions", {"json": {"name": f"bench-{uuid.uuid4().hex[:12]}"}})),
+    Scenario("GET", "/api/permissions", lambda c, d, i: ("/api/permissions", {})),
+    Scenario("POST", "/api/members/{member_id}/permissions", lambda c, d, i: (
+        f"/api/members/{pick(d.members, i)[1]}/permissions", {"json": {"permission_id": pick(d.permission_ids, i + 1)}}
+    )),
+    Scenario("GET", "/api/members/{member_id}/permissions", lambda c, d, i: (f"/api/members/{pick(d.members, i)[1]}/permissions", {})),
+]
+
+
+def uncovered_routes() -> List[str]:
+    covered = {(s.method, s.route) for s in SCENARIOS} | set(EXCLUDED)
+    return sorted(
+        f"{method} {route.path}"
+        for route in project_router.router.routes if isinstance(route, APIRoute)
+        for method in route.methods
+        if (method, route.path) not in covered
+    )
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+async def run_scenario(client: AsyncClient, scenario: Scenario, data: Dataset, config: Dict[str, Any]) -> Dict[str, Any]:
+    requests = []
+    for i in range(config["requests"]):
+        request = scenario.build(client, data, i)
+        requests.append(await request if inspect.isawaitable(request) else request)
+
+    semaphore = asyncio.Semaphore(config["concurrency"])
+    latencies: List[float] = []
+    errors: List[int] = []
+
+    async def send(url: str, kwargs: Dict[str, Any]) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(scenario.method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+        if response.is_error:
+            errors.append(response.status_code)
+
+    with QueryCounter(engine) as writes, QueryCounter(read_engine) as reads:
+        start = time.perf_counter()
+        await asyncio.gather(*(send(url, kwargs) for url, kwargs in requests))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_statuses": sorted(set(errors)),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "sql_per_request": round((writes.count + reads.count) / len(latencies), 2),
+    }
+
+
+async def run(config: Dict[str, Any]) -> Dict[str, Any]:
+    settings.FAST_SERIALIZATION = config["fast_serialization"]
+    data = await seed(config)
+    app.dependency_overrides[project_router.get_current_user] = lambda: SimpleNamespace(id=BENCH_USER_ID)
+
+    routes = {}
+    # The ASGI client sends no lifespan events, so the startup work main.app does is done here
+    activity_log.start()
+    # Unhandled exceptions become 500 responses, as behind a server, and count as errors
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for scenario in SCENARIOS:
+            routes[scenario.name] = result = await run_scenario(client, scenario, data, config)
+            print(
+                f"{scenario.name:<64} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+                f" {result['rps']:>8.1f} {result['sql_per_request']:>6.2f} {result['errors']:>4}"
+            )
+    await activity_log.close()
+
+    await engine.dispose()
+    await read_engine.dispose()
+    return {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": config,
+        "routes": routes,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline``, one message per problem."""
+    problems = []
+    for name, current in results["routes"].items():
+        if current["errors"]:
+            problems.append(f"{name}: {current['errors']} failed requests {current['error_statuses']}")
+        previous = baseline["routes"].get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {current['p95_ms']:.2f} ms, baseline {previous['p95_ms']:.2f} ms")
+        if current["rps"] < previous["rps"] / (1 + tolerance):
+            problems.append(f"{name}: {current['rps']:.1f} req/s, baseline {previous['rps']:.1f} req/s")
+        # Statement counts are deterministic, half a statement absorbs the occasional sweep or flush
+        if current["sql_per_request"] > previous["sql_per_request"] + 0.5:
+            problems.append(f"{name}: {current['sql_per_request']:.2f} SQL statements per request, baseline {previous['sql_per_request']:.2f}")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the project API routes.")
+    for key, default in DEFAULTS.items():
+        if isinstance(default, bool):
+            parser.add_argument(f"--{key.replace('_', '-')}", dest=key, action="store_true", default=None)
+        else:
+            parser.add_argument(f"--{key}", type=int, default=None, help=f"default {default}")
+    parser.add_argument("--output", default="benchmarks/results.json", help="where to write the results")
+    parser.add_argument("--compare", help="baseline JSON file to check the results against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    # Explicit arguments win, then the baseline's sizes so the runs are comparable
+    config = {**DEFAULTS, **(baseline["config"] if baseline else {})}
+    config.update({key: getattr(args, key) for key in DEFAULTS if getattr(args, key) is not None})
+
+    for name in uncovered_routes():
+        print(f"warning: {name} has no load scenario", file=sys.stderr)
+
+    print(f"{'route':<64} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'sql':>6} {'err':>4}")
+    results = asyncio.run(run(config))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+    problems = compare(results, baseline or {"routes": {}}, args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
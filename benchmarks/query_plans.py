@@ -0,0 +1,269 @@
+"""EXPLAIN QUERY PLAN checks for the SQL the routes actually issue.
+
+Usage:
+    python -m benchmarks.query_plans
+
+Seeds a small temporary database like benchmarks/load.py, sends the requests of
+every load scenario plus the VARIANTS below (cursor pages, filters, archived
+projects, both serialization modes), runs the periodic JOBS, and records each
+statement the writer and reader engines execute. Every recorded statement is
+then explained with the parameters it ran with; the command exits with status 1
+when one of them is planned as a full table scan. tests/test_query_plans.py runs
+the same checks under pytest.
+
+A new route is checked once it has a load scenario (``uncovered_routes`` in
+benchmarks/load.py lists those that have none); a new code path of an existing
+route, e.g. a filter, needs an entry in VARIANTS.
+"""
+import asyncio
+import inspect
+import re
+import sqlite3
+import sys
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from benchmarks import load  # sets up the temporary database before config is read
+from httpx import ASGITransport, AsyncClient
+
+from config import settings
+from core.database import async_session, engine, read_engine
+from core.pagination import NEXT_CURSOR_HEADER
+from core.query_counter import QueryCounter
+from routers import project_router
+from services.activity_log import activity_log
+from services.archive import archive_stale_projects
+from services.change_feed import latest_event_id, load_events, prune_change_log
+from services.task_leases import sweep_expired_leases
+
+SIZES = {
+    "users": 5,
+    "projects": 2,
+    "stages": 3,
+    "tasks": 20,
+    "assignees": 2,
+    "members": 3,
+    "requests": 2,
+}
+
+# "SCAN projects" (or "SCAN TABLE projects" on older SQLite) without an index
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+EXPLAINABLE = re.compile(r"^\s*(?:SELECT|INSERT|UPDATE|DELETE|WITH|REPLACE)\b", re.IGNORECASE)
+
+Scenario = load.Scenario
+Dataset = load.Dataset
+pick = load.pick
+
+# (statement, parameters) as executed
+Query = Tuple[str, Any]
+
+
+def next_page(path: Callable[[Dataset, int], str], **params: Any) -> load.Builder:
+    """Second page of a listing, requested with the cursor of the first."""
+    async def build(client: AsyncClient, data: Dataset, i: int) -> load.Request:
+        url = path(data, i)
+        first = {**params, "pageSize": 1}
+        response = await client.get(url, params=first)
+        response.raise_for_status()
+        return url, {"params": {**first, "cursor": response.headers[NEXT_CURSOR_HEADER]}}
+    return build
+
+
+async def archived_project(client: AsyncClient, data: Dataset, i: int) -> str:
+    url, kwargs = await load.archive_project(client, data, i)
+    response = await client.post(url, **kwargs)
+    response.raise_for_status()
+    return response.json()["project_id"]
+
+
+def archived(collection: str) -> load.Builder:
+    async def build(client: AsyncClient, data: Dataset, i: int) -> load.Request:
+        project_id = await archived_project(client, data, i)
+        return f"/api/projects/{project_id}/{collection}", {"params": {"include_archived": "true"}}
+    return build
+
+
+async def member_with_permissions(client: AsyncClient, data: Dataset, i: int) -> str:
+    member_id = pick(data.members, i)[1]
+    response = await client.post(f"/api/members/{member_id}/permissions", json={"permission_id": pick(data.permission_ids, i + 2)})
+    response.raise_for_status()
+    return member_id
+
+
+async def activity_page(client: AsyncClient, data: Dataset, i: int) -> load.Request:
+    # The writer drains what the scenarios queued so far, plus two new entries
+    project_id = pick(data.project_ids, i)
+    activity_log.start()
+    for n in range(2):
+        response = await client.post(f"/api/projects/{project_id}/stages", json={"name": f"Activity {i}.{n}"})
+        response.raise_for_status()
+    await activity_log.close()
+    return await next_page(lambda d, i: f"/api/projects/{project_id}/activity")(client, data, i)
+
+
+async def member_permissions_page(client: AsyncClient, data: Dataset, i: int) -> load.Request:
+    member_id = await member_with_permissions(client, data, i)
+    return await next_page(lambda d, i: f"/api/members/{member_id}/permissions")(client, data, i)
+
+
+def inbox(d: Dataset, i: int) -> str:
+    return f"/api/assignees/agent-{i % load.AGENTS}/tasks"
+
+
+# Code paths of the routes that the load scenarios do not take
+VARIANTS = [
+    Scenario("GET", "/api/projects?status", lambda c, d, i: ("/api/projects", {"params": {"status": "INIT"}})),
+    Scenario("GET", "/api/projects?cursor", next_page(lambda d, i: "/api/projects")),
+    Scenario("GET", "/api/projects?include_archived=true&status", lambda c, d, i: (
+        "/api/projects", {"params": {"include_archived": "true", "status": "INIT"}}
+    )),
+    Scenario("GET", "/api/projects?include_archived=true&cursor", next_page(lambda d, i: "/api/projects", include_archived="true")),
+    Scenario("GET", "/api/projects/{project_id}/activity?cursor", activity_page),
+    Scenario("GET", "/api/projects/{project_id}/stages?cursor", next_page(lambda d, i: f"/api/projects/{pick(d.project_ids, i)}/stages")),
+    Scenario("GET", "/api/projects/{project_id}/stages?include_archived=true", archived("stages")),
+    Scenario("GET", "/api/projects/{project_id}/tasks?cursor", next_page(lambda d, i: f"/api/projects/{pick(d.project_ids, i)}/tasks")),
+    Scenario("GET", "/api/projects/{project_id}/tasks?include_archived=true", archived("tasks")),
+    Scenario("GET", "/api/projects/{project_id}/members?cursor", next_page(lambda d, i: f"/api/projects/{pick(d.project_ids, i)}/members")),
+    Scenario("GET", "/api/projects/{project_id}/members?include_archived=true", archived("members")),
+    Scenario("GET", "/api/tasks/{task_id}/assignees?cursor", next_page(lambda d, i: f"/api/tasks/{pick(d.assignees, i)[0]}/assignees")),
+    Scenario("GET", "/api/permissions?cursor", next_page(lambda d, i: "/api/permissions")),
+    Scenario("GET", "/api/members/{member_id}/permissions?cursor", member_permissions_page),
+    Scenario("GET", "/api/search?cursor", next_page(lambda d, i: "/api/search", q="task")),
+    Scenario("GET", "/api/search?all_projects", lambda c, d, i: ("/api/search", {"params": {"q": f"task {i}"}})),
+    Scenario("GET", "/api/search?kind", lambda c, d, i: ("/api/search", {"params": {"q": "project", "kind": "project"}})),
+    Scenario("GET", "/api/assignees/{assignee_id}/tasks?cursor", next_page(inbox)),
+    Scenario("GET", "/api/assignees/{assignee_id}/tasks?assignee_type", lambda c, d, i: (inbox(d, i), {"params": {"assignee_type": "AGENT"}})),
+    Scenario("GET", "/api/assignees/{assignee_id}/tasks?assignee_type&cursor", next_page(inbox, assignee_type="AGENT")),
+    Scenario("GET", "/api/assignees/{assignee_id}/tasks?status", lambda c, d, i: (
+        inbox(d, i), {"params": {"status": "TODO", "priority": i % 5 + 1}}
+    )),
+]
+
+
+async def sweep_leases(data: Dataset) -> None:
+    async with async_session() as session:
+        async with session.begin():
+            await sweep_expired_leases(session)
+
+
+async def replay_events(data: Dataset) -> None:
+    project_id = pick(data.project_ids, 0)
+    await load_events(project_id, 0, settings.EVENT_REPLAY_BATCH_SIZE)
+    await latest_event_id(project_id)
+
+
+# Statements that run outside the request handlers
+JOBS: Dict[str, Callable[[Dataset], Awaitable[Any]]] = {
+    "event replay": replay_events,
+    "lease sweep": sweep_leases,
+    "change log pruning": lambda data: prune_change_log(),
+    "archive sweep": lambda data: archive_stale_projects(),
+}
+
+
+def scenario_names() -> List[str]:
+    names = [scenario.name for scenario in load.SCENARIOS + VARIANTS]
+    names += [f"{scenario.name} (fast)" for scenario in load.SCENARIOS + VARIANTS if scenario.method == "GET"]
+    return names + list(JOBS)
+
+
+class Recorder:
+    """Collects the statements both engines execute inside the block."""
+
+    def __enter__(self):
+        self._counters = [QueryCounter(engine).__enter__(), QueryCounter(read_engine).__enter__()]
+        return self
+
+    def __exit__(self, *exc_info):
+        for counter in self._counters:
+            counter.__exit__(*exc_info)
+        return False
+
+    @property
+    def queries(self) -> List[Query]:
+        return [query for counter in self._counters for query in zip(counter.statements, counter.parameters)]
+
+
+async def record_scenario(client: AsyncClient, scenario: Scenario, data: Dataset, requests: int) -> List[Query]:
+    prepared = []
+    for i in range(requests):
+        request = scenario.build(client, data, i)
+        prepared.append(await request if inspect.isawaitable(request) else request)
+    with Recorder() as recorder:
+        for url, kwargs in prepared:
+            response = await client.request(scenario.method, url, **kwargs)
+            response.raise_for_status()
+    return recorder.queries
+
+
+async def record(config: Dict[str, Any]) -> Dict[str, List[Query]]:
+    """Seed the configured database, which must be empty, and record the statements of every scenario."""
+    data = await load.seed(config)
+    load.app.dependency_overrides[project_router.get_current_user] = lambda: SimpleNamespace(id=load.BENCH_USER_ID)
+    fast_serialization = settings.FAST_SERIALIZATION
+    recorded = {}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=load.app), base_url="http://plans") as client:
+            for scenario in load.SCENARIOS + VARIANTS:
+                settings.FAST_SERIALIZATION = False
+                recorded[scenario.name] = await record_scenario(client, scenario, data, config["requests"])
+                if scenario.method == "GET":
+                    settings.FAST_SERIALIZATION = True
+                    recorded[f"{scenario.name} (fast)"] = await record_scenario(client, scenario, data, config["requests"])
+        for name, job in JOBS.items():
+            with Recorder() as recorder:
+                await job(data)
+            recorded[name] = recorder.queries
+    finally:
+        settings.FAST_SERIALIZATION = fast_serialization
+        load.app.dependency_overrides.clear()
+        await engine.dispose()
+        await read_engine.dispose()
+    return recorded
+
+
+def explain(connection: sqlite3.Connection, statement: str, parameters: Any) -> List[str]:
+    return [row[-1] for row in connection.execute("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    return [detail for detail in plan if FULL_SCAN.match(detail)]
+
+
+async def record_plans(config: Dict[str, Any] = None) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """Scenario name -> (statement, plan) for every distinct statement it executed."""
+    recorded = await record({**load.DEFAULTS, **SIZES, **(config or {})})
+    connection = sqlite3.connect(settings.DB_PATH)
+    connection.execute("ATTACH DATABASE ? AS archive", (settings.ARCHIVE_DB_PATH,))
+    try:
+        plans = {}
+        for name, queries in recorded.items():
+            statements = {}
+            for statement, parameters in queries:
+                if EXPLAINABLE.match(statement) and statement not in statements:
+                    statements[statement] = explain(connection, statement, parameters)
+            plans[name] = list(statements.items())
+        return plans
+    finally:
+        connection.close()
+
+
+def main() -> int:
+    plans = asyncio.run(record_plans())
+    failures = 0
+    for name, statements in plans.items():
+        for statement, plan in statements:
+            if full_scans(plan):
+                failures += 1
+                print(f"FULL SCAN in {name}:\n    {statement}")
+                for detail in plan:
+                    print(f"        {detail}")
+    for name in load.uncovered_routes():
+        print(f"warning: {name} has no load scenario, its queries were not checked", file=sys.stderr)
+    if not failures:
+        print(f"All {sum(len(statements) for statements in plans.values())} recorded statements use an index.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Compare ORM + Pydantic serialization with FAST_SERIALIZATION on one page of tasks.
+
+Usage: ``python -m benchmarks.serialization [--rows 1000] [--repeat 20]``
+
+Seeds a temporary SQLite database with one project whose tasks have two
+assignees each, then times loading and encoding a full page both ways.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+DATA_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DB_PATH", os.path.join(DATA_DIR, "benchmark.db"))
+os.environ.setdefault("ARCHIVE_DB_PATH", os.path.join(DATA_DIR, "archive.db"))
+
+from sqlalchemy import insert  # noqa: E402
+
+from config import settings  # noqa: E402
+from core.database import Base, engine, async_session  # noqa: E402
+from core.pagination import paginate  # noqa: E402
+from core.serialization import RowMapper, render  # noqa: E402
+from models import user_models  # noqa: E402,F401
+from models.project_models import Project, Task, TaskAssignee  # noqa: E402
+from schemas import project_schemas as schemas  # noqa: E402
+
+task_rows = RowMapper(schemas.Task, Task, assignees=RowMapper(schemas.TaskAssignee, TaskAssignee))
+
+
+async def seed(rows: int) -> str:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with async_session() as session:
+        project = Project(name="benchmark")
+        session.add(project)
+        await session.flush()
+        tasks = [
+            {"id": f"task-{i:06d}", "project_id": project.id, "name": f"Task {i}", "priority": i % 5 + 1}
+            for i in range(rows)
+        ]
+        await session.execute(insert(Task), tasks)
+        await session.execute(insert(TaskAssignee), [
+            {"task_id": task["id"], "assignee_id": assignee, "assignee_type": "AGENT", "role": "worker"}
+            for task in tasks
+            for assignee in ("agent-1", "agent-2")
+        ])
+        await session.commit()
+        return project.id
+
+
+async def page(project_id: str, rows: int) -> bytes:
+    async with async_session() as session:
+        query = task_rows.select().where(Task.project_id == project_id)
+        tasks = await task_rows.all(session, paginate(query, Task, 1, rows))
+        return render(task_rows.validate(tasks))
+
+
+async def measure(project_id: str, rows: int, repeat: int, fast: bool) -> float:
+    settings.FAST_SERIALIZATION = fast
+    await page(project_id, rows)  # warm up the connection pool and statement cache
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await page(project_id, rows)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+async def main(rows: int, repeat: int) -> None:
+    project_id = await seed(rows)
+    orm = await measure(project_id, rows, repeat, fast=False)
+    fast = await measure(project_id, rows, repeat, fast=True)
+    print(f"{rows} tasks per page, median of {repeat} runs")
+    print(f"  orm + pydantic:      {orm * 1000:8.2f} ms")
+    print(f"  FAST_SERIALIZATION:  {fast * 1000:8.2f} ms  ({orm / fast:.1f}x)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -1,15 +1,104 @@
 import os
+from typing import Optional
 from pydantic import BaseSettings
 from pathlib import Path
 
 class Settings(BaseSettings):
     # Database configuration
     DB_PATH: str = os.getenv("DB_PATH", "database.db")
+    # Archived projects are moved to this file, attached to every connection as "archive"
+    ARCHIVE_DB_PATH: str = os.getenv("ARCHIVE_DB_PATH", "archive.db")
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    
+    # Reader pool used by GET endpoints; defaults to a read-only connection to DB_PATH
+    DB_READ_URL: Optional[str] = None
+    DB_READ_POOL_SIZE: int = 10
+    DB_READ_MAX_OVERFLOW: int = 20
+    
+    # SQLite tuning, applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_FOREIGN_KEYS: bool = True
+    SQLITE_CACHE_SIZE: int = -64000  # negative values are in KiB (64 MiB)
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    
+    # Serving: with WORKERS > 1, `python main.py` starts that many uvicorn processes;
+    # they invalidate each other's caches through the change log (services/worker_sync.py)
+    WORKERS: int = 1
+    WORKER_SYNC_INTERVAL: float = 0.05  # seconds between PRAGMA data_version checks
+    WORKER_SYNC_BATCH_SIZE: int = 1000
     
     # API configuration
     API_TITLE: str = "Project Management API"
     API_VERSION: str = "1.0.0"
     API_DESCRIPTION: str = "API for managing projects, tasks, and members"
+    MAX_PAGE_SIZE: int = 1000  # upper bound of pageSize on list endpoints
+    
+    # Serialize list endpoints from plain columns with orjson instead of ORM objects + Pydantic
+    FAST_SERIALIZATION: bool = False
+    
+    # Permission resolution cache
+    PERMISSION_CACHE_SIZE: int = 10000
+    PERMISSION_CACHE_TTL: int = 300
+    
+    # Authenticated-user cache (user loaded for a token subject)
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 30  # bounds staleness of changes made outside the /users routes
+    
+    # Response cache for conditional GETs on list endpoints
+    RESPONSE_CACHE_SIZE: int = 1000
+    RESPONSE_CACHE_TTL: int = 60
+    
+    # Project event stream
+    EVENT_QUEUE_SIZE: int = 1000  # per subscriber
+    EVENT_HEARTBEAT_SECONDS: int = 15
+    EVENT_REPLAY_BATCH_SIZE: int = 500
+    EVENT_LOG_SIZE: int = 100000  # rows kept in project_events
+    EVENT_LOG_PRUNE_SECONDS: int = 300
+    
+    # Activity log: changes are queued in memory and written in batches
+    ACTIVITY_QUEUE_SIZE: int = 10000  # entries beyond this are dropped and counted
+    ACTIVITY_BATCH_SIZE: int = 500
+    ACTIVITY_FLUSH_SECONDS: float = 1.0
+    
+    # Request instrumentation (Server-Timing header, /metrics) and opt-in cProfile
+    # dumps of the slowest sampled requests
+    SERVER_TIMING: bool = True
+    PROFILE_SLOW_REQUESTS: bool = False
+    PROFILE_SAMPLE_RATE: float = 0.1
+    PROFILE_KEEP: int = 20
+    PROFILE_DIR: str = "profiles"
+    
+    # Task claims
+    TASK_LEASE_SECONDS: int = 300
+    TASK_LEASE_MAX_SECONDS: int = 3600
+    TASK_LEASE_SWEEP_SECONDS: int = 30
+    
+    # Project summaries
+    TASK_DONE_STATUS: str = "DONE"  # counts towards stage progress
+    SUMMARY_MAX_PROJECTS: int = 100
+    
+    # Critical-path schedules (durations in days)
+    SCHEDULE_DEFAULT_STAGE_DAYS: float = 1.0  # stages without start_date/end_date
+    SCHEDULE_TASK_DAYS: float = 1.0
+    SCHEDULE_CACHE_SIZE: int = 1000  # projects
+    SCHEDULE_CACHE_TTL: int = 300  # bounds staleness from writes of other processes
+    
+    # Project archiving: projects in ARCHIVE_PROJECT_STATUS that have not been
+    # updated for ARCHIVE_AFTER_DAYS are moved to ARCHIVE_DB_PATH by a background job
+    ARCHIVE_PROJECT_STATUS: str = "COMPLETED"
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_SWEEP_SECONDS: int = 3600
+    ARCHIVE_SWEEP_BATCH_SIZE: int = 50  # projects per sweep, each moved in its own transaction
+    
+    # Bulk endpoints
+    TASK_BATCH_MAX_SIZE: int = 5000
+    EXPORT_CHUNK_SIZE: int = 1000
+    IMPORT_CHUNK_SIZE: int = 5000
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key")
@@ -23,3 +112,25 @@ settings = Settings()
 
 def get_db_url():
     return f"sqlite+aiosqlite:///{settings.DB_PATH}"
+
+def get_read_db_url():
+    if settings.DB_READ_URL:
+        return settings.DB_READ_URL
+    return f"sqlite+aiosqlite:///file:{settings.DB_PATH}?mode=ro&uri=true"
+
+def get_sqlite_pragmas(read_only: bool = False):
+    pragmas = [
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA foreign_keys={'ON' if settings.SQLITE_FOREIGN_KEYS else 'OFF'}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+    ]
+    if read_only:
+        # The journal mode is a property of the database file and is set by the writer
+        return pragmas + ["PRAGMA query_only=ON"]
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA archive.journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA archive.synchronous={settings.SQLITE_SYNCHRONOUS}",
+    ] + pragmas
\ No newline at end of file
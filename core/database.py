@@ -1,13 +1,92 @@
+import fcntl
+from contextlib import contextmanager
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from config import get_db_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from config import settings, get_db_url, get_read_db_url, get_sqlite_pragmas
+from core.metrics import instrument_engine, instrument_sessions
 
 Base = declarative_base()
 
-engine = create_async_engine(get_db_url(), echo=True)
+def build_engine(url: str, pool_size: int, max_overflow: int, read_only: bool = False):
+    db_engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    instrument_engine(db_engine)
+    if db_engine.dialect.name != "sqlite":
+        return db_engine
+    pragmas = get_sqlite_pragmas(read_only)
+    archive = settings.ARCHIVE_DB_PATH
+    if read_only and db_engine.url.query.get("uri") == "true":
+        # Like the main database: a reader must not create the file, the writer does
+        archive = f"file:{archive}?mode=ro"
+
+    @event.listens_for(db_engine.sync_engine, "connect")
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # Archived projects live in their own file (see services/archive.py)
+        cursor.execute("ATTACH DATABASE ? AS archive", (archive,))
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return db_engine
+
+# Writer pool, used by every route that modifies data
+engine = build_engine(get_db_url(), settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Reader pool, used by GET routes so reads never queue behind writers for a connection
+read_engine = build_engine(
+    get_read_db_url(), settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW, read_only=True
+)
+read_session = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
+# AsyncSession runs every statement through a sync Session
+instrument_sessions()
+
+@contextmanager
+def schema_lock():
+    """Exclusive lock next to the database file; the OS releases it if the process dies."""
+    with open(f"{settings.DB_PATH}.lock", "w") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+def acquire_jobs_lock():
+    """Non-blocking exclusive lock for the periodic jobs, or None if another process holds it.
+
+    The caller keeps the returned file open for as long as it runs the jobs and
+    closes it to let go; the OS releases it if the process dies.
+    """
+    handle = open(f"{settings.DB_PATH}.jobs.lock", "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+async def create_schema():
+    # Processes starting together would otherwise race on CREATE TABLE; whoever
+    # comes second finds every table and issues no DDL
+    with schema_lock():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
 async def get_db():
     async with async_session() as session:
         yield session
+
+async def get_read_db():
+    async with read_session() as session:
+        yield session
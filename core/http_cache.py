@@ -0,0 +1,96 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.cache import TTLCache
+from core.serialization import render
+from models.project_models import CollectionVersion
+
+# Conditional GET support for list endpoints.
+# Every cached collection has a scope, e.g. ("projects",) or ("stages", project_id),
+# with a version counter that write routes bump in their transaction. The ETag is
+# derived from that version and the query string, so an unchanged collection
+# answers 304 or is served from the response cache with a single primary-key read
+# instead of the list query and serialization. The counters live in the database,
+# so every worker computes the same ETag for the same data.
+
+Scope = Tuple[str, ...]
+
+
+def scope_key(scope: Scope) -> str:
+    return ":".join(scope)
+
+
+class CollectionVersions:
+    async def get(self, db: AsyncSession, scope: Scope) -> int:
+        result = await db.execute(select(CollectionVersion.version).where(CollectionVersion.scope == scope_key(scope)))
+        return result.scalar_one_or_none() or 0
+
+    async def bump(self, db: AsyncSession, *scopes: Scope) -> None:
+        """Advance the versions inside the caller's write transaction."""
+        statement = insert(CollectionVersion).values([{"scope": scope_key(scope), "version": 1} for scope in scopes])
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[CollectionVersion.scope],
+            set_={"version": CollectionVersion.version + 1}
+        ))
+
+
+class CachedResponse:
+    __slots__ = ("etag", "body", "headers")
+
+    def __init__(self, etag: str, body: bytes, headers: Dict[str, str]):
+        self.etag = etag
+        self.body = body
+        self.headers = headers
+
+
+collection_versions = CollectionVersions()
+response_cache = TTLCache("responses", settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
+
+
+def make_etag(scope: Scope, version: int, query: Tuple) -> str:
+    raw = f"{scope!r}:{version}:{query!r}"
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def cached_json(
+    request: Request,
+    db: AsyncSession,
+    scope: Scope,
+    build: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]]
+) -> Response:
+    """Serve a JSON list through the ETag check and the response cache.
+
+    ``build`` runs the query on a miss and returns the content (anything
+    ``jsonable_encoder`` accepts, or plain dicts in fast mode) together with any extra headers (e.g. the next page cursor).
+    """
+    query = tuple(sorted(request.query_params.multi_items()))
+    etag = make_etag(scope, await collection_versions.get(db, scope), query)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    key = (request.url.path, query)
+    cached = response_cache.get(key)
+    if cached is None or cached.etag != etag:
+        content, headers = await build()
+        cached = CachedResponse(etag, render(content), headers)
+        response_cache.set(key, cached)
+
+    return Response(
+        content=cached.body,
+        media_type="application/json",
+        headers={**cached.headers, "ETag": etag, "Cache-Control": "no-cache"}
+    )
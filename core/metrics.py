@@ -0,0 +1,355 @@
+import bisect
+import cProfile
+import heapq
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from config import settings
+from core.cache import get_cache_stats
+
+# Request instrumentation.
+# RequestMetricsMiddleware opens a RequestTimings per HTTP request in a context
+# variable; the cursor hooks on every engine add SQL count and time to it, the
+# session hook adds the time the ORM spends turning rows into objects, and
+# InstrumentedRoute splits the rest into dependency resolution (auth, body
+# parsing, sessions), the endpoint itself and response serialization. The split
+# is returned as a Server-Timing header and aggregated into per-route
+# histograms that /metrics renders in the Prometheus text format.
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class RequestTimings:
+    __slots__ = (
+        "start", "sql_count", "sql_time", "hydration", "orm_depth",
+        "handler_start", "endpoint_start", "endpoint_end", "serialization",
+    )
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.hydration = 0.0
+        self.orm_depth = 0
+        self.handler_start: Optional[float] = None
+        self.endpoint_start: Optional[float] = None
+        self.endpoint_end: Optional[float] = None
+        self.serialization = 0.0
+
+    @property
+    def dependencies(self) -> float:
+        if self.handler_start is None or self.endpoint_start is None:
+            return 0.0
+        return self.endpoint_start - self.handler_start
+
+    def server_timing(self, total: float) -> str:
+        return ", ".join([
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"',
+            f"orm;dur={self.hydration * 1000:.2f}",
+            f"deps;dur={self.dependencies * 1000:.2f}",
+            f"serialize;dur={self.serialization * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ])
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def measure_serialization() -> Iterator[None]:
+    """Count the enclosed encoding work as serialization time of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _timings.get()
+        if timings is not None:
+            timings.serialization += time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _timings.get()
+    if timings is not None:
+        timings.sql_count += 1
+        timings.sql_time += time.perf_counter() - context._metrics_start
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _do_orm_execute(orm_execute_state: ORMExecuteState):
+    timings = _timings.get()
+    if timings is None or timings.orm_depth:
+        # Loads issued while an ORM statement is running (selectinload) count towards it
+        return None
+    timings.orm_depth += 1
+    start = time.perf_counter()
+    sql_before = timings.sql_time
+    try:
+        # AsyncSession prebuffers the rows, so every object is built before this returns
+        return orm_execute_state.invoke_statement()
+    finally:
+        timings.orm_depth -= 1
+        timings.hydration += time.perf_counter() - start - (timings.sql_time - sql_before)
+
+
+def instrument_sessions(session_class: type = Session) -> None:
+    event.listen(session_class, "do_orm_execute", _do_orm_execute)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, label_values: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, series in sorted(self._series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f'{self.name}_bucket{{{labels},le="{bound:g}"}} {cumulative}'
+            cumulative += series[len(self.buckets)]
+            yield f'{self.name}_bucket{{{labels},le="+Inf"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {series[-1]:.6f}"
+            yield f"{self.name}_count{{{labels}}} {cumulative}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], int] = {}
+
+    def inc(self, label_values: Tuple[str, ...]) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in sorted(self._values.items()):
+            yield f"{self.name}{{{_labels(self.labels, label_values)}}} {value}"
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+ROUTE_LABELS = ("method", "route")
+
+requests_total = Counter("http_requests_total", "HTTP requests by route and status.", ROUTE_LABELS + ("status",))
+request_duration = Histogram("http_request_duration_seconds", "Time until the response headers are sent.", DURATION_BUCKETS, ROUTE_LABELS)
+sql_duration = Histogram("http_request_sql_duration_seconds", "Time spent executing SQL per request.", DURATION_BUCKETS, ROUTE_LABELS)
+sql_queries = Histogram("http_request_sql_queries", "SQL statements executed per request.", QUERY_BUCKETS, ROUTE_LABELS)
+serialization_duration = Histogram("http_request_serialization_seconds", "Response validation and encoding time per request.", DURATION_BUCKETS, ROUTE_LABELS)
+hydration_duration = Histogram("http_request_orm_seconds", "Time the ORM spends building objects from rows per request.", DURATION_BUCKETS, ROUTE_LABELS)
+dependency_duration = Histogram("http_request_dependencies_seconds", "Dependency resolution (auth, body parsing, sessions) per request.", DURATION_BUCKETS, ROUTE_LABELS)
+
+METRICS = (
+    requests_total, request_duration, sql_duration, sql_queries, hydration_duration,
+    serialization_duration, dependency_duration,
+)
+
+
+CACHE_METRICS = (
+    ("cache_hits_total", "counter", "hits", "Lookups answered by an in-process cache."),
+    ("cache_misses_total", "counter", "misses", "Lookups an in-process cache could not answer."),
+    ("cache_evictions_total", "counter", "evictions", "Entries evicted to stay within the cache size."),
+    ("cache_size", "gauge", "size", "Entries currently held by an in-process cache."),
+)
+
+
+def _cache_metrics() -> Iterator[str]:
+    # Read from the caches' own counters when scraped; hit rate is hits / (hits + misses)
+    stats = get_cache_stats()
+    for name, kind, key, help in CACHE_METRICS:
+        yield f"# HELP {name} {help}"
+        yield f"# TYPE {name} {kind}"
+        for cache in stats:
+            yield f'{name}{{{_labels(("cache",), (cache["name"],))}}} {cache[key]}'
+
+
+def render_metrics() -> str:
+    lines = [line for metric in METRICS for line in metric.render()]
+    lines.extend(_cache_metrics())
+    return "\n".join(lines) + "\n"
+
+
+class SlowRequestProfiler:
+    """Keeps cProfile dumps of the slowest sampled requests in PROFILE_DIR.
+
+    cProfile records the whole thread, so a dump may include work of requests
+    that ran concurrently on the event loop; only one request is profiled at a time.
+    """
+
+    def __init__(self, directory: str, keep: int, sample_rate: float):
+        self.directory = directory
+        self.keep = keep
+        self.sample_rate = sample_rate
+        self.active = False
+        self._slowest: List[Tuple[float, str]] = []  # min-heap of (duration, file)
+
+    def start(self) -> Optional[cProfile.Profile]:
+        if self.active or random.random() >= self.sample_rate:
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        self.active = True
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile, method: str, route: str, duration: float) -> None:
+        profiler.disable()
+        self.active = False
+        if len(self._slowest) >= self.keep and duration <= self._slowest[0][0]:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-")
+        path = os.path.join(self.directory, f"{duration * 1000:09.1f}ms-{method}-{slug}-{uuid.uuid4().hex[:8]}.prof")
+        profiler.dump_stats(path)
+        logger.info("Profiled %s %s in %.1f ms: %s", method, route, duration * 1000, path)
+
+        heapq.heappush(self._slowest, (duration, path))
+        if len(self._slowest) > self.keep:
+            _, evicted = heapq.heappop(self._slowest)
+            try:
+                os.remove(evicted)
+            except OSError:
+                pass
+
+
+profiler = SlowRequestProfiler(settings.PROFILE_DIR, settings.PROFILE_KEEP, settings.PROFILE_SAMPLE_RATE)
+
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute that marks when the endpoint starts and returns.
+
+    Time before the endpoint is dependency resolution; time between its return
+    and the finished response is response_model validation and JSON encoding.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            timings = _timings.get()
+            if timings is not None:
+                timings.endpoint_start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                if timings is not None:
+                    timings.endpoint_end = time.perf_counter()
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timings = _timings.get()
+            if timings is not None:
+                timings.handler_start = time.perf_counter()
+            response = await handler(request)
+            if timings is not None and timings.endpoint_end is not None:
+                timings.serialization += time.perf_counter() - timings.endpoint_end
+            return response
+
+        return timed_handler
+
+
+_route_paths: Dict[Callable, str] = {}
+
+
+def _route_label(scope) -> str:
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        # Unmatched paths share one label to keep the series count bounded
+        return "unmatched"
+    path = _route_paths.get(endpoint)
+    if path is None:
+        path = next((r.path for r in scope["app"].routes if getattr(r, "endpoint", None) is endpoint), "unmatched")
+        _route_paths[endpoint] = path
+    return path
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording Server-Timing, per-route histograms and profiles."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        profile = profiler.start() if settings.PROFILE_SLOW_REQUESTS else None
+        status = ["500"]
+        total = [0.0]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+                total[0] = time.perf_counter() - timings.start
+                if settings.SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing(total[0]).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            route = _route_label(scope)
+            labels = (scope["method"], route)
+            if not total[0]:
+                total[0] = time.perf_counter() - timings.start
+            requests_total.inc(labels + (status[0],))
+            request_duration.observe(labels, total[0])
+            sql_duration.observe(labels, timings.sql_time)
+            sql_queries.observe(labels, timings.sql_count)
+            hydration_duration.observe(labels, timings.hydration)
+            serialization_duration.observe(labels, timings.serialization)
+            dependency_duration.observe(labels, timings.dependencies)
+            if profile is not None:
+                profiler.finish(profile, scope["method"], route, total[0])
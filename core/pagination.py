@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import String, literal, tuple_
+
+# Keyset pagination shared by the list endpoints.
+# Rows are always ordered by (created_at, id); a cursor is the opaque, base64
+# encoded sort key of the last row of the previous page, so the next page is a
+# single index range scan instead of an OFFSET that skips rows one by one.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def format_timestamp(value: datetime) -> str:
+    """Render a datetime the way SQLite's CURRENT_TIMESTAMP stores it."""
+    if value.microsecond:
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def encode_cursor(*values: Any) -> str:
+    key = [format_timestamp(v) if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 2) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, list) or len(key) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def after_cursor(created_at, row_id, cursor: str):
+    """WHERE clause for the rows after ``cursor`` in (created_at, id) order, given those two columns."""
+    last_created_at, last_id = decode_cursor(cursor)
+    return tuple_(created_at, row_id) > tuple_(literal(last_created_at, String), literal(last_id, String))
+
+
+def paginate(query, model, page: int, page_size: int, cursor: Optional[str] = None):
+    """Apply the stable (created_at, id) ordering and either keyset or offset paging."""
+    query = query.order_by(model.created_at, model.id)
+    if cursor:
+        query = query.where(after_cursor(model.created_at, model.id, cursor))
+    else:
+        query = query.offset((page - 1) * page_size)
+    return query.limit(page_size)
+
+
+def next_cursor_headers(rows: Sequence[Any], page_size: int) -> Dict[str, str]:
+    if rows and len(rows) == page_size:
+        last = rows[-1]
+        # Rows are ORM objects, or plain dicts when FAST_SERIALIZATION is on
+        if isinstance(last, Mapping):
+            return {NEXT_CURSOR_HEADER: encode_cursor(last["created_at"], last["id"])}
+        return {NEXT_CURSOR_HEADER: encode_cursor(last.created_at, last.id)}
+    return {}
+
+
+def set_next_cursor(response: Response, rows: Sequence[Any], page_size: int) -> None:
+    """Expose the cursor of the following page when the current one is full."""
+    response.headers.update(next_cursor_headers(rows, page_size))
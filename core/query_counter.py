@@ -0,0 +1,37 @@
+from typing import Any, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryCounter:
+    """Counts the SQL statements an engine executes while the block is active.
+
+    Used to keep the number of queries per request bounded, e.g.:
+
+        with QueryCounter(engine) as counter:
+            await client.get(f"/api/projects/{project_id}/tasks")
+        assert counter.count <= 2
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine.sync_engine
+        self.statements: List[str] = []
+        self.parameters: List[Any] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        # An executemany runs one statement for many parameter sets; the first stands for all
+        self.parameters.append(parameters[0] if executemany else parameters)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return False
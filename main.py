@@ -1,13 +1,20 @@
+import asyncio
 import uvicorn
 from fastapi import FastAPI, Depends
 from fastapi_users import FastAPIUsers
 from fastapi_users.authentication import JWTAuthentication
-from fastapi_users.db import SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession
 from config import settings
-from core.database import engine, Base, get_async_session
-from routers import project_router
+from core.database import engine, acquire_jobs_lock, create_schema, get_db
+from routers import project_router, admin_router, metrics_router
+from core.metrics import RequestMetricsMiddleware
 from models.user_models import User, UserCreate, UserUpdate, UserDB
+from services.activity_log import activity_log
+from services.archive import archive_projects_periodically
+from services.change_feed import prune_change_log_periodically
+from services.task_leases import sweep_expired_leases_periodically
+from services.user_cache import CachedUserDatabase
+from services.worker_sync import worker_sync
 
 # JWT configuration
 SECRET = settings.SECRET_KEY
@@ -18,8 +25,10 @@ jwt_authentication = JWTAuthentication(
 )
 
 # FastAPI Users setup
-async def get_user_db(session: AsyncSession = Depends(get_async_session)):
-    yield SQLAlchemyUserDatabase(UserDB, session, User)
+# The user behind a token is resolved from a short-lived cache (USER_CACHE_TTL);
+# /users updates and deletions evict it
+async def get_user_db(session: AsyncSession = Depends(get_db)):
+    yield CachedUserDatabase(UserDB, session, User)
 
 fastapi_users = FastAPIUsers(
     get_user_db,
@@ -35,6 +44,7 @@ app = FastAPI(
     version=settings.API_VERSION,
     description=settings.API_DESCRIPTION
 )
+app.add_middleware(RequestMetricsMiddleware)
 
 # Include routers
 app.include_router(
@@ -53,11 +63,46 @@ app.include_router(
     tags=["users"]
 )
 app.include_router(project_router.router)
+app.include_router(admin_router.router)
+app.include_router(metrics_router.router)
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # A no-op when `python main.py` created the schema before starting the workers
+    await create_schema()
+    activity_log.start()
+    app.state.background_tasks = []
+    # The database-wide jobs run in whichever worker gets the lock first; the
+    # others would only repeat the same deletes and race for the write lock
+    app.state.jobs_lock = acquire_jobs_lock()
+    if app.state.jobs_lock is not None:
+        app.state.background_tasks += [
+            asyncio.create_task(prune_change_log_periodically()),
+            asyncio.create_task(sweep_expired_leases_periodically()),
+            asyncio.create_task(archive_projects_periodically()),
+        ]
+    # Every worker follows the others' writes to keep its own caches and streams current
+    if settings.WORKERS > 1:
+        app.state.background_tasks.append(asyncio.create_task(worker_sync.run()))
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in app.state.background_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.background_tasks, return_exceptions=True)
+    if app.state.jobs_lock is not None:
+        app.state.jobs_lock.close()
+    # Last, so the entries of changes made by the jobs above are written too
+    await activity_log.close()
+
+async def prepare():
+    await create_schema()
+    await engine.dispose()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Schema setup runs once here, before any worker starts
+    asyncio.run(prepare())
+    if settings.WORKERS > 1:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=settings.WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
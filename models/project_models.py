@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Text, Integer, ForeignKey
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, Index, Table, event
 
 # Database models define the structure and relationships of database tables
 # These models are used for database operations and data persistence
@@ -13,6 +13,10 @@ from core.database import Base
 # 
 class Project(Base):
     __tablename__ = 'projects'
+    __table_args__ = (
+        Index('idx_projects_status', 'status', 'created_at', 'id'),
+        Index('idx_projects_created', 'created_at', 'id'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     creator_id = Column(String, ForeignKey('users.id', ondelete='SET NULL'))
     name = Column(String(255), nullable=False)
@@ -25,6 +29,9 @@ class Project(Base):
 
 class Stage(Base):
     __tablename__ = 'stages'
+    __table_args__ = (
+        Index('idx_stages_project', 'project_id', 'created_at', 'id'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = Column(String, ForeignKey('projects.id', ondelete='CASCADE'))
     name = Column(String(255), nullable=False)
@@ -38,15 +45,42 @@ class Stage(Base):
 
 class TaskAssignee(Base):
     __tablename__ = 'task_assignees'
+    __table_args__ = (
+        Index('idx_task_assignees_task', 'task_id', 'created_at', 'id'),
+        # Serves the assignee inbox, which pages on the task's (created_at, id)
+        Index('idx_task_assignees_inbox', 'assignee_id', 'assignee_type', 'task_created_at', 'task_id'),
+        Index('idx_task_assignees_lease', 'lease_expires_at'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     task_id = Column(String, ForeignKey('tasks.id', ondelete='CASCADE'))
     assignee_id = Column(String, nullable=False)
     assignee_type = Column(String(50), nullable=False)
     role = Column(String(50), nullable=False)
+    lease_expires_at = Column(DATETIME)  # set when the task was claimed by a worker
+    task_created_at = Column(DATETIME)  # copy of Task.created_at, filled in by TASK_ASSIGNEE_DDL
     created_at = Column(DATETIME, server_default=func.now())
 
+# The task's created_at is copied on insert, whichever route or import adds the
+# assignee, so the inbox can page on task_assignees alone before joining tasks
+TASK_ASSIGNEE_DDL = [
+    """CREATE TRIGGER task_assignees_task_created_at AFTER INSERT ON task_assignees
+    WHEN new.task_created_at IS NULL BEGIN
+        UPDATE task_assignees SET task_created_at = (SELECT created_at FROM tasks WHERE id = new.task_id)
+        WHERE id = new.id;
+    END""",
+]
+
+@event.listens_for(TaskAssignee.__table__, 'after_create')
+def create_task_assignee_trigger(target, connection, **kw):
+    for statement in TASK_ASSIGNEE_DDL:
+        connection.exec_driver_sql(statement)
+
 class Task(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('idx_tasks_project', 'project_id', 'created_at', 'id'),
+        Index('idx_tasks_stage', 'stage_id'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = Column(String, ForeignKey('projects.id', ondelete='CASCADE'))
     stage_id = Column(String, ForeignKey('stages.id', ondelete='SET NULL'))
@@ -58,11 +92,43 @@ class Task(Base):
     updated_at = Column(DATETIME, server_default=func.now(), onupdate=func.now())
     assignees = relationship('TaskAssignee', backref='task', cascade='all, delete-orphan')
 
+# Serves tasks:claim, which picks the oldest TODO task with the highest priority
+Index('idx_tasks_claim', Task.project_id, Task.status, Task.priority.desc(), Task.created_at, Task.id)
+
+class StageDependency(Base):
+    """Edge of the stage schedule: stage_id cannot start before depends_on_id has ended.
+    project_id is denormalized so a project's whole graph loads with one index range read.
+    """
+    __tablename__ = 'stage_dependencies'
+    __table_args__ = (
+        Index('idx_stage_dependencies_project', 'project_id'),
+        Index('idx_stage_dependencies_depends_on', 'depends_on_id'),
+    )
+    stage_id = Column(String, ForeignKey('stages.id', ondelete='CASCADE'), primary_key=True)
+    depends_on_id = Column(String, ForeignKey('stages.id', ondelete='CASCADE'), primary_key=True)
+    project_id = Column(String, ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    created_at = Column(DATETIME, server_default=func.now())
+
+class TaskDependency(Base):
+    """Edge of the task schedule: task_id cannot start before depends_on_id is finished."""
+    __tablename__ = 'task_dependencies'
+    __table_args__ = (
+        Index('idx_task_dependencies_project', 'project_id'),
+        Index('idx_task_dependencies_depends_on', 'depends_on_id'),
+    )
+    task_id = Column(String, ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True)
+    depends_on_id = Column(String, ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True)
+    project_id = Column(String, ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    created_at = Column(DATETIME, server_default=func.now())
+
 class ProjectPermission(Base):
     """Defines available permissions that can be assigned to project members.
     Acts as a permission template that can be reused across projects.
     """
     __tablename__ = 'project_permissions'
+    __table_args__ = (
+        Index('idx_permissions_created', 'created_at', 'id'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(50), nullable=False, unique=True)  # Unique permission name (e.g. 'task_create')
     description = Column(Text)  # Human-readable description of the permission
@@ -73,6 +139,10 @@ class ProjectMemberPermission(Base):
     Represents the actual assignment of a permission to a member.
     """
     __tablename__ = 'project_member_permissions'
+    __table_args__ = (
+        Index('idx_member_permissions_member', 'member_id', 'created_at', 'id'),
+        Index('idx_member_permissions_permission', 'permission_id'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     member_id = Column(String, ForeignKey('project_members.id', ondelete='CASCADE'))  # Reference to project member
     permission_id = Column(String, ForeignKey('project_permissions.id', ondelete='CASCADE'))  # Reference to permission
@@ -84,6 +154,10 @@ class ProjectMember(Base):
     Links a user to a project and manages their access rights.
     """
     __tablename__ = 'project_members'
+    __table_args__ = (
+        Index('idx_members_project', 'project_id', 'created_at', 'id'),
+        Index('idx_members_member', 'member_id', 'project_id'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = Column(String, ForeignKey('projects.id', ondelete='CASCADE'))  # Reference to project
     member_id = Column(String, ForeignKey('users.id', ondelete='CASCADE'))  # Reference to user
@@ -95,3 +169,172 @@ class ProjectMember(Base):
         "ProjectMemberPermission", 
         cascade="all, delete-orphan"  # Automatically delete permissions when member is deleted
     )
+
+class ImportJob(Base):
+    """Tracks a streaming NDJSON import so it can report progress and resume.
+    lines_committed is the number of input lines covered by committed chunks.
+    """
+    __tablename__ = 'import_jobs'
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    status = Column(String(50), nullable=False, default='RUNNING')  # RUNNING, COMPLETED or FAILED
+    lines_committed = Column(Integer, nullable=False, default=0)
+    records_committed = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    created_at = Column(DATETIME, server_default=func.now())
+    updated_at = Column(DATETIME, server_default=func.now(), onupdate=func.now())
+
+class ProjectEvent(Base):
+    """Change log behind the project event stream.
+    Ids are monotonic and double as SSE event ids, so clients can resume with Last-Event-ID.
+    Only the most recent EVENT_LOG_SIZE rows are kept.
+    """
+    __tablename__ = 'project_events'
+    __table_args__ = (
+        Index('idx_project_events_project', 'project_id', 'id'),
+        {'sqlite_autoincrement': True},  # never reuse ids of pruned events
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    project_id = Column(String, nullable=False)
+    event_type = Column(String(50), nullable=False)  # e.g. 'task.created', 'member.added'
+    payload = Column(Text, nullable=False)  # JSON document
+    created_at = Column(DATETIME, server_default=func.now())
+
+class ActivityEntry(Base):
+    """Append-only audit history of project changes: who did what, with the event payload.
+    Rows are written in batches by services/activity_log.py, never updated, and not
+    pruned or archived with their project.
+    """
+    __tablename__ = 'activity_log'
+    __table_args__ = (
+        Index('idx_activity_log_project', 'project_id', 'id'),
+    )
+    id = Column(Integer, primary_key=True)
+    project_id = Column(String, nullable=False)
+    actor_id = Column(String)  # authenticated user, NULL for unauthenticated routes and background jobs
+    action = Column(String(50), nullable=False)  # event type, e.g. 'task.created'
+    details = Column(Text, nullable=False)  # JSON document
+    created_at = Column(DATETIME, nullable=False)  # when the change was published
+
+class CollectionVersion(Base):
+    """Version of a cached list (e.g. 'projects', 'stages:<project_id>'), bumped by the
+    writes that change it; the ETags of core/http_cache.py are derived from it.
+    """
+    __tablename__ = 'collection_versions'
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class ProjectRollupCounter(Base):
+    """Per-project counters behind the summary endpoints, kept up to date by the
+    task, assignee and member writes in the same transaction (see services/rollups.py).
+    metric is one of status, priority, stage_status, assignee_type or members.
+    """
+    __tablename__ = 'project_rollup_counters'
+    project_id = Column(String, ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    metric = Column(String(50), primary_key=True)
+    key = Column(String(255), primary_key=True)  # e.g. 'TODO', '5', '<stage_id>:DONE'
+    count = Column(Integer, nullable=False, default=0)
+
+class SearchDocument(Base):
+    """Maps rows of the search_index FTS5 table (rowid = id) to the task or project they mirror.
+    Both tables are maintained by the triggers in SEARCH_DDL, not by the application.
+    """
+    __tablename__ = 'search_documents'
+    __table_args__ = (
+        Index('idx_search_documents_entity', 'kind', 'entity_id', unique=True),
+    )
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(20), nullable=False)  # 'task' or 'project'
+    entity_id = Column(String, nullable=False)
+    project_id = Column(String, nullable=False)
+
+# Full-text index over task and project names/descriptions. Titles weigh ten times
+# more than descriptions in the bm25 rank; the prefix indexes serve "term*" queries.
+SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE search_index USING fts5(
+        title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    "INSERT INTO search_index(search_index, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+]
+for kind, source, project_column in (('task', 'tasks', 'project_id'), ('project', 'projects', 'id')):
+    document = f"(SELECT id FROM search_documents WHERE kind = '{kind}' AND entity_id = {{row}}.id)"
+    SEARCH_DDL += [
+        f"""INSERT INTO search_documents (kind, entity_id, project_id)
+        SELECT '{kind}', id, {project_column} FROM {source}""",
+        f"""INSERT INTO search_index (rowid, title, body)
+        SELECT d.id, s.name, s.description FROM {source} s
+        JOIN search_documents d ON d.kind = '{kind}' AND d.entity_id = s.id""",
+        f"""CREATE TRIGGER {source}_search_insert AFTER INSERT ON {source} BEGIN
+            INSERT INTO search_documents (kind, entity_id, project_id) VALUES ('{kind}', new.id, new.{project_column});
+            INSERT INTO search_index (rowid, title, body) VALUES (last_insert_rowid(), new.name, new.description);
+        END""",
+        f"""CREATE TRIGGER {source}_search_update AFTER UPDATE OF name, description ON {source} BEGIN
+            UPDATE search_index SET title = new.name, body = new.description
+            WHERE rowid = {document.format(row='new')};
+        END""",
+        f"""CREATE TRIGGER {source}_search_delete AFTER DELETE ON {source} BEGIN
+            DELETE FROM search_index WHERE rowid = {document.format(row='old')};
+            DELETE FROM search_documents WHERE kind = '{kind}' AND entity_id = old.id;
+        END""",
+    ]
+
+@event.listens_for(Base.metadata, 'after_create')
+def create_search_index(target, connection, tables=(), **kw):
+    # Only when search_documents is new; existing rows are indexed by the statements above
+    if SearchDocument.__table__ in tables:
+        for statement in SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+
+@event.listens_for(Base.metadata, 'after_drop')
+def drop_search_index(target, connection, **kw):
+    connection.exec_driver_sql("DROP TABLE IF EXISTS search_index")
+
+# Archive copies of the project tables, in the database attached as "archive"
+# (ARCHIVE_DB_PATH). Archived projects are moved there with all their rows by
+# services/archive.py. The tables mirror the live ones column for column but
+# without foreign keys, which SQLite cannot resolve across database files, and
+# without the search triggers: archived projects are not searchable.
+ARCHIVE_SCHEMA = 'archive'
+
+def archive_table(table):
+    return Table(
+        table.name,
+        Base.metadata,
+        *(Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+          for column in table.columns),
+        *(Index(index.name, *(column.name for column in index.columns)) for index in table.indexes),
+        schema=ARCHIVE_SCHEMA,
+    )
+
+class ArchivedProject(Base):
+    __table__ = archive_table(Project.__table__)
+
+class ArchivedStage(Base):
+    __table__ = archive_table(Stage.__table__)
+
+class ArchivedTaskAssignee(Base):
+    __table__ = archive_table(TaskAssignee.__table__)
+
+class ArchivedTask(Base):
+    __table__ = archive_table(Task.__table__)
+    assignees = relationship(
+        'ArchivedTaskAssignee',
+        primaryjoin='ArchivedTask.id == foreign(ArchivedTaskAssignee.task_id)',
+        viewonly=True
+    )
+
+class ArchivedStageDependency(Base):
+    __table__ = archive_table(StageDependency.__table__)
+
+class ArchivedTaskDependency(Base):
+    __table__ = archive_table(TaskDependency.__table__)
+
+class ArchivedProjectMemberPermission(Base):
+    __table__ = archive_table(ProjectMemberPermission.__table__)
+
+class ArchivedProjectMember(Base):
+    __table__ = archive_table(ProjectMember.__table__)
+    permissions = relationship(
+        'ArchivedProjectMemberPermission',
+        primaryjoin='ArchivedProjectMember.id == foreign(ArchivedProjectMemberPermission.member_id)',
+        viewonly=True
+    )
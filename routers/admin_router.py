@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from typing import List
+from core.cache import get_cache_stats
+from core.metrics import InstrumentedRoute
+from services.activity_log import activity_log
+from services.change_feed import event_bus
+from services.worker_sync import worker_sync
+from schemas.project_schemas import ActivityLogStats, CacheStats, EventBusStats, WorkerSyncStats
+
+router = APIRouter(prefix="/api/admin", route_class=InstrumentedRoute)
+
+@router.get("/caches", response_model=List[CacheStats])
+async def get_caches():
+    return get_cache_stats()
+
+@router.get("/event-bus", response_model=EventBusStats)
+async def get_event_bus():
+    return event_bus.stats()
+
+@router.get("/worker-sync", response_model=WorkerSyncStats)
+async def get_worker_sync():
+    return worker_sync.stats()
+
+
+@router.get("/activity-log", response_model=ActivityLogStats)
+async def get_activity_log():
+    return activity_log.stats()
@@ -1,36 +1,105 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List, Optional
-from sqlalchemy import select
+import uuid
+import orjson
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response, Body, Query, Header
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional
+from pydantic import ValidationError
+from sqlalchemy import select, insert, delete, union
 from sqlalchemy.ext.asyncio import AsyncSession
-from models.project_models import Project, Stage, Task, TaskAssignee, ProjectMember
-from models.user_models import User
-from schemas.project_schemas import (
-    ProjectCreate,
+from sqlalchemy.orm import selectinload
+from models.project_models import (
     Project,
-    StageCreate,
     Stage,
-    TaskCreate,
     Task,
-    TaskAssigneeCreate,
     TaskAssignee,
-    MemberCreate,
-    Member
+    ProjectMember,
+    ProjectMemberPermission,
+    ProjectPermission,
+    ImportJob,
+    StageDependency,
+    TaskDependency,
+    ArchivedStage,
+    ArchivedTask,
+    ArchivedTaskAssignee,
+    ArchivedProjectMember,
+    ArchivedProjectMemberPermission
 )
-from core.database import get_db
+from models.user_models import User
+from schemas import project_schemas as schemas
+from core.pagination import NEXT_CURSOR_HEADER, after_cursor, encode_cursor, paginate, next_cursor_headers
+from core.serialization import RowMapper, page_response
+from core.metrics import InstrumentedRoute, measure_serialization
+from core.http_cache import cached_json, collection_versions
+from config import settings
+from services.permission_resolver import permission_resolver
+from services.project_export import export_project
+from services.project_import import ProjectImporter, ImportFailed
+from services.change_feed import record_event, publish_events, stream_events
+from services.task_leases import claim_next_task, sweep_expired_leases, renew_lease, release_lease
+from services.rollups import RollupDelta, load_summaries
+from services.search import search
+from services.task_updates import update_tasks
+from services.assignee_sync import duplicate_assignee, sync_assignees
+from services.archive import all_projects, archive_project, forget_project, is_archived
+from services.schedule import find_committed_cycle, schedules, stage_days
+from services.activity_log import activity_page_statement, current_actor
+from core.database import get_db, get_read_db
 from fastapi_users import FastAPIUsers, models
 from fastapi_users.manager import BaseUserManager
 from fastapi_users.authentication import JWTAuthentication
 
-def get_current_user(
+async def get_current_user(
     user: models.BaseUserDB = Depends(FastAPIUsers.get_current_user)
-) -> models.BaseUserDB:
-    return user
+) -> AsyncIterator[models.BaseUserDB]:
+    # Async, so the actor is set in the task running the route; activity log
+    # entries of the changes it publishes are attributed to this user
+    token = current_actor.set(str(user.id))
+    try:
+        yield user
+    finally:
+        current_actor.reset(token)
+
+router = APIRouter(prefix="/api", route_class=InstrumentedRoute)
+
+# Column mappers for the list endpoints, used when FAST_SERIALIZATION is on
+project_rows = RowMapper(schemas.Project, Project)
+stage_rows = RowMapper(schemas.Stage, Stage)
+assignee_rows = RowMapper(schemas.TaskAssignee, TaskAssignee)
+task_rows = RowMapper(schemas.Task, Task, assignees=assignee_rows)
+permission_rows = RowMapper(schemas.Permission, ProjectPermission)
+member_permission_rows = RowMapper(schemas.MemberPermission, ProjectMemberPermission)
+member_rows = RowMapper(schemas.Member, ProjectMember, permissions=member_permission_rows)
+
+# Same mappings over the archive tables, used with include_archived
+all_project_rows = RowMapper(schemas.Project, all_projects)
+archived_stage_rows = RowMapper(schemas.Stage, ArchivedStage)
+archived_task_rows = RowMapper(
+    schemas.Task, ArchivedTask, assignees=RowMapper(schemas.TaskAssignee, ArchivedTaskAssignee)
+)
+archived_member_rows = RowMapper(
+    schemas.Member, ArchivedProjectMember,
+    permissions=RowMapper(schemas.MemberPermission, ArchivedProjectMemberPermission)
+)
+
+async def get_task_project_id(db: AsyncSession, task_id: str) -> str:
+    result = await db.execute(select(Task.project_id).where(Task.id == task_id))
+    project_id = result.scalar_one_or_none()
+    if project_id is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return project_id
 
-router = APIRouter(prefix="/api")
+def assignee_event_data(db_assignee: TaskAssignee) -> Dict[str, Any]:
+    return {
+        "task_id": db_assignee.task_id,
+        "id": db_assignee.id,
+        "assignee_id": db_assignee.assignee_id,
+        "assignee_type": db_assignee.assignee_type,
+        "role": db_assignee.role
+    }
 
-@router.post("/projects", response_model=Project, status_code=status.HTTP_201_CREATED)
+@router.post("/projects", response_model=schemas.Project, status_code=status.HTTP_201_CREATED)
 async def create_project(
-    project: ProjectCreate, 
+    project: schemas.ProjectCreate, 
     db: AsyncSession = Depends(get_db),
     current_user: models.BaseUserDB = Depends(get_current_user)
 ):
@@ -40,40 +109,231 @@ async def create_project(
         creator_id=current_user.id
     )
     db.add(db_project)
+    await db.flush()
+    event = record_event(db, db_project.id, "project.created", {"name": db_project.name})
+    await collection_versions.bump(db, ("projects",))
     await db.commit()
+    publish_events(event)
     await db.refresh(db_project)
     return db_project
 
-@router.get("/projects", response_model=List[Project])
+@router.get("/projects", response_model=List[schemas.Project])
 async def get_projects(
-    page: int = 1,
-    pageSize: int = 10,
+    request: Request,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(10, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
+    include_archived: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    async def build():
+        if include_archived:
+            rows, model = all_project_rows, all_projects
+            query = rows.select()
+        else:
+            rows, model = project_rows, Project
+            query = rows.select().join(User, Project.creator_id == User.id, isouter=True)
+        if status:
+            query = query.where(model.status == status)
+        projects = await rows.all(db, paginate(query, model, page, pageSize, cursor))
+        return rows.validate(projects), next_cursor_headers(projects, pageSize)
+
+    return await cached_json(request, db, ("projects",), build)
+
+@router.post("/projects/import", response_model=schemas.ImportJob)
+async def import_projects(
+    request: Request,
+    job_id: Optional[str] = None,
+    chunkSize: int = settings.IMPORT_CHUNK_SIZE,
     db: AsyncSession = Depends(get_db)
 ):
-    offset = (page - 1) * pageSize
-    query = select(Project).join(User, Project.creator_id == User.id, isouter=True)
-    if status:
-        query = query.where(Project.status == status)
-    projects = await db.execute(
-        query.offset(offset).limit(pageSize)
+    if job_id:
+        job = await db.get(ImportJob, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Import job not found")
+        if job.status == "COMPLETED":
+            return job
+        job.status = "RUNNING"
+        job.error = None
+    else:
+        job = ImportJob(status="RUNNING", lines_committed=0, records_committed=0)
+        db.add(job)
+    await db.commit()
+
+    importer = ProjectImporter(job.id, job.lines_committed, max(chunkSize, 1))
+    try:
+        await importer.run(request.stream())
+        job.status = "COMPLETED"
+    except ImportFailed as exc:
+        job.status = "FAILED"
+        job.error = str(exc)
+
+    events = [
+        record_event(db, project_id, "project.imported", {"job_id": job.id})
+        for project_id in importer.project_ids
+    ]
+    scopes = [("projects",)]
+    for project_id in importer.project_ids:
+        scopes += [("stages", project_id), ("members", project_id)]
+    await collection_versions.bump(db, *scopes)
+
+    # Only status, error, the events and the versions are flushed here, the
+    # progress counters were advanced by the importer's own transactions
+    await db.commit()
+    for project_id in importer.project_ids:
+        permission_resolver.invalidate_project(project_id)
+    publish_events(*events)
+    await db.refresh(job)
+    return job
+
+@router.get("/projects/import/{job_id}", response_model=schemas.ImportJob)
+async def get_import_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_read_db)
+):
+    job = await db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+@router.get("/projects/{project_id}/export", response_class=StreamingResponse)
+async def export_project_ndjson(
+    project_id: str,
+    db: AsyncSession = Depends(get_read_db)
+):
+    project = await db.execute(select(Project.id).where(Project.id == project_id))
+    if project.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    return StreamingResponse(
+        export_project(project_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}.ndjson"'}
     )
-    return projects.scalars().all()
 
-@router.get("/projects/{project_id}/stages", response_model=List[Stage])
-async def get_stages(
+@router.post("/projects/{project_id}/archive", response_model=schemas.ProjectArchive)
+async def archive_project_now(
     project_id: str,
     db: AsyncSession = Depends(get_db)
 ):
-    query = select(Stage).join(User, Stage.modifier_id == User.id, isouter=True)
-    query = query.where(Stage.project_id == project_id)
-    stages = await db.execute(query)
-    return stages.scalars().all()
+    async with db.begin():
+        archive, events = await archive_project(db, project_id)
+        if archive is None:
+            if await is_archived(db, project_id):
+                raise HTTPException(status_code=409, detail="Project is already archived")
+            raise HTTPException(status_code=404, detail="Project not found")
 
-@router.post("/projects/{project_id}/stages", response_model=Stage, status_code=status.HTTP_201_CREATED)
+    forget_project(project_id)
+    publish_events(*events)
+    return archive
+
+@router.get("/projects:summary", response_model=List[schemas.ProjectSummary])
+async def get_project_summaries(
+    project_id: List[str] = Query(..., description="Repeat for every project"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    project_ids = list(dict.fromkeys(project_id))
+    if len(project_ids) > settings.SUMMARY_MAX_PROJECTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.SUMMARY_MAX_PROJECTS} projects can be summarized at once"
+        )
+    # Unknown ids are left out instead of failing the whole dashboard
+    result = await db.execute(select(Project.id).where(Project.id.in_(project_ids)))
+    known = set(result.scalars().all())
+    return await load_summaries(db, [pid for pid in project_ids if pid in known])
+
+@router.get("/projects/{project_id}/summary", response_model=schemas.ProjectSummary)
+async def get_project_summary(
+    project_id: str,
+    db: AsyncSession = Depends(get_read_db)
+):
+    project = await db.execute(select(Project.id).where(Project.id == project_id))
+    if project.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    summaries = await load_summaries(db, [project_id])
+    return summaries[0]
+
+@router.get("/projects/{project_id}/schedule", response_model=schemas.ProjectSchedule)
+async def get_project_schedule(
+    project_id: str,
+    db: AsyncSession = Depends(get_read_db)
+):
+    project = await db.execute(select(Project.id).where(Project.id == project_id))
+    if project.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    # Cached per project and only recomputed around the nodes changed since the last read
+    schedule = await schedules.get(db, project_id)
+    content = {"project_id": project_id, "stages": schedule.stages.snapshot(), "tasks": schedule.tasks.snapshot()}
+    # The snapshots are plain JSON built to the schema; re-validating thousands of nodes
+    # would cost more than computing the schedule
+    with measure_serialization():
+        return ORJSONResponse(content=content)
+
+@router.get("/projects/{project_id}/events", response_class=StreamingResponse)
+async def get_project_events(
+    project_id: str,
+    request: Request,
+    last_event_id: Optional[int] = Header(None),
+    lastEventId: Optional[int] = None
+):
+    # EventSource sends Last-Event-ID on reconnect; the query parameter covers the first connect
+    resume_from = last_event_id if last_event_id is not None else lastEventId
+    return StreamingResponse(
+        stream_events(request, project_id, resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/projects/{project_id}/activity", response_model=List[schemas.ActivityEntry])
+async def get_project_activity(
+    project_id: str,
+    response: Response,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(100, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Entries are written in batches, up to ACTIVITY_FLUSH_SECONDS after the change;
+    # they outlive archived projects, so there is no project lookup
+    result = await db.execute(activity_page_statement(project_id, page, pageSize, cursor))
+    entries = [{**row._mapping, "details": orjson.loads(row.details)} for row in result]
+    headers = {}
+    if entries and len(entries) == pageSize:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(entries[-1]["id"])
+    if settings.FAST_SERIALIZATION:
+        with measure_serialization():
+            return ORJSONResponse(content=entries, headers=headers)
+    response.headers.update(headers)
+    return entries
+
+@router.get("/projects/{project_id}/stages", response_model=List[schemas.Stage])
+async def get_stages(
+    project_id: str,
+    request: Request,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(100, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_archived: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    async def build():
+        if include_archived and await is_archived(db, project_id):
+            rows, model = archived_stage_rows, ArchivedStage
+        else:
+            rows, model = stage_rows, Stage
+        query = rows.select().join(User, model.modifier_id == User.id, isouter=True)
+        query = query.where(model.project_id == project_id)
+        stages = await rows.all(db, paginate(query, model, page, pageSize, cursor))
+        return rows.validate(stages), next_cursor_headers(stages, pageSize)
+
+    return await cached_json(request, db, ("stages", project_id), build)
+
+@router.post("/projects/{project_id}/stages", response_model=schemas.Stage, status_code=status.HTTP_201_CREATED)
 async def create_stage(
     project_id: str,
-    stage: StageCreate,
+    stage: schemas.StageCreate,
     db: AsyncSession = Depends(get_db),
     current_user: models.BaseUserDB = Depends(get_current_user)
 ):
@@ -85,14 +345,84 @@ async def create_stage(
         modifier_id=current_user.id
     )
     db.add(db_stage)
+    await db.flush()
+    event = record_event(db, project_id, "stage.created", {"stage_id": db_stage.id, "name": db_stage.name})
+    await collection_versions.bump(db, ("stages", project_id))
     await db.commit()
+    publish_events(event)
     await db.refresh(db_stage)
+    # Dates read back from the database, as load_schedule sees them
+    duration = stage_days(db_stage.start_date, db_stage.end_date)
+    schedules.update(project_id, lambda schedule: schedule.stages.add_node(db_stage.id, duration))
     return db_stage
 
-@router.post("/projects/{project_id}/tasks", response_model=Task, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/projects/{project_id}/stages/{stage_id}/dependencies",
+    response_model=schemas.StageDependency,
+    status_code=status.HTTP_201_CREATED
+)
+async def add_stage_dependency(
+    project_id: str,
+    stage_id: str,
+    dependency: schemas.DependencyCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    depends_on_id = dependency.depends_on_id
+    result = await db.execute(
+        select(Stage.id)
+        .where(Stage.project_id == project_id)
+        .where(Stage.id.in_([stage_id, depends_on_id]))
+    )
+    if len(result.scalars().all()) != len({stage_id, depends_on_id}):
+        raise HTTPException(status_code=404, detail="Stage not found")
+    if await db.get(StageDependency, (stage_id, depends_on_id)):
+        raise HTTPException(status_code=409, detail="Dependency already exists")
+    cycle = await schedules.find_cycle(db, project_id, "stages", depends_on_id, stage_id)
+    if cycle:
+        raise HTTPException(status_code=409, detail="Dependency would create a cycle: " + " -> ".join(cycle))
+
+    db_dependency = StageDependency(stage_id=stage_id, depends_on_id=depends_on_id, project_id=project_id)
+    db.add(db_dependency)
+    # The insert takes the write lock; a concurrent request may have committed an
+    # edge the cached graph has not seen, so the committed edges are checked again
+    await db.flush()
+    cycle = await find_committed_cycle(db, project_id, "stages", depends_on_id, stage_id)
+    if cycle:
+        await db.rollback()
+        schedules.invalidate(project_id)
+        raise HTTPException(status_code=409, detail="Dependency would create a cycle: " + " -> ".join(cycle))
+    event = record_event(db, project_id, "stage.dependency_added", {"stage_id": stage_id, "depends_on_id": depends_on_id})
+    await db.commit()
+    schedules.update(project_id, lambda schedule: schedule.stages.add_edge(depends_on_id, stage_id))
+    publish_events(event)
+    await db.refresh(db_dependency)
+    return db_dependency
+
+@router.delete("/projects/{project_id}/stages/{stage_id}/dependencies/{depends_on_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_stage_dependency(
+    project_id: str,
+    stage_id: str,
+    depends_on_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(
+        delete(StageDependency)
+        .where(StageDependency.stage_id == stage_id)
+        .where(StageDependency.depends_on_id == depends_on_id)
+        .where(StageDependency.project_id == project_id)
+        .returning(StageDependency.stage_id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Dependency not found")
+    event = record_event(db, project_id, "stage.dependency_removed", {"stage_id": stage_id, "depends_on_id": depends_on_id})
+    await db.commit()
+    schedules.update(project_id, lambda schedule: schedule.stages.remove_edge(depends_on_id, stage_id))
+    publish_events(event)
+
+@router.post("/projects/{project_id}/tasks", response_model=schemas.Task, status_code=status.HTTP_201_CREATED)
 async def create_task(
     project_id: str,
-    task: TaskCreate,
+    task: schemas.TaskCreate,
     db: AsyncSession = Depends(get_db)
 ):
     async with db.begin():
@@ -105,6 +435,8 @@ async def create_task(
         )
         db.add(db_task)
         await db.flush()
+        rollup = RollupDelta()
+        rollup.task(project_id, db_task.status, db_task.priority, db_task.stage_id)
         
         if task.assignees:
             for assignee in task.assignees:
@@ -115,17 +447,341 @@ async def create_task(
                     role=assignee.role
                 )
                 db.add(db_assignee)
-        
-        await db.commit()
-        await db.refresh(db_task)
-        return db_task
+                rollup.assignee(project_id, assignee.assignee_type)
+
+        await rollup.apply(db)
+        event = record_event(db, project_id, "task.created", {"task_id": db_task.id, "stage_id": db_task.stage_id})
+
+    schedules.update(project_id, lambda schedule: schedule.tasks.add_node(db_task.id, settings.SCHEDULE_TASK_DAYS))
+    publish_events(event)
+    result = await db.execute(
+        select(Task)
+        .where(Task.id == db_task.id)
+        .options(selectinload(Task.assignees))
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+@router.get("/projects/{project_id}/tasks", response_model=List[schemas.Task])
+async def get_tasks(
+    project_id: str,
+    response: Response,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(100, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_archived: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    if include_archived and await is_archived(db, project_id):
+        rows, model = archived_task_rows, ArchivedTask
+    else:
+        rows, model = task_rows, Task
+    # Assignees are fetched with one extra IN query per page instead of one per task
+    query = rows.select().where(model.project_id == project_id)
+    tasks = await rows.all(db, paginate(query, model, page, pageSize, cursor))
+    return page_response(response, tasks, pageSize)
+
+@router.post("/projects/{project_id}/tasks:batch", response_model=schemas.TaskBatchResult, status_code=status.HTTP_201_CREATED)
+async def create_tasks_batch(
+    project_id: str,
+    tasks: List[Dict[str, Any]] = Body(...),
+    db: AsyncSession = Depends(get_db)
+):
+    if len(tasks) > settings.TASK_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {settings.TASK_BATCH_MAX_SIZE} tasks"
+        )
+
+    # Items are validated one by one so a bad entry is reported instead of failing the batch
+    valid = []
+    errors = []
+    for index, payload in enumerate(tasks):
+        try:
+            valid.append((index, schemas.TaskCreate.parse_obj(payload)))
+        except ValidationError as exc:
+            errors.append(schemas.TaskBatchError(index=index, errors=exc.errors()))
+
+    async with db.begin():
+        project = await db.execute(select(Project.id).where(Project.id == project_id))
+        if project.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        stage_ids = {task.stage_id for _, task in valid if task.stage_id}
+        if stage_ids:
+            result = await db.execute(
+                select(Stage.id)
+                .where(Stage.project_id == project_id)
+                .where(Stage.id.in_(stage_ids))
+            )
+            known_stages = set(result.scalars().all())
+        else:
+            known_stages = set()
+
+        task_values = []
+        assignee_values = []
+        rollup = RollupDelta()
+        for index, task in valid:
+            if task.stage_id and task.stage_id not in known_stages:
+                errors.append(schemas.TaskBatchError(
+                    index=index,
+                    errors=[{"loc": ["stage_id"], "msg": "stage not found in project", "type": "value_error.not_found"}]
+                ))
+                continue
+            task_id = str(uuid.uuid4())
+            task_values.append({
+                "id": task_id,
+                "project_id": project_id,
+                "stage_id": task.stage_id,
+                "name": task.name,
+                "description": task.description,
+                "status": "TODO",
+                "priority": task.priority
+            })
+            rollup.task(project_id, "TODO", task.priority, task.stage_id)
+            for assignee in task.assignees or []:
+                rollup.assignee(project_id, assignee.assignee_type)
+                assignee_values.append({
+                    "id": str(uuid.uuid4()),
+                    "task_id": task_id,
+                    "assignee_id": assignee.assignee_id,
+                    "assignee_type": assignee.assignee_type,
+                    "role": assignee.role
+                })
+
+        # One executemany per table instead of a flush per task
+        if task_values:
+            await db.execute(insert(Task), task_values)
+        if assignee_values:
+            await db.execute(insert(TaskAssignee), assignee_values)
+        await rollup.apply(db)
+        if task_values:
+            event = record_event(db, project_id, "tasks.created", {"task_ids": [row["id"] for row in task_values]})
+
+    if task_values:
+        def add_tasks(schedule):
+            for row in task_values:
+                schedule.tasks.add_node(row["id"], settings.SCHEDULE_TASK_DAYS)
+
+        schedules.update(project_id, add_tasks)
+        publish_events(event)
+    errors.sort(key=lambda error: error.index)
+    return schemas.TaskBatchResult(created=[row["id"] for row in task_values], errors=errors)
+
+@router.patch("/tasks:batch", response_model=schemas.TaskBatchUpdateResult)
+async def update_tasks_batch(
+    tasks: List[Dict[str, Any]] = Body(...),
+    db: AsyncSession = Depends(get_db)
+):
+    if len(tasks) > settings.TASK_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {settings.TASK_BATCH_MAX_SIZE} tasks"
+        )
+
+    valid = []
+    errors = []
+    for index, payload in enumerate(tasks):
+        try:
+            valid.append((index, schemas.TaskPatch.parse_obj(payload)))
+        except ValidationError as exc:
+            errors.append(schemas.TaskBatchError(index=index, errors=exc.errors()))
+
+    updated, conflicts, events = [], [], []
+    if valid:
+        async with db.begin():
+            updated, conflicts, item_errors, events = await update_tasks(db, valid)
+        errors.extend(item_errors)
+
+    publish_events(*events)
+    errors.sort(key=lambda error: error.index)
+    return schemas.TaskBatchUpdateResult(updated=updated, conflicts=conflicts, errors=errors)
+
+@router.post("/tasks/{task_id}/dependencies", response_model=schemas.TaskDependency, status_code=status.HTTP_201_CREATED)
+async def add_task_dependency(
+    task_id: str,
+    dependency: schemas.DependencyCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    depends_on_id = dependency.depends_on_id
+    result = await db.execute(select(Task.id, Task.project_id).where(Task.id.in_([task_id, depends_on_id])))
+    projects = dict(result.all())
+    if task_id not in projects or depends_on_id not in projects:
+        raise HTTPException(status_code=404, detail="Task not found")
+    project_id = projects[task_id]
+    if projects[depends_on_id] != project_id:
+        raise HTTPException(status_code=400, detail="Dependencies must be between tasks of the same project")
+    if await db.get(TaskDependency, (task_id, depends_on_id)):
+        raise HTTPException(status_code=409, detail="Dependency already exists")
+    cycle = await schedules.find_cycle(db, project_id, "tasks", depends_on_id, task_id)
+    if cycle:
+        raise HTTPException(status_code=409, detail="Dependency would create a cycle: " + " -> ".join(cycle))
+
+    db_dependency = TaskDependency(task_id=task_id, depends_on_id=depends_on_id, project_id=project_id)
+    db.add(db_dependency)
+    # The insert takes the write lock; a concurrent request may have committed an
+    # edge the cached graph has not seen, so the committed edges are checked again
+    await db.flush()
+    cycle = await find_committed_cycle(db, project_id, "tasks", depends_on_id, task_id)
+    if cycle:
+        await db.rollback()
+        schedules.invalidate(project_id)
+        raise HTTPException(status_code=409, detail="Dependency would create a cycle: " + " -> ".join(cycle))
+    event = record_event(db, project_id, "task.dependency_added", {"task_id": task_id, "depends_on_id": depends_on_id})
+    await db.commit()
+    schedules.update(project_id, lambda schedule: schedule.tasks.add_edge(depends_on_id, task_id))
+    publish_events(event)
+    await db.refresh(db_dependency)
+    return db_dependency
+
+@router.delete("/tasks/{task_id}/dependencies/{depends_on_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_task_dependency(
+    task_id: str,
+    depends_on_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(
+        delete(TaskDependency)
+        .where(TaskDependency.task_id == task_id)
+        .where(TaskDependency.depends_on_id == depends_on_id)
+        .returning(TaskDependency.project_id)
+    )
+    project_id = result.scalar_one_or_none()
+    if project_id is None:
+        raise HTTPException(status_code=404, detail="Dependency not found")
+    event = record_event(db, project_id, "task.dependency_removed", {"task_id": task_id, "depends_on_id": depends_on_id})
+    await db.commit()
+    schedules.update(project_id, lambda schedule: schedule.tasks.remove_edge(depends_on_id, task_id))
+    publish_events(event)
+
+@router.post(
+    "/projects/{project_id}/tasks:claim",
+    response_model=schemas.Task,
+    responses={204: {"description": "No unclaimed TODO task in the project"}}
+)
+async def claim_task(
+    project_id: str,
+    claim: schemas.TaskClaim,
+    db: AsyncSession = Depends(get_db)
+):
+    async with db.begin():
+        # Expired claims are requeued first so their tasks can be picked up right away
+        events = await sweep_expired_leases(db)
+        db_assignee = await claim_next_task(db, project_id, claim)
+        if db_assignee:
+            events.append(record_event(db, project_id, "task.claimed", assignee_event_data(db_assignee)))
+
+    publish_events(*events)
+    if not db_assignee:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-@router.post("/tasks/{task_id}/assignees", response_model=TaskAssignee, status_code=status.HTTP_201_CREATED)
+    result = await db.execute(
+        select(Task)
+        .where(Task.id == db_assignee.task_id)
+        .options(selectinload(Task.assignees))
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+@router.put("/tasks/{task_id}/assignees/{assignee_id}/lease", response_model=schemas.TaskAssignee)
+async def renew_task_lease(
+    task_id: str,
+    assignee_id: str,
+    renewal: schemas.LeaseRenew,
+    db: AsyncSession = Depends(get_db)
+):
+    async with db.begin():
+        if not await renew_lease(db, task_id, assignee_id, renewal.lease_seconds):
+            raise HTTPException(status_code=404, detail="Active lease not found")
+
+    result = await db.execute(
+        select(TaskAssignee)
+        .where(TaskAssignee.id == assignee_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+@router.delete("/tasks/{task_id}/assignees/{assignee_id}/lease", status_code=status.HTTP_204_NO_CONTENT)
+async def release_task_lease(
+    task_id: str,
+    assignee_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    async with db.begin():
+        events = await release_lease(db, task_id, assignee_id)
+        if events is None:
+            raise HTTPException(status_code=404, detail="Lease not found")
+
+    publish_events(*events)
+
+@router.get("/search", response_model=List[schemas.SearchHit])
+async def search_tasks_and_projects(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500),
+    project_id: Optional[str] = None,
+    kind: Optional[str] = Query(None, regex="^(task|project)$"),
+    pageSize: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    hits, headers = await search(db, q, project_id, kind, pageSize, cursor)
+    response.headers.update(headers)
+    return hits
+
+@router.get("/assignees/{assignee_id}/tasks", response_model=List[schemas.Task])
+async def get_assignee_tasks(
+    assignee_id: str,
+    response: Response,
+    assignee_type: Optional[str] = Query(None, regex="^(USER|AGENT)$"),
+    status: Optional[str] = None,
+    priority: Optional[int] = None,
+    stage_id: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(100, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Tasks across all projects, paged on the assignee's entries of idx_task_assignees_inbox:
+    # they carry the task's (created_at, id), so a page reads pageSize entries in order
+    # and joins each one to its task, however many tasks the assignee has
+    key = (TaskAssignee.task_created_at.label("inbox_created_at"), TaskAssignee.task_id.label("inbox_task_id"))
+    legs = []
+    for value in [assignee_type] if assignee_type else ["AGENT", "USER"]:
+        leg = (
+            task_rows.select_columns(*key)
+            .select_from(TaskAssignee)
+            .join(Task, Task.id == TaskAssignee.task_id)
+            .where(TaskAssignee.assignee_id == assignee_id)
+            .where(TaskAssignee.assignee_type == value)
+        )
+        if status:
+            leg = leg.where(Task.status == status)
+        if priority is not None:
+            leg = leg.where(Task.priority == priority)
+        if stage_id:
+            leg = leg.where(Task.stage_id == stage_id)
+        if cursor:
+            leg = leg.where(after_cursor(TaskAssignee.task_created_at, TaskAssignee.task_id, cursor))
+        legs.append(leg)
+    if len(legs) == 1:
+        # The same assignee may be listed on a task more than once (e.g. with two roles)
+        query = legs[0].group_by(*key).order_by(*key)
+    else:
+        # Merges both index ranges in order; UNION drops a task listed under both types
+        query = union(*legs)
+        query = query.order_by(*query.selected_columns[-2:])
+    if not cursor:
+        query = query.offset((page - 1) * pageSize)
+    tasks = await task_rows.all(db, task_rows.from_statement(query.limit(pageSize)))
+    return page_response(response, tasks, pageSize)
+
+@router.post("/tasks/{task_id}/assignees", response_model=schemas.TaskAssignee, status_code=status.HTTP_201_CREATED)
 async def add_task_assignee(
     task_id: str,
-    assignee: TaskAssigneeCreate,
+    assignee: schemas.TaskAssigneeCreate,
     db: AsyncSession = Depends(get_db)
 ):
+    project_id = await get_task_project_id(db, task_id)
     db_assignee = TaskAssignee(
         task_id=task_id,
         assignee_id=assignee.assignee_id,
@@ -133,25 +789,101 @@ async def add_task_assignee(
         role=assignee.role
     )
     db.add(db_assignee)
+    await db.flush()
+    rollup = RollupDelta()
+    rollup.assignee(project_id, db_assignee.assignee_type)
+    await rollup.apply(db)
+    event = record_event(db, project_id, "task.assignee_added", assignee_event_data(db_assignee))
     await db.commit()
+    publish_events(event)
     await db.refresh(db_assignee)
     return db_assignee
 
-@router.get("/tasks/{task_id}/assignees", response_model=List[TaskAssignee])
+@router.get("/tasks/{task_id}/assignees", response_model=List[schemas.TaskAssignee])
 async def get_task_assignees(
     task_id: str,
+    response: Response,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(100, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    query = assignee_rows.select().where(TaskAssignee.task_id == task_id)
+    assignees = await assignee_rows.all(db, paginate(query, TaskAssignee, page, pageSize, cursor))
+    return page_response(response, assignees, pageSize)
+
+@router.put("/tasks/assignees:batch", response_model=schemas.TaskAssigneeSyncResult)
+async def replace_task_assignees_batch(
+    tasks: List[Dict[str, Any]] = Body(...),
+    db: AsyncSession = Depends(get_db)
+):
+    if len(tasks) > settings.TASK_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {settings.TASK_BATCH_MAX_SIZE} tasks"
+        )
+
+    valid = []
+    errors = []
+    for index, payload in enumerate(tasks):
+        try:
+            valid.append((index, schemas.TaskAssigneeSet.parse_obj(payload)))
+        except ValidationError as exc:
+            errors.append(schemas.TaskBatchError(index=index, errors=exc.errors()))
+
+    summaries, events = [], []
+    async with db.begin():
+        result = await db.execute(select(Task.id, Task.project_id).where(Task.id.in_({item.task_id for _, item in valid})))
+        projects = dict(result.all())
+        desired = {}
+        for index, item in valid:
+            if item.task_id not in projects:
+                field, message, kind = "task_id", "task not found", "value_error.not_found"
+            elif item.task_id in desired:
+                field, message, kind = "task_id", "task already listed earlier in this batch", "value_error.duplicate"
+            elif duplicate_assignee(item.assignees):
+                field, message, kind = "assignees", "assignee listed twice", "value_error.duplicate"
+            else:
+                desired[item.task_id] = item.assignees
+                continue
+            errors.append(schemas.TaskBatchError(index=index, errors=[{"loc": [field], "msg": message, "type": kind}]))
+        if desired:
+            summaries, events = await sync_assignees(db, desired, projects)
+
+    publish_events(*events)
+    errors.sort(key=lambda error: error.index)
+    return schemas.TaskAssigneeSyncResult(tasks=summaries, errors=errors)
+
+@router.put("/tasks/{task_id}/assignees", response_model=List[schemas.TaskAssignee])
+async def replace_task_assignees(
+    task_id: str,
+    assignees: List[schemas.TaskAssigneeCreate],
     db: AsyncSession = Depends(get_db)
 ):
+    duplicate = duplicate_assignee(assignees)
+    if duplicate:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Assignee {duplicate.assignee_type} {duplicate.assignee_id} is listed twice"
+        )
+    async with db.begin():
+        project_id = await get_task_project_id(db, task_id)
+        _, events = await sync_assignees(db, {task_id: assignees}, {task_id: project_id})
+
+    publish_events(*events)
     result = await db.execute(
-        select(TaskAssignee).where(TaskAssignee.task_id == task_id)
+        select(TaskAssignee)
+        .where(TaskAssignee.task_id == task_id)
+        .order_by(TaskAssignee.created_at, TaskAssignee.id)
+        .execution_options(populate_existing=True)
     )
     return result.scalars().all()
 
-@router.put("/tasks/{task_id}/assignees/{assignee_id}", response_model=TaskAssignee)
+@router.put("/tasks/{task_id}/assignees/{assignee_id}", response_model=schemas.TaskAssignee)
 async def update_task_assignee(
     task_id: str,
     assignee_id: str,
-    assignee: TaskAssigneeCreate,
+    assignee: schemas.TaskAssigneeCreate,
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -163,11 +895,19 @@ async def update_task_assignee(
     if not db_assignee:
         raise HTTPException(status_code=404, detail="Assignee not found")
     
+    project_id = await get_task_project_id(db, task_id)
+    rollup = RollupDelta()
+    rollup.assignee(project_id, db_assignee.assignee_type, -1)
+    rollup.assignee(project_id, assignee.assignee_type)
+    await rollup.apply(db)
+
     db_assignee.assignee_id = assignee.assignee_id
     db_assignee.assignee_type = assignee.assignee_type
     db_assignee.role = assignee.role
     
+    event = record_event(db, project_id, "task.assignee_updated", assignee_event_data(db_assignee))
     await db.commit()
+    publish_events(event)
     await db.refresh(db_assignee)
     return db_assignee
 
@@ -186,13 +926,19 @@ async def remove_task_assignee(
     if not db_assignee:
         raise HTTPException(status_code=404, detail="Assignee not found")
     
+    project_id = await get_task_project_id(db, task_id)
+    rollup = RollupDelta()
+    rollup.assignee(project_id, db_assignee.assignee_type, -1)
+    await rollup.apply(db)
+    event = record_event(db, project_id, "task.assignee_removed", assignee_event_data(db_assignee))
     await db.delete(db_assignee)
     await db.commit()
+    publish_events(event)
 
-@router.post("/projects/{project_id}/members", response_model=Member, status_code=status.HTTP_201_CREATED)
+@router.post("/projects/{project_id}/members", response_model=schemas.Member, status_code=status.HTTP_201_CREATED)
 async def add_member(
     project_id: str,
-    member: MemberCreate,
+    member: schemas.MemberCreate,
     db: AsyncSession = Depends(get_db),
     current_user: models.BaseUserDB = Depends(get_current_user)
 ):
@@ -213,24 +959,93 @@ async def add_member(
                     permission_id=permission.permission_id
                 )
                 db.add(db_permission)
-        
-        await db.commit()
-        await db.refresh(db_member)
-        return db_member
 
-@router.get("/projects/{project_id}/members", response_model=List[Member])
-async def get_members(
+        rollup = RollupDelta()
+        rollup.member(project_id)
+        await rollup.apply(db)
+        event = record_event(db, project_id, "member.added", {
+            "member_id": db_member.id,
+            "user_id": db_member.member_id,
+            "member_type": db_member.member_type,
+            "role": db_member.role
+        })
+        await collection_versions.bump(db, ("members", project_id))
+
+    permission_resolver.invalidate(project_id, member.member_id)
+    publish_events(event)
+    result = await db.execute(
+        select(ProjectMember)
+        .where(ProjectMember.id == db_member.id)
+        .options(selectinload(ProjectMember.permissions))
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+@router.delete("/projects/{project_id}/members/{member_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_member(
     project_id: str,
+    member_id: str,
     db: AsyncSession = Depends(get_db)
 ):
-    query = select(ProjectMember).join(User, ProjectMember.member_id == User.id)
-    query = query.where(ProjectMember.project_id == project_id)
-    members = await db.execute(query)
-    return members.scalars().all()
+    async with db.begin():
+        result = await db.execute(
+            select(ProjectMember)
+            .where(ProjectMember.project_id == project_id)
+            .where(ProjectMember.id == member_id)
+        )
+        db_member = result.scalar_one_or_none()
+        if not db_member:
+            raise HTTPException(status_code=404, detail="Member not found")
+
+        await db.execute(delete(ProjectMemberPermission).where(ProjectMemberPermission.member_id == member_id))
+        await db.execute(delete(ProjectMember).where(ProjectMember.id == member_id))
+        rollup = RollupDelta()
+        rollup.member(project_id, -1)
+        await rollup.apply(db)
+        event = record_event(db, project_id, "member.removed", {"member_id": member_id, "user_id": db_member.member_id})
+        await collection_versions.bump(db, ("members", project_id))
+
+    permission_resolver.invalidate(project_id, db_member.member_id)
+    publish_events(event)
+
+@router.get("/projects/{project_id}/effective-permissions/{member_id}", response_model=schemas.EffectivePermissions)
+async def get_effective_permissions(
+    project_id: str,
+    member_id: str,
+    db: AsyncSession = Depends(get_read_db)
+):
+    permissions = await permission_resolver.resolve(db, project_id, member_id)
+    return schemas.EffectivePermissions(
+        project_id=project_id,
+        member_id=member_id,
+        permissions=sorted(permissions)
+    )
 
-@router.post("/permissions", response_model=Permission, status_code=status.HTTP_201_CREATED)
+@router.get("/projects/{project_id}/members", response_model=List[schemas.Member])
+async def get_members(
+    project_id: str,
+    request: Request,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(100, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_archived: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    async def build():
+        if include_archived and await is_archived(db, project_id):
+            rows, model = archived_member_rows, ArchivedProjectMember
+        else:
+            rows, model = member_rows, ProjectMember
+        query = rows.select().join(User, model.member_id == User.id)
+        query = query.where(model.project_id == project_id)
+        members = await rows.all(db, paginate(query, model, page, pageSize, cursor))
+        return rows.validate(members), next_cursor_headers(members, pageSize)
+
+    return await cached_json(request, db, ("members", project_id), build)
+
+@router.post("/permissions", response_model=schemas.Permission, status_code=status.HTTP_201_CREATED)
 async def create_permission(
-    permission: PermissionCreate,
+    permission: schemas.PermissionCreate,
     db: AsyncSession = Depends(get_db)
 ):
     db_permission = ProjectPermission(
@@ -242,35 +1057,53 @@ async def create_permission(
     await db.refresh(db_permission)
     return db_permission
 
-@router.get("/permissions", response_model=List[Permission])
+@router.get("/permissions", response_model=List[schemas.Permission])
 async def get_permissions(
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(100, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    result = await db.execute(select(ProjectPermission))
-    return result.scalars().all()
+    query = permission_rows.select()
+    permissions = await permission_rows.all(db, paginate(query, ProjectPermission, page, pageSize, cursor))
+    return page_response(response, permissions, pageSize)
 
-@router.post("/members/{member_id}/permissions", response_model=MemberPermission, status_code=status.HTTP_201_CREATED)
+@router.post("/members/{member_id}/permissions", response_model=schemas.MemberPermission, status_code=status.HTTP_201_CREATED)
 async def add_member_permission(
     member_id: str,
-    permission: MemberPermissionCreate,
+    permission: schemas.MemberPermissionCreate,
     db: AsyncSession = Depends(get_db)
 ):
+    db_member = await db.get(ProjectMember, member_id)
+    if not db_member:
+        raise HTTPException(status_code=404, detail="Member not found")
+
     db_permission = ProjectMemberPermission(
         member_id=member_id,
         permission_id=permission.permission_id
     )
     db.add(db_permission)
+    event = record_event(db, db_member.project_id, "member.permission_added", {
+        "member_id": member_id,
+        "permission_id": permission.permission_id
+    })
+    await collection_versions.bump(db, ("members", db_member.project_id))
     await db.commit()
+    permission_resolver.invalidate(db_member.project_id, db_member.member_id)
+    publish_events(event)
     await db.refresh(db_permission)
     return db_permission
 
-@router.get("/members/{member_id}/permissions", response_model=List[MemberPermission])
+@router.get("/members/{member_id}/permissions", response_model=List[schemas.MemberPermission])
 async def get_member_permissions(
     member_id: str,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(100, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    result = await db.execute(
-        select(ProjectMemberPermission)
-        .where(ProjectMemberPermission.member_id == member_id)
-    )
-    return result.scalars().all()
+    query = member_permission_rows.select().where(ProjectMemberPermission.member_id == member_id)
+    permissions = await member_permission_rows.all(db, paginate(query, ProjectMemberPermission, page, pageSize, cursor))
+    return page_response(response, permissions, pageSize)
\ No newline at end of file
@@ -44,10 +44,19 @@ CREATE TABLE task_assignees (
     assignee_id TEXT NOT NULL,
     assignee_type TEXT NOT NULL CHECK (assignee_type IN ('USER', 'AGENT')),
     role TEXT NOT NULL,
+    lease_expires_at TEXT,
+    task_created_at TEXT,  -- copy of tasks.created_at, the sort key of the assignee inbox
     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE
 );
 
+-- Filled in for every new assignee, whichever route or import inserts it
+CREATE TRIGGER task_assignees_task_created_at AFTER INSERT ON task_assignees
+WHEN new.task_created_at IS NULL BEGIN
+    UPDATE task_assignees SET task_created_at = (SELECT created_at FROM tasks WHERE id = new.task_id)
+    WHERE id = new.id;
+END;
+
 -- Project members table
 CREATE TABLE project_members (
     id TEXT PRIMARY KEY,
@@ -59,8 +68,258 @@ CREATE TABLE project_members (
     FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
 );
 
+-- Project permissions table
+CREATE TABLE project_permissions (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Project member permissions table
+CREATE TABLE project_member_permissions (
+    id TEXT PRIMARY KEY,
+    member_id TEXT,
+    permission_id TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (member_id) REFERENCES project_members(id) ON DELETE CASCADE,
+    FOREIGN KEY (permission_id) REFERENCES project_permissions(id) ON DELETE CASCADE
+);
+
+-- Import jobs table
+CREATE TABLE import_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'RUNNING',
+    lines_committed INTEGER NOT NULL DEFAULT 0,
+    records_committed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Project events table (change log for the event stream)
+CREATE TABLE project_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Activity log (append-only, written in batches after the change commits)
+CREATE TABLE activity_log (
+    id INTEGER PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    actor_id TEXT,
+    action TEXT NOT NULL,
+    details TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+-- Versions of the cached list responses (ETags)
+CREATE TABLE collection_versions (
+    scope TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Project rollup counters (incrementally maintained, rebuild with `python -m services.rollups`)
+CREATE TABLE project_rollup_counters (
+    project_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, metric, key),
+    FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+);
+
+-- Stage and task dependencies behind GET /api/projects/{project_id}/schedule.
+-- A row means stage_id/task_id cannot start before depends_on_id is finished.
+CREATE TABLE stage_dependencies (
+    stage_id TEXT NOT NULL,
+    depends_on_id TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (stage_id, depends_on_id),
+    FOREIGN KEY (stage_id) REFERENCES stages(id) ON DELETE CASCADE,
+    FOREIGN KEY (depends_on_id) REFERENCES stages(id) ON DELETE CASCADE,
+    FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+);
+
+CREATE TABLE task_dependencies (
+    task_id TEXT NOT NULL,
+    depends_on_id TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (task_id, depends_on_id),
+    FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE,
+    FOREIGN KEY (depends_on_id) REFERENCES tasks(id) ON DELETE CASCADE,
+    FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+);
+
+-- Full-text search over task and project names/descriptions.
+-- search_documents maps search_index rowids to tasks/projects; both are maintained by the triggers below.
+CREATE TABLE search_documents (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    project_id TEXT NOT NULL
+);
+CREATE UNIQUE INDEX idx_search_documents_entity ON search_documents(kind, entity_id);
+
+CREATE VIRTUAL TABLE search_index USING fts5(
+    title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+-- Titles weigh ten times more than descriptions
+INSERT INTO search_index(search_index, rank) VALUES ('rank', 'bm25(10.0, 1.0)');
+
+CREATE TRIGGER tasks_search_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO search_documents (kind, entity_id, project_id) VALUES ('task', new.id, new.project_id);
+    INSERT INTO search_index (rowid, title, body) VALUES (last_insert_rowid(), new.name, new.description);
+END;
+CREATE TRIGGER tasks_search_update AFTER UPDATE OF name, description ON tasks BEGIN
+    UPDATE search_index SET title = new.name, body = new.description
+    WHERE rowid = (SELECT id FROM search_documents WHERE kind = 'task' AND entity_id = new.id);
+END;
+CREATE TRIGGER tasks_search_delete AFTER DELETE ON tasks BEGIN
+    DELETE FROM search_index WHERE rowid = (SELECT id FROM search_documents WHERE kind = 'task' AND entity_id = old.id);
+    DELETE FROM search_documents WHERE kind = 'task' AND entity_id = old.id;
+END;
+CREATE TRIGGER projects_search_insert AFTER INSERT ON projects BEGIN
+    INSERT INTO search_documents (kind, entity_id, project_id) VALUES ('project', new.id, new.id);
+    INSERT INTO search_index (rowid, title, body) VALUES (last_insert_rowid(), new.name, new.description);
+END;
+CREATE TRIGGER projects_search_update AFTER UPDATE OF name, description ON projects BEGIN
+    UPDATE search_index SET title = new.name, body = new.description
+    WHERE rowid = (SELECT id FROM search_documents WHERE kind = 'project' AND entity_id = new.id);
+END;
+CREATE TRIGGER projects_search_delete AFTER DELETE ON projects BEGIN
+    DELETE FROM search_index WHERE rowid = (SELECT id FROM search_documents WHERE kind = 'project' AND entity_id = old.id);
+    DELETE FROM search_documents WHERE kind = 'project' AND entity_id = old.id;
+END;
+
 -- Indexes for better performance
-CREATE INDEX idx_projects_status ON projects(status);
-CREATE INDEX idx_stages_project ON stages(project_id);
-CREATE INDEX idx_tasks_project ON tasks(project_id);
-CREATE INDEX idx_members_project ON project_members(project_id);
+-- Keep in sync with __table_args__ in models/project_models.py; `python -m core.query_plans`
+-- fails when a router query falls back to a full table scan.
+-- List endpoints page on (created_at, id), so those indexes end with the sort key
+CREATE INDEX idx_projects_status ON projects(status, created_at, id);
+CREATE INDEX idx_projects_created ON projects(created_at, id);
+CREATE INDEX idx_stages_project ON stages(project_id, created_at, id);
+CREATE INDEX idx_tasks_project ON tasks(project_id, created_at, id);
+CREATE INDEX idx_tasks_stage ON tasks(stage_id);
+CREATE INDEX idx_tasks_claim ON tasks(project_id, status, priority DESC, created_at, id);
+CREATE INDEX idx_stage_dependencies_project ON stage_dependencies(project_id);
+CREATE INDEX idx_stage_dependencies_depends_on ON stage_dependencies(depends_on_id);
+CREATE INDEX idx_task_dependencies_project ON task_dependencies(project_id);
+CREATE INDEX idx_task_dependencies_depends_on ON task_dependencies(depends_on_id);
+CREATE INDEX idx_task_assignees_task ON task_assignees(task_id, created_at, id);
+CREATE INDEX idx_task_assignees_inbox ON task_assignees(assignee_id, assignee_type, task_created_at, task_id);
+CREATE INDEX idx_task_assignees_lease ON task_assignees(lease_expires_at);
+CREATE INDEX idx_members_project ON project_members(project_id, created_at, id);
+CREATE INDEX idx_members_member ON project_members(member_id, project_id);
+CREATE INDEX idx_permissions_created ON project_permissions(created_at, id);
+CREATE INDEX idx_member_permissions_member ON project_member_permissions(member_id, created_at, id);
+CREATE INDEX idx_member_permissions_permission ON project_member_permissions(permission_id);
+CREATE INDEX idx_project_events_project ON project_events(project_id, id);
+CREATE INDEX idx_activity_log_project ON activity_log(project_id, id);
+
+-- Archived projects (services/archive.py). These tables live in ARCHIVE_DB_PATH, which
+-- every connection attaches as "archive"; they mirror the live tables without foreign
+-- keys, and create_schema() creates them together with the tables above.
+ATTACH DATABASE 'archive.db' AS archive;
+
+CREATE TABLE archive.projects (
+    id TEXT PRIMARY KEY,
+    creator_id TEXT,
+    name TEXT NOT NULL,
+    description TEXT,
+    status TEXT NOT NULL,
+    current_stage TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE archive.stages (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    start_date TEXT,
+    end_date TEXT,
+    modifier_id TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE archive.tasks (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    stage_id TEXT,
+    name TEXT NOT NULL,
+    description TEXT,
+    status TEXT NOT NULL,
+    priority INTEGER,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE archive.task_assignees (
+    id TEXT PRIMARY KEY,
+    task_id TEXT,
+    assignee_id TEXT NOT NULL,
+    assignee_type TEXT NOT NULL,
+    role TEXT NOT NULL,
+    lease_expires_at TEXT,
+    task_created_at TEXT,
+    created_at TEXT
+);
+
+CREATE TABLE archive.stage_dependencies (
+    stage_id TEXT NOT NULL,
+    depends_on_id TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    created_at TEXT,
+    PRIMARY KEY (stage_id, depends_on_id)
+);
+
+CREATE TABLE archive.task_dependencies (
+    task_id TEXT NOT NULL,
+    depends_on_id TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    created_at TEXT,
+    PRIMARY KEY (task_id, depends_on_id)
+);
+
+CREATE TABLE archive.project_members (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    member_id TEXT,
+    member_type TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at TEXT
+);
+
+CREATE TABLE archive.project_member_permissions (
+    id TEXT PRIMARY KEY,
+    member_id TEXT,
+    permission_id TEXT,
+    created_at TEXT
+);
+
+-- Same indexes as the live tables, so include_archived listings page the same way
+CREATE INDEX archive.idx_projects_status ON projects(status, created_at, id);
+CREATE INDEX archive.idx_projects_created ON projects(created_at, id);
+CREATE INDEX archive.idx_stages_project ON stages(project_id, created_at, id);
+CREATE INDEX archive.idx_tasks_project ON tasks(project_id, created_at, id);
+CREATE INDEX archive.idx_tasks_stage ON tasks(stage_id);
+CREATE INDEX archive.idx_tasks_claim ON tasks(project_id, status, priority, created_at, id);
+CREATE INDEX archive.idx_stage_dependencies_project ON stage_dependencies(project_id);
+CREATE INDEX archive.idx_stage_dependencies_depends_on ON stage_dependencies(depends_on_id);
+CREATE INDEX archive.idx_task_dependencies_project ON task_dependencies(project_id);
+CREATE INDEX archive.idx_task_dependencies_depends_on ON task_dependencies(depends_on_id);
+CREATE INDEX archive.idx_task_assignees_task ON task_assignees(task_id, created_at, id);
+CREATE INDEX archive.idx_task_assignees_inbox ON task_assignees(assignee_id, assignee_type, task_created_at, task_id);
+CREATE INDEX archive.idx_task_assignees_lease ON task_assignees(lease_expires_at);
+CREATE INDEX archive.idx_members_project ON project_members(project_id, created_at, id);
+CREATE INDEX archive.idx_members_member ON project_members(member_id, project_id);
+CREATE INDEX archive.idx_member_permissions_member ON project_member_permissions(member_id, created_at, id);
+CREATE INDEX archive.idx_member_permissions_permission ON project_member_permissions(permission_id);
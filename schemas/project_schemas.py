@@ -1,6 +1,6 @@
-from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field, validator
 
 # Schema models define the structure and validation rules for API requests/responses
 # These models are used for data validation and serialization in the API layer
@@ -55,16 +55,27 @@ class TaskAssigneeCreate(TaskAssigneeBase):
 class TaskAssignee(TaskAssigneeBase):
     id: str
     task_id: str
+    lease_expires_at: Optional[datetime] = None
     created_at: datetime
 
     class Config:
         orm_mode = True
 
+class TaskAssigneeSet(BaseModel):
+    task_id: str
+    assignees: List[TaskAssigneeCreate]
+
+class TaskAssigneeSync(BaseModel):
+    task_id: str
+    added: int
+    updated: int
+    removed: int
+
 class TaskBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     description: Optional[str] = Field(None, max_length=1000)
     stage_id: Optional[str] = None
-    priority: Optional[int] = Field(None, ge=1, le=5)
+    priority: Optional[int] = Field(None, ge=1, le=5, description="1 (lowest) to 5 (highest)")
     assignees: Optional[List[TaskAssigneeCreate]] = None
 
 class TaskCreate(TaskBase):
@@ -81,6 +92,62 @@ class Task(TaskBase):
     class Config:
         orm_mode = True
 
+class TaskClaim(BaseModel):
+    assignee_id: str
+    assignee_type: str = Field(..., regex="^(USER|AGENT)$")
+    role: str = Field("worker", min_length=1, max_length=50)
+    lease_seconds: Optional[int] = Field(None, ge=1)
+
+class LeaseRenew(BaseModel):
+    lease_seconds: Optional[int] = Field(None, ge=1)
+
+class TaskBatchError(BaseModel):
+    index: int
+    errors: List[Dict[str, Any]]
+
+class TaskBatchResult(BaseModel):
+    created: List[str]
+    errors: List[TaskBatchError] = []
+
+class TaskPatch(BaseModel):
+    """One item of PATCH /tasks:batch; only the fields that are sent are changed."""
+    id: str
+    status: Optional[str] = Field(None, min_length=1, max_length=50)
+    priority: Optional[int] = Field(None, ge=1, le=5, description="1 (lowest) to 5 (highest), null to clear")
+    stage_id: Optional[str] = Field(None, description="null to clear")
+    updated_at: Optional[datetime] = Field(None, description="Version the change is based on; stale items are reported as conflicts")
+
+    @validator("status", pre=True)
+    def status_not_null(cls, value):
+        if value is None:
+            raise ValueError("status cannot be null")
+        return value
+
+    @validator("updated_at")
+    def as_naive_utc(cls, value):
+        # Timestamps are stored as naive UTC
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+class TaskVersion(BaseModel):
+    id: str
+    updated_at: datetime
+
+class TaskBatchConflict(BaseModel):
+    index: int
+    id: str
+    updated_at: Optional[datetime] = None  # current version, to retry from
+
+class TaskAssigneeSyncResult(BaseModel):
+    tasks: List[TaskAssigneeSync]
+    errors: List[TaskBatchError] = []
+
+class TaskBatchUpdateResult(BaseModel):
+    updated: List[TaskVersion]
+    conflicts: List[TaskBatchConflict] = []
+    errors: List[TaskBatchError] = []
+
 class PermissionBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=50)
     description: Optional[str] = Field(None, max_length=500)
@@ -127,3 +194,135 @@ class Member(MemberBase):
 
     class Config:
         orm_mode = True
+
+class ImportJob(BaseModel):
+    id: str
+    status: str
+    lines_committed: int
+    records_committed: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class EffectivePermissions(BaseModel):
+    project_id: str
+    member_id: str
+    permissions: List[str]
+
+class StageProgress(BaseModel):
+    stage_id: Optional[str] = None  # None groups tasks without a stage
+    tasks: int
+    done: int
+    progress: float
+    by_status: Dict[str, int]
+
+class ProjectSummary(BaseModel):
+    project_id: str
+    tasks: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]  # "1".."5", "none" for tasks without a priority
+    stages: List[StageProgress]
+    assignees_by_type: Dict[str, int]
+    members: int
+
+class ProjectArchive(BaseModel):
+    project_id: str
+    stages: int
+    tasks: int
+    assignees: int
+    members: int
+
+class DependencyCreate(BaseModel):
+    depends_on_id: str
+
+class StageDependency(BaseModel):
+    stage_id: str
+    depends_on_id: str
+    project_id: str
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class TaskDependency(BaseModel):
+    task_id: str
+    depends_on_id: str
+    project_id: str
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class ScheduleNode(BaseModel):
+    id: str
+    depends_on: List[str]
+    duration: float  # days
+    earliest_start: float  # days from the project start
+    earliest_finish: float
+    latest_start: float
+    latest_finish: float
+    slack: float
+    critical: bool
+
+class Schedule(BaseModel):
+    has_cycle: bool
+    cycle: List[str]  # the dependency cycle, first node repeated last; times are not computed then
+    duration: Optional[float] = None  # makespan in days
+    order: List[str]  # topological order
+    critical_path: List[str]
+    nodes: List[ScheduleNode]
+
+class ProjectSchedule(BaseModel):
+    project_id: str
+    stages: Schedule
+    tasks: Schedule
+
+class SearchHit(BaseModel):
+    kind: str  # 'task' or 'project'
+    id: str
+    project_id: str
+    title: str
+    snippet: str  # best matching fragment, matches wrapped in <mark>
+    rank: float  # bm25, lower is better
+
+class CacheStats(BaseModel):
+    name: str
+    size: int
+    maxsize: int
+    ttl: float
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+class EventBusStats(BaseModel):
+    projects: int
+    subscribers: int
+    published: int
+    dropped: int
+
+class WorkerSyncStats(BaseModel):
+    last_event_id: int  # newest change-log row read back
+    applied: int  # events of other workers applied to this worker's caches
+    pending_own: int  # events of this worker not read back yet
+
+
+class ActivityEntry(BaseModel):
+    id: int
+    project_id: str
+    actor_id: Optional[str]  # None for unauthenticated routes and background jobs
+    action: str  # event type, e.g. 'task.created'
+    details: Dict[str, Any]  # event payload
+    created_at: datetime
+
+class ActivityLogStats(BaseModel):
+    pending: int  # queued, not written yet
+    queued: int
+    written: int
+    dropped: int  # queue was full
+    failed: int  # lost with a batch that could not be written
+    batches: int
+    record_avg_us: float  # mean time a request spends queueing its entries
\ No newline at end of file
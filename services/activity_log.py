@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import settings
+from core.database import async_session
+from core.pagination import decode_cursor
+from models.project_models import ActivityEntry, ProjectEvent
+
+# Activity log.
+# Every change published through publish_events() is also appended to the
+# activity_log table, with the user who made it. Request handlers only put a
+# tuple on a bounded in-memory queue; a background writer inserts the queued
+# entries in one transaction once ACTIVITY_BATCH_SIZE of them are waiting or
+# ACTIVITY_FLUSH_SECONDS have passed, so a write route pays no extra statement.
+# When the queue is full new entries are dropped and counted instead of growing
+# memory. On shutdown the writer drains the queue before the process exits.
+
+logger = logging.getLogger(__name__)
+
+# Set by get_current_user() in routers/project_router.py for the current request
+current_actor: ContextVar[Optional[str]] = ContextVar("current_actor", default=None)
+
+# (project_id, actor_id, action, details, created_at)
+Entry = Tuple[str, Optional[str], str, str, datetime]
+
+_WAKE_UP = None  # queue marker ending the writer's wait for more entries on close()
+
+
+class ActivityLog:
+    def __init__(self, queue_size: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "asyncio.Queue[Optional[Entry]]" = asyncio.Queue(queue_size)
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0  # queue full
+        self.failed = 0  # lost with a batch that could not be written
+        self.batches = 0
+        self._records = 0
+        self._record_ns = 0  # time spent in record(), i.e. on the request path
+        self._closing = False
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def record(self, events: Sequence[ProjectEvent]) -> None:
+        """Queue the activity entries of committed events; never blocks."""
+        started = time.perf_counter_ns()
+        actor = current_actor.get()
+        now = datetime.utcnow()
+        for event in events:
+            try:
+                self.queue.put_nowait((event.project_id, actor, event.event_type, event.payload, now))
+                self.queued += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+        self._records += 1
+        self._record_ns += time.perf_counter_ns() - started
+
+    async def _next_batch(self) -> List[Entry]:
+        """Wait for a full batch or the end of the flush interval, whichever comes first."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        batch: List[Entry] = []
+        while len(batch) < self.batch_size:
+            try:
+                entry = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if self._closing or remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if entry is not _WAKE_UP:
+                batch.append(entry)
+        return batch
+
+    async def _write(self, batch: List[Entry]) -> None:
+        rows = [
+            {"project_id": project_id, "actor_id": actor_id, "action": action, "details": details, "created_at": created_at}
+            for project_id, actor_id, action, details, created_at in batch
+        ]
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    await session.execute(insert(ActivityEntry), rows)
+        except SQLAlchemyError:
+            logger.exception("Writing %d activity log entries failed", len(rows))
+            self.failed += len(rows)
+            return
+        self.written += len(rows)
+        self.batches += 1
+
+    async def run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            if batch:
+                await self._write(batch)
+            if self._closing and self.queue.empty():
+                return
+
+    def start(self) -> None:
+        self._closing = False
+        self._task = asyncio.create_task(self.run())
+
+    async def close(self) -> None:
+        """Stop the writer once everything queued so far is written."""
+        self._closing = True
+        if self._task is not None:
+            if self.queue.empty():
+                # The writer may be waiting for entries until the flush interval ends
+                self.queue.put_nowait(_WAKE_UP)
+            await self._task
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.queue.qsize(),
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "record_avg_us": round(self._record_ns / self._records / 1000, 3) if self._records else 0.0,
+        }
+
+
+activity_log = ActivityLog(settings.ACTIVITY_QUEUE_SIZE, settings.ACTIVITY_BATCH_SIZE, settings.ACTIVITY_FLUSH_SECONDS)
+
+
+def activity_page_statement(project_id: str, page: int, page_size: int, cursor: Optional[str] = None):
+    """One page of a project's activity, oldest first.
+
+    Pages are keyed by id alone: ids are assigned when a batch is written, so an
+    entry that reaches the table late still sorts after every cursor handed out.
+    """
+    query = (
+        select(
+            ActivityEntry.id,
+            ActivityEntry.project_id,
+            ActivityEntry.actor_id,
+            ActivityEntry.action,
+            ActivityEntry.details,
+            ActivityEntry.created_at
+        )
+        .where(ActivityEntry.project_id == project_id)
+        .order_by(ActivityEntry.id)
+    )
+    if cursor:
+        (after_id,) = decode_cursor(cursor, 1)
+        if not isinstance(after_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(ActivityEntry.id > after_id)
+    else:
+        query = query.offset((page - 1) * page_size)
+    return query.limit(page_size)
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, union_all
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from config import settings
+from core.database import async_session
+from core.http_cache import collection_versions
+from models.project_models import (
+    Project,
+    Stage,
+    Task,
+    TaskAssignee,
+    ProjectMember,
+    ProjectMemberPermission,
+    ProjectRollupCounter,
+    StageDependency,
+    TaskDependency,
+    ProjectEvent,
+    ArchivedProject,
+    ArchivedStage,
+    ArchivedTask,
+    ArchivedTaskAssignee,
+    ArchivedProjectMember,
+    ArchivedProjectMemberPermission,
+    ArchivedStageDependency,
+    ArchivedTaskDependency
+)
+from schemas import project_schemas as schemas
+from services.change_feed import record_event, publish_events
+from services.permission_resolver import permission_resolver
+from services.schedule import schedules
+
+# Project archiving.
+# A project and all its stages, tasks, assignees, members and dependencies are
+# copied into the archive database (ARCHIVE_DB_PATH, attached as "archive") and
+# deleted from the live tables in one transaction, so the live tables and their
+# indexes only hold active work. Archived rows stay readable through the
+# include_archived flag of the list endpoints.
+#
+# In WAL mode SQLite commits each attached file atomically but not both files as
+# one unit: a crash in between can leave a project in both databases. The copy
+# uses INSERT OR REPLACE, so archiving such a project again completes the move.
+
+logger = logging.getLogger(__name__)
+
+# Every live project row, plus the archived ones, for include_archived listings
+all_projects = aliased(
+    Project,
+    union_all(select(Project.__table__), select(ArchivedProject.__table__)).subquery("all_projects")
+)
+
+
+def archive_moves(project_id: str):
+    """(live model, archive model, WHERE clause) for every table holding the project's rows, parents first."""
+    tasks = select(Task.id).where(Task.project_id == project_id)
+    members = select(ProjectMember.id).where(ProjectMember.project_id == project_id)
+    return [
+        (Project, ArchivedProject, Project.id == project_id),
+        (Stage, ArchivedStage, Stage.project_id == project_id),
+        (Task, ArchivedTask, Task.project_id == project_id),
+        (TaskAssignee, ArchivedTaskAssignee, TaskAssignee.task_id.in_(tasks)),
+        (StageDependency, ArchivedStageDependency, StageDependency.project_id == project_id),
+        (TaskDependency, ArchivedTaskDependency, TaskDependency.project_id == project_id),
+        (ProjectMember, ArchivedProjectMember, ProjectMember.project_id == project_id),
+        (ProjectMemberPermission, ArchivedProjectMemberPermission, ProjectMemberPermission.member_id.in_(members)),
+    ]
+
+
+async def is_archived(db: AsyncSession, project_id: str) -> bool:
+    result = await db.execute(select(ArchivedProject.id).where(ArchivedProject.id == project_id))
+    return result.scalar_one_or_none() is not None
+
+
+async def archive_project(db: AsyncSession, project_id: str) -> Tuple[Optional[schemas.ProjectArchive], List[ProjectEvent]]:
+    """Move a live project to the archive inside the caller's transaction.
+
+    Returns None (and no events) when the project is not in the live tables.
+    """
+    # Writing to the live database first takes its write lock before anything is
+    # read from it: in WAL mode a transaction that has read cannot start writing
+    # once another connection committed, and fails without waiting
+    await db.execute(
+        delete(ProjectRollupCounter)
+        .where(ProjectRollupCounter.project_id == project_id)
+        .execution_options(synchronize_session=False)
+    )
+    moves = archive_moves(project_id)
+    counts = {}
+    for model, archived, where in moves:
+        columns = [column.name for column in model.__table__.columns]
+        result = await db.execute(
+            insert(archived.__table__)
+            .prefix_with("OR REPLACE")
+            .from_select(columns, select(*(model.__table__.c[name] for name in columns)).where(where))
+        )
+        counts[model.__tablename__] = result.rowcount
+    if not counts[Project.__tablename__]:
+        return None, []
+
+    # Children first, so no ON DELETE action has anything left to do; the search
+    # triggers drop the project and its tasks from the full-text index
+    for model, _, where in reversed(moves):
+        await db.execute(delete(model).where(where).execution_options(synchronize_session=False))
+
+    archive = schemas.ProjectArchive(
+        project_id=project_id,
+        stages=counts[Stage.__tablename__],
+        tasks=counts[Task.__tablename__],
+        assignees=counts[TaskAssignee.__tablename__],
+        members=counts[ProjectMember.__tablename__]
+    )
+    event = record_event(db, project_id, "project.archived", archive.dict())
+    await collection_versions.bump(db, ("projects",), ("stages", project_id), ("members", project_id))
+    return archive, [event]
+
+
+def forget_project(project_id: str) -> None:
+    """Drop the in-process state kept for a project that was just archived."""
+    schedules.invalidate(project_id)
+    permission_resolver.invalidate_project(project_id)
+
+
+def archive_candidates_statement(before: datetime, limit: int):
+    return (
+        select(Project.id)
+        .where(Project.status == settings.ARCHIVE_PROJECT_STATUS)
+        .where(Project.updated_at < before)
+        .order_by(Project.created_at, Project.id)
+        .limit(limit)
+    )
+
+
+async def archive_stale_projects() -> int:
+    """Archive up to ARCHIVE_SWEEP_BATCH_SIZE finished projects, one transaction each."""
+    before = datetime.utcnow() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    async with async_session() as session:
+        result = await session.execute(archive_candidates_statement(before, settings.ARCHIVE_SWEEP_BATCH_SIZE))
+        project_ids = result.scalars().all()
+
+    archived = 0
+    for project_id in project_ids:
+        async with async_session() as session:
+            async with session.begin():
+                archive, events = await archive_project(session, project_id)
+        if archive is not None:
+            forget_project(project_id)
+            publish_events(*events)
+            archived += 1
+    return archived
+
+
+async def archive_projects_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.ARCHIVE_SWEEP_SECONDS)
+        try:
+            archived = await archive_stale_projects()
+            if archived:
+                logger.info("Archived %d projects", archived)
+        except SQLAlchemyError:
+            logger.exception("Archiving finished projects failed")
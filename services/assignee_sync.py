@@ -0,0 +1,138 @@
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.project_models import TaskAssignee, ProjectEvent
+from schemas import project_schemas as schemas
+from services.change_feed import record_event
+from services.rollups import RollupDelta
+from services.task_leases import reopen_tasks
+
+# Replacing the assignee set of tasks (PUT /tasks/{task_id}/assignees and its batch
+# variant). Assignees are identified by (assignee_id, assignee_type): entries that
+# already exist keep their row, creation time and lease and only get their role
+# updated, missing ones are inserted and the rest deleted. However many tasks are
+# synced, that is one SELECT, one INSERT, one DELETE and one UPDATE per distinct
+# new role, plus the rollup upsert and one change-log row per project.
+# Removing the worker that holds a task's lease releases the claim: like an
+# expired lease, the task goes back to TODO unless someone else is assigned to it.
+
+COLUMNS = (
+    TaskAssignee.id,
+    TaskAssignee.task_id,
+    TaskAssignee.assignee_id,
+    TaskAssignee.assignee_type,
+    TaskAssignee.role,
+    TaskAssignee.lease_expires_at
+)
+
+
+def _public(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Event data of an assignee row; leases are reported by their own events."""
+    return {key: value for key, value in row.items() if key != "lease_expires_at"}
+
+
+def duplicate_assignee(assignees: Sequence[schemas.TaskAssigneeCreate]) -> Optional[schemas.TaskAssigneeCreate]:
+    seen = set()
+    for assignee in assignees:
+        key = (assignee.assignee_id, assignee.assignee_type)
+        if key in seen:
+            return assignee
+        seen.add(key)
+    return None
+
+
+def diff_assignees(current: Sequence[Dict[str, Any]], desired: Sequence[schemas.TaskAssigneeCreate]):
+    """Rows to insert, (row, new role) pairs to update and rows to delete for one task.
+
+    ``current`` is ordered by creation, so the oldest of duplicated rows is kept.
+    """
+    wanted = {(assignee.assignee_id, assignee.assignee_type): assignee for assignee in desired}
+    kept = set()
+    updated = []
+    removed = []
+    for row in current:
+        key = (row["assignee_id"], row["assignee_type"])
+        assignee = wanted.get(key)
+        if assignee is None or key in kept:
+            removed.append(row)
+            continue
+        kept.add(key)
+        if row["role"] != assignee.role:
+            updated.append((row, assignee.role))
+    added = [assignee for key, assignee in wanted.items() if key not in kept]
+    return added, updated, removed
+
+
+async def sync_assignees(
+    db: AsyncSession,
+    desired: Dict[str, List[schemas.TaskAssigneeCreate]],
+    projects: Dict[str, str]
+) -> Tuple[List[schemas.TaskAssigneeSync], List[ProjectEvent]]:
+    """Make the assignees of every task in ``desired`` match it, inside the caller's transaction.
+
+    ``projects`` maps each task id to its project. Returns per-task counts and the events to publish.
+    """
+    result = await db.execute(
+        select(*COLUMNS)
+        .where(TaskAssignee.task_id.in_(list(desired)))
+        .order_by(TaskAssignee.created_at, TaskAssignee.id)
+    )
+    current: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for row in result.mappings():
+        current[row["task_id"]].append(dict(row))
+
+    inserts: List[Dict[str, Any]] = []
+    roles: Dict[str, List[str]] = defaultdict(list)  # new role -> row ids
+    deletes: List[str] = []
+    released: List[str] = []  # tasks whose lease holder is removed
+    changed: Dict[str, List[Dict[str, Any]]] = defaultdict(list)  # project id -> per-task changes
+    rollup = RollupDelta()
+    summaries = []
+    for task_id, assignees in desired.items():
+        project_id = projects[task_id]
+        added, updated, removed = diff_assignees(current[task_id], assignees)
+        for assignee in added:
+            row = {
+                "id": str(uuid.uuid4()),
+                "task_id": task_id,
+                "assignee_id": assignee.assignee_id,
+                "assignee_type": assignee.assignee_type,
+                "role": assignee.role
+            }
+            inserts.append(row)
+            rollup.assignee(project_id, assignee.assignee_type)
+        for row, role in updated:
+            roles[role].append(row["id"])
+        for row in removed:
+            deletes.append(row["id"])
+            rollup.assignee(project_id, row["assignee_type"], -1)
+            if row["lease_expires_at"] is not None:
+                released.append(task_id)
+        if added or updated or removed:
+            changed[project_id].append({
+                "task_id": task_id,
+                "added": inserts[len(inserts) - len(added):],
+                "updated": [{**_public(row), "role": role} for row, role in updated],
+                "removed": [_public(row) for row in removed]
+            })
+        summaries.append(schemas.TaskAssigneeSync(
+            task_id=task_id, added=len(added), updated=len(updated), removed=len(removed)
+        ))
+
+    if deletes:
+        await db.execute(delete(TaskAssignee).where(TaskAssignee.id.in_(deletes)).execution_options(synchronize_session=False))
+    for role, ids in roles.items():
+        await db.execute(
+            update(TaskAssignee).where(TaskAssignee.id.in_(ids)).values(role=role).execution_options(synchronize_session=False)
+        )
+    if inserts:
+        await db.execute(insert(TaskAssignee), inserts)
+    events = [record_event(db, project_id, "tasks.assignees_replaced", {"tasks": tasks}) for project_id, tasks in changed.items()]
+    if released:
+        events += await reopen_tasks(db, released, "task.released", rollup)
+    await rollup.apply(db)
+    return summaries, events
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Set
+
+from fastapi import Request
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.database import async_session, read_session
+from models.project_models import ProjectEvent
+from services.activity_log import activity_log
+
+# Project change feed.
+# Write routes add a ProjectEvent row in the same transaction as the change and
+# publish it to the in-process bus once committed. Each SSE subscriber gets a
+# bounded queue; a subscriber that falls behind has its queue dropped and catches
+# up from the project_events table instead of slowing down publishers.
+# With several workers, events reach the bus through the change-log reader of
+# services/worker_sync.py instead, so every worker sees every event in commit order.
+# Published events are also queued for the activity log (services/activity_log.py).
+
+logger = logging.getLogger(__name__)
+
+_LAGGING = None  # queue marker telling the stream to replay from the change log
+
+
+class Subscriber:
+    def __init__(self, project_id: str, maxsize: int):
+        self.project_id = project_id
+        self.queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(maxsize)
+        self.lagging = False
+        self.dropped = 0
+
+
+class EventBus:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped = 0
+        self._subscribers: Dict[str, Set[Subscriber]] = defaultdict(set)
+
+    def subscribe(self, project_id: str) -> Subscriber:
+        subscriber = Subscriber(project_id, self.queue_size)
+        self._subscribers[project_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(subscriber.project_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.project_id]
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.published += 1
+        for subscriber in self._subscribers.get(event["project_id"], ()):
+            if subscriber.lagging:
+                # Already scheduled to replay from the change log
+                dropped = 1
+            elif subscriber.queue.full():
+                dropped = subscriber.queue.qsize() + 1
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(_LAGGING)
+                subscriber.lagging = True
+            else:
+                subscriber.queue.put_nowait(event)
+                continue
+            subscriber.dropped += dropped
+            self.dropped += dropped
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "projects": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+event_bus = EventBus(settings.EVENT_QUEUE_SIZE)
+
+
+def record_event(db: AsyncSession, project_id: str, event_type: str, data: Dict[str, Any]) -> ProjectEvent:
+    """Add a change-log row to the current transaction; publish it after commit."""
+    event = ProjectEvent(project_id=project_id, event_type=event_type, payload=json.dumps(data, default=str))
+    db.add(event)
+    return event
+
+
+# Set by services/worker_sync.py when WORKERS > 1; takes over publishing
+_forwarder: Optional[Callable[[Sequence[ProjectEvent]], None]] = None
+
+
+def forward_events(forwarder: Optional[Callable[[Sequence[ProjectEvent]], None]]) -> None:
+    global _forwarder
+    _forwarder = forwarder
+
+
+def publish_events(*events: ProjectEvent) -> None:
+    activity_log.record(events)
+    if _forwarder is not None:
+        _forwarder(events)
+        return
+    for event in events:
+        event_bus.publish(as_message(event))
+
+
+def as_message(event: ProjectEvent) -> Dict[str, Any]:
+    return {
+        "id": event.id,
+        "project_id": event.project_id,
+        "type": event.event_type,
+        "data": event.payload,
+    }
+
+
+def format_sse(message: Dict[str, Any]) -> str:
+    return f"id: {message['id']}\nevent: {message['type']}\ndata: {message['data']}\n\n"
+
+
+async def load_events(project_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+    async with read_session() as session:
+        result = await session.execute(
+            select(ProjectEvent)
+            .where(ProjectEvent.project_id == project_id)
+            .where(ProjectEvent.id > after_id)
+            .order_by(ProjectEvent.id)
+            .limit(limit)
+        )
+        return [as_message(event) for event in result.scalars().all()]
+
+
+async def latest_event_id(project_id: str) -> int:
+    async with read_session() as session:
+        result = await session.execute(
+            select(func.max(ProjectEvent.id)).where(ProjectEvent.project_id == project_id)
+        )
+        return result.scalar() or 0
+
+
+async def stream_events(request: Request, project_id: str, last_event_id: Optional[int]) -> AsyncIterator[str]:
+    subscriber = event_bus.subscribe(project_id)
+    try:
+        # Subscribe first so nothing committed during the replay is missed; duplicates are skipped by id
+        last_id = last_event_id if last_event_id is not None else await latest_event_id(project_id)
+        replay = True
+        while True:
+            if replay:
+                replay = False
+                while True:
+                    events = await load_events(project_id, last_id, settings.EVENT_REPLAY_BATCH_SIZE)
+                    for message in events:
+                        yield format_sse(message)
+                        last_id = message["id"]
+                    if len(events) < settings.EVENT_REPLAY_BATCH_SIZE:
+                        break
+
+            if await request.is_disconnected():
+                break
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), settings.EVENT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is _LAGGING:
+                subscriber.lagging = False
+                replay = True
+                continue
+            if message["id"] <= last_id:
+                continue
+            yield format_sse(message)
+            last_id = message["id"]
+    finally:
+        event_bus.unsubscribe(subscriber)
+
+
+async def prune_change_log() -> None:
+    async with async_session() as session:
+        async with session.begin():
+            newest = (await session.execute(select(func.max(ProjectEvent.id)))).scalar()
+            if newest is not None:
+                await session.execute(
+                    delete(ProjectEvent).where(ProjectEvent.id <= newest - settings.EVENT_LOG_SIZE)
+                )
+
+
+async def prune_change_log_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.EVENT_LOG_PRUNE_SECONDS)
+        try:
+            await prune_change_log()
+        except SQLAlchemyError:
+            logger.exception("Pruning the project change log failed")
@@ -0,0 +1,59 @@
+from collections import defaultdict
+from typing import Dict, FrozenSet
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.cache import TTLCache
+from models.project_models import ProjectMember, ProjectMemberPermission, ProjectPermission
+
+
+class PermissionResolver:
+    """Resolves the effective permission names of a user within a project.
+
+    Results are cached per (project_id, member_id), where member_id is the user or
+    agent id stored in ``ProjectMember.member_id``. Routes that change membership
+    or member permissions must call ``invalidate``. A generation counter per
+    project keeps a lookup that overlapped an invalidation from caching the
+    permissions it read before the change.
+    """
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+        self._generations: Dict[str, int] = defaultdict(int)
+
+    async def resolve(self, db: AsyncSession, project_id: str, member_id: str) -> FrozenSet[str]:
+        key = (project_id, member_id)
+        permissions = self.cache.get(key)
+        if permissions is not None:
+            return permissions
+
+        generation = self._generations[project_id]
+        result = await db.execute(
+            select(ProjectPermission.name)
+            .join(ProjectMemberPermission, ProjectMemberPermission.permission_id == ProjectPermission.id)
+            .join(ProjectMember, ProjectMember.id == ProjectMemberPermission.member_id)
+            .where(ProjectMember.project_id == project_id)
+            .where(ProjectMember.member_id == member_id)
+        )
+        permissions = frozenset(result.scalars().all())
+        if self._generations[project_id] == generation:
+            self.cache.set(key, permissions)
+        return permissions
+
+    async def has_permission(self, db: AsyncSession, project_id: str, member_id: str, name: str) -> bool:
+        return name in await self.resolve(db, project_id, member_id)
+
+    def invalidate(self, project_id: str, member_id: str) -> None:
+        self._generations[project_id] += 1
+        self.cache.pop((project_id, member_id))
+
+    def invalidate_project(self, project_id: str) -> None:
+        self._generations[project_id] += 1
+        self.cache.pop_where(lambda key: key[0] == project_id)
+
+
+permission_resolver = PermissionResolver(
+    TTLCache("permissions", settings.PERMISSION_CACHE_SIZE, settings.PERMISSION_CACHE_TTL)
+)
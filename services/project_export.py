@@ -0,0 +1,132 @@
+import json
+from datetime import date, datetime
+from itertools import groupby
+from typing import Any, AsyncIterator, Dict, List, Mapping, Type
+
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from config import settings
+from core.database import read_session
+from models.project_models import (
+    Project,
+    Stage,
+    Task,
+    TaskAssignee,
+    ProjectMember,
+    ProjectMemberPermission,
+    ProjectPermission
+)
+from schemas import project_schemas as schemas
+
+# NDJSON project export.
+# Every line is {"type": ..., "data": ...} where data has the shape of the matching
+# response schema. Parents are written before their children (project, permission
+# templates, stages, members with their permissions, tasks with their assignees)
+# so the file can be imported one line at a time.
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _record(schema: Type[BaseModel], row: Mapping[str, Any], **nested: Any) -> Dict[str, Any]:
+    data = {name: row[name] for name in schema.__fields__ if name not in nested}
+    data.update(nested)
+    return data
+
+
+def _line(record_type: str, data: Dict[str, Any]) -> bytes:
+    return (json.dumps({"type": record_type, "data": data}, default=_json_default) + "\n").encode()
+
+
+def _ordered(table):
+    return (table.c.created_at, table.c.id)
+
+
+async def export_project(project_id: str) -> AsyncIterator[bytes]:
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    projects = Project.__table__
+    stages = Stage.__table__
+    tasks = Task.__table__
+    assignees = TaskAssignee.__table__
+    members = ProjectMember.__table__
+    member_permissions = ProjectMemberPermission.__table__
+    permissions = ProjectPermission.__table__
+
+    # The second session serves the per-chunk child lookups while the first one streams
+    async with read_session() as session, read_session() as lookup:
+        result = await session.execute(select(projects).where(projects.c.id == project_id))
+        project = result.mappings().one()
+        yield _line("project", _record(schemas.Project, project))
+
+        used_permissions = (
+            select(member_permissions.c.permission_id)
+            .join(members, members.c.id == member_permissions.c.member_id)
+            .where(members.c.project_id == project_id)
+        )
+        result = await session.stream(
+            select(permissions)
+            .where(permissions.c.id.in_(used_permissions))
+            .order_by(*_ordered(permissions))
+            .execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.mappings().partitions():
+            yield b"".join(_line("permission", _record(schemas.Permission, row)) for row in partition)
+
+        result = await session.stream(
+            select(stages)
+            .where(stages.c.project_id == project_id)
+            .order_by(*_ordered(stages))
+            .execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.mappings().partitions():
+            yield b"".join(_line("stage", _record(schemas.Stage, row)) for row in partition)
+
+        result = await session.stream(
+            select(members)
+            .where(members.c.project_id == project_id)
+            .order_by(*_ordered(members))
+            .execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.mappings().partitions():
+            children = await _children(
+                lookup, member_permissions, member_permissions.c.member_id, [row["id"] for row in partition]
+            )
+            yield b"".join(
+                _line("member", _record(
+                    schemas.Member,
+                    row,
+                    permissions=[_record(schemas.MemberPermission, child) for child in children.get(row["id"], [])]
+                ))
+                for row in partition
+            )
+
+        result = await session.stream(
+            select(tasks)
+            .where(tasks.c.project_id == project_id)
+            .order_by(*_ordered(tasks))
+            .execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.mappings().partitions():
+            children = await _children(lookup, assignees, assignees.c.task_id, [row["id"] for row in partition])
+            yield b"".join(
+                _line("task", _record(
+                    schemas.Task,
+                    row,
+                    assignees=[_record(schemas.TaskAssignee, child) for child in children.get(row["id"], [])]
+                ))
+                for row in partition
+            )
+
+
+async def _children(session, table, parent_column, parent_ids: List[str]) -> Dict[str, List[Mapping[str, Any]]]:
+    result = await session.execute(
+        select(table)
+        .where(parent_column.in_(parent_ids))
+        .order_by(parent_column, *_ordered(table))
+    )
+    rows = result.mappings().all()
+    return {parent_id: list(group) for parent_id, group in groupby(rows, key=lambda row: row[parent_column.name])}
@@ -0,0 +1,228 @@
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Set
+
+from pydantic import BaseModel
+from sqlalchemy import String, column, insert, select, table, update
+from sqlalchemy.dialects.sqlite import DATETIME
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.database import Base, async_session
+from core.pagination import format_timestamp
+from models.project_models import (
+    Project,
+    Stage,
+    Task,
+    TaskAssignee,
+    ProjectMember,
+    ProjectMemberPermission,
+    ProjectPermission,
+    ImportJob,
+    ArchivedProject
+)
+from schemas import project_schemas as schemas
+from services.rollups import RollupDelta
+from services.schedule import schedules
+
+# Streaming NDJSON import, the counterpart of services.project_export.
+# Lines are validated with the response schemas and buffered; every chunk_size
+# records the buffer is written with one executemany INSERT per table and the
+# job's lines_committed is advanced in the same transaction. A failed import can
+# be resumed with the same job id and the same file: committed lines are skipped.
+# Projects whose id is in the archive are rejected; the live tables would hold a
+# second copy next to the archived one.
+
+RECORD_SCHEMAS = {
+    "project": schemas.Project,
+    "permission": schemas.Permission,
+    "stage": schemas.Stage,
+    "member": schemas.Member,
+    "task": schemas.Task,
+}
+
+# Flush order follows the foreign keys
+TABLES = [
+    Project.__table__,
+    ProjectPermission.__table__,
+    Stage.__table__,
+    ProjectMember.__table__,
+    ProjectMemberPermission.__table__,
+    Task.__table__,
+    TaskAssignee.__table__,
+]
+
+
+def _insert_target(model_table):
+    # Timestamps are written as text in CURRENT_TIMESTAMP format so imported rows
+    # sort and page exactly like rows created through the API
+    return table(
+        model_table.name,
+        *[
+            column(c.name, String if isinstance(c.type, DATETIME) else c.type)
+            for c in model_table.columns
+        ]
+    )
+
+
+INSERT_TARGETS = {t.name: _insert_target(t) for t in TABLES}
+
+
+class ImportFailed(Exception):
+    def __init__(self, line_number: int, message: str):
+        super().__init__(f"line {line_number}: {message}")
+        self.line_number = line_number
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def _row(model_table, record: BaseModel, exclude=None) -> Dict[str, Any]:
+    data = record.dict(exclude=exclude)
+    row = {}
+    for name, value in data.items():
+        if name not in model_table.c:
+            continue
+        row[name] = format_timestamp(value) if isinstance(value, datetime) else value
+    return row
+
+
+class ProjectImporter:
+    def __init__(self, job_id: str, skip_lines: int, chunk_size: int):
+        self.job_id = job_id
+        self.skip_lines = skip_lines
+        self.chunk_size = chunk_size
+        self.project_ids: Set[str] = set()
+        self._rows: Dict[str, List[Dict[str, Any]]] = {t.name: [] for t in TABLES}
+        self._pending = 0
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> None:
+        line_number = 0
+        async for line in iter_lines(chunks):
+            line_number += 1
+            if line_number <= self.skip_lines or not line.strip():
+                continue
+            try:
+                self._collect(json.loads(line))
+            except (ValueError, KeyError, TypeError) as exc:
+                # Keep the valid lines before the bad one so a resume starts right there
+                await self._flush(line_number - 1)
+                raise ImportFailed(line_number, str(exc))
+            if self._pending >= self.chunk_size:
+                await self._flush(line_number)
+        await self._flush(line_number)
+
+    def _collect(self, line: Dict[str, Any]) -> None:
+        record_type = line["type"]
+        if record_type not in RECORD_SCHEMAS:
+            raise ValueError(f"unknown record type {record_type!r}")
+        record = RECORD_SCHEMAS[record_type].parse_obj(line["data"])
+
+        if record_type == "project":
+            self.project_ids.add(record.id)
+            self._add(Project.__table__, _row(Project.__table__, record))
+        elif record_type == "permission":
+            self._add(ProjectPermission.__table__, _row(ProjectPermission.__table__, record))
+        elif record_type == "stage":
+            self._add(Stage.__table__, _row(Stage.__table__, record))
+        elif record_type == "member":
+            self._add(ProjectMember.__table__, _row(ProjectMember.__table__, record, exclude={"permissions"}))
+            for permission in record.permissions:
+                row = _row(ProjectMemberPermission.__table__, permission)
+                row["member_id"] = record.id
+                self._add(ProjectMemberPermission.__table__, row)
+        elif record_type == "task":
+            self._add(Task.__table__, _row(Task.__table__, record, exclude={"assignees"}))
+            for assignee in record.assignees:
+                row = _row(TaskAssignee.__table__, assignee)
+                row["task_id"] = record.id
+                self._add(TaskAssignee.__table__, row)
+        self._pending += 1
+
+    def _add(self, model_table, row: Dict[str, Any]) -> None:
+        self._rows[model_table.name].append(row)
+
+    async def _flush(self, lines_committed: int) -> None:
+        records = self._pending
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    await self._reject_archived(session, lines_committed)
+                    await self._drop_missing_users(session)
+                    for model_table in TABLES:
+                        rows = self._rows[model_table.name]
+                        if not rows:
+                            continue
+                        stmt = insert(INSERT_TARGETS[model_table.name])
+                        if model_table is ProjectPermission.__table__:
+                            # Permission templates are shared between projects and may already exist
+                            stmt = stmt.prefix_with("OR IGNORE")
+                        await session.execute(stmt, rows)
+                    await self._rollup().apply(session)
+                    await session.execute(
+                        update(ImportJob)
+                        .where(ImportJob.id == self.job_id)
+                        .values(
+                            lines_committed=lines_committed,
+                            records_committed=ImportJob.records_committed + records
+                        )
+                    )
+            # Cached schedules of resumed or concurrently read projects miss the new rows
+            for name in (Stage.__table__.name, Task.__table__.name):
+                for project_id in {row["project_id"] for row in self._rows[name]}:
+                    schedules.invalidate(project_id)
+        except SQLAlchemyError as exc:
+            reason = getattr(exc, "orig", None) or exc
+            raise ImportFailed(lines_committed, f"chunk could not be written: {reason.__class__.__name__}: {reason}")
+        finally:
+            for rows in self._rows.values():
+                rows.clear()
+            self._pending = 0
+
+    def _rollup(self) -> RollupDelta:
+        rollup = RollupDelta()
+        task_projects = {}
+        for row in self._rows[Task.__table__.name]:
+            task_projects[row["id"]] = row["project_id"]
+            rollup.task(row["project_id"], row["status"], row.get("priority"), row.get("stage_id"))
+        # A task line carries its assignees, so their task is always in the same chunk
+        for row in self._rows[TaskAssignee.__table__.name]:
+            rollup.assignee(task_projects[row["task_id"]], row["assignee_type"])
+        for row in self._rows[ProjectMember.__table__.name]:
+            rollup.member(row["project_id"])
+        return rollup
+
+    async def _reject_archived(self, session, lines_committed: int) -> None:
+        project_ids = [row["id"] for row in self._rows[Project.__table__.name]]
+        if not project_ids:
+            return
+        result = await session.execute(select(ArchivedProject.id).where(ArchivedProject.id.in_(project_ids)))
+        archived = result.scalars().all()
+        if archived:
+            self.project_ids.difference_update(archived)
+            raise ImportFailed(lines_committed, f"project {archived[0]} is archived")
+
+    async def _drop_missing_users(self, session) -> None:
+        # creator_id and modifier_id are ON DELETE SET NULL references; users that do not
+        # exist in this database are treated the same way instead of failing the chunk
+        references = [
+            (self._rows[Project.__table__.name], "creator_id"),
+            (self._rows[Stage.__table__.name], "modifier_id"),
+        ]
+        user_ids = {row[key] for rows, key in references for row in rows if row.get(key)}
+        if not user_ids:
+            return
+        users = Base.metadata.tables["users"]
+        result = await session.execute(select(users.c.id).where(users.c.id.in_(user_ids)))
+        known = set(result.scalars().all())
+        for rows, key in references:
+            for row in rows:
+                if row.get(key) and row[key] not in known:
+                    row[key] = None
@@ -0,0 +1,172 @@
+"""Incrementally maintained project rollups behind the summary endpoints.
+
+Writes collect their counter changes in a RollupDelta and apply them with one
+INSERT ... ON CONFLICT DO UPDATE SET count = count + excluded.count inside the
+write's own transaction, so a summary is a single primary key range read.
+
+Run ``python -m services.rollups [project_id ...]`` to recompute the counters
+from the tasks, assignees and members tables (all projects when none are given).
+"""
+import asyncio
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import String, cast, delete, func, literal, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.database import async_session
+from models.project_models import Task, TaskAssignee, ProjectMember, ProjectRollupCounter
+from schemas import project_schemas as schemas
+
+counters = ProjectRollupCounter.__table__
+NO_PRIORITY = "none"
+
+_upsert = insert(counters)
+UPSERT = _upsert.on_conflict_do_update(
+    index_elements=[counters.c.project_id, counters.c.metric, counters.c.key],
+    set_={"count": counters.c.count + _upsert.excluded.count}
+)
+
+
+def priority_key(priority: Optional[int]) -> str:
+    return NO_PRIORITY if priority is None else str(priority)
+
+
+def stage_status_key(stage_id: Optional[str], status: str) -> str:
+    return f"{stage_id or ''}:{status}"
+
+
+class RollupDelta:
+    """Counter changes of one transaction, applied with a single upsert."""
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[str, str, str], int] = defaultdict(int)
+
+    def add(self, project_id: str, metric: str, key: str, amount: int = 1) -> None:
+        self._deltas[(project_id, metric, key)] += amount
+
+    def task(self, project_id: str, status: str, priority: Optional[int], stage_id: Optional[str], amount: int = 1) -> None:
+        self.add(project_id, "status", status, amount)
+        self.add(project_id, "priority", priority_key(priority), amount)
+        self.add(project_id, "stage_status", stage_status_key(stage_id, status), amount)
+
+    def task_status(self, project_id: str, stage_id: Optional[str], old: str, new: str) -> None:
+        if old == new:
+            return
+        self.add(project_id, "status", old, -1)
+        self.add(project_id, "status", new)
+        self.add(project_id, "stage_status", stage_status_key(stage_id, old), -1)
+        self.add(project_id, "stage_status", stage_status_key(stage_id, new))
+
+    def assignee(self, project_id: str, assignee_type: str, amount: int = 1) -> None:
+        self.add(project_id, "assignee_type", assignee_type, amount)
+
+    def member(self, project_id: str, amount: int = 1) -> None:
+        self.add(project_id, "members", "", amount)
+
+    async def apply(self, db: AsyncSession) -> None:
+        rows = [
+            {"project_id": project_id, "metric": metric, "key": key, "count": amount}
+            for (project_id, metric, key), amount in self._deltas.items()
+            if amount
+        ]
+        if rows:
+            await db.execute(UPSERT, rows)
+        self._deltas.clear()
+
+
+def build_summary(project_id: str, rows: Iterable[Tuple[str, str, int]]) -> schemas.ProjectSummary:
+    by_status: Dict[str, int] = {}
+    by_priority: Dict[str, int] = {}
+    assignees: Dict[str, int] = {}
+    stages: Dict[str, Dict[str, int]] = defaultdict(dict)
+    members = 0
+    for metric, key, count in rows:
+        if not count:
+            continue
+        if metric == "status":
+            by_status[key] = count
+        elif metric == "priority":
+            by_priority[key] = count
+        elif metric == "stage_status":
+            stage_id, status = key.split(":", 1)
+            stages[stage_id][status] = count
+        elif metric == "assignee_type":
+            assignees[key] = count
+        elif metric == "members":
+            members = count
+
+    progress = []
+    for stage_id, statuses in sorted(stages.items()):
+        total = sum(statuses.values())
+        done = statuses.get(settings.TASK_DONE_STATUS, 0)
+        progress.append(schemas.StageProgress(
+            stage_id=stage_id or None,
+            tasks=total,
+            done=done,
+            progress=round(done / total, 4),
+            by_status=statuses
+        ))
+    return schemas.ProjectSummary(
+        project_id=project_id,
+        tasks=sum(by_status.values()),
+        by_status=by_status,
+        by_priority=by_priority,
+        stages=progress,
+        assignees_by_type=assignees,
+        members=members
+    )
+
+
+async def load_summaries(db: AsyncSession, project_ids: Sequence[str]) -> List[schemas.ProjectSummary]:
+    result = await db.execute(
+        select(counters.c.project_id, counters.c.metric, counters.c.key, counters.c.count)
+        .where(counters.c.project_id.in_(project_ids))
+    )
+    rows = defaultdict(list)
+    for project_id, metric, key, count in result:
+        rows[project_id].append((metric, key, count))
+    return [build_summary(project_id, rows[project_id]) for project_id in project_ids]
+
+
+def _rebuild_queries():
+    unstaged = literal("")
+    yield select(Task.project_id, literal("status"), Task.status, func.count()).group_by(Task.project_id, Task.status)
+    priority = func.coalesce(cast(Task.priority, String), NO_PRIORITY)
+    yield select(Task.project_id, literal("priority"), priority, func.count()).group_by(Task.project_id, priority)
+    stage_status = func.coalesce(Task.stage_id, unstaged) + ":" + Task.status
+    yield select(Task.project_id, literal("stage_status"), stage_status, func.count()).group_by(Task.project_id, stage_status)
+    yield (
+        select(Task.project_id, literal("assignee_type"), TaskAssignee.assignee_type, func.count())
+        .join(TaskAssignee, TaskAssignee.task_id == Task.id)
+        .group_by(Task.project_id, TaskAssignee.assignee_type)
+    )
+    yield select(ProjectMember.project_id, literal("members"), unstaged, func.count()).group_by(ProjectMember.project_id)
+
+
+async def rebuild(db: AsyncSession, project_ids: Optional[Sequence[str]] = None) -> None:
+    """Recompute the counters from the source tables inside the caller's transaction."""
+    cleanup = delete(counters)
+    if project_ids:
+        cleanup = cleanup.where(counters.c.project_id.in_(project_ids))
+    await db.execute(cleanup)
+
+    columns = [counters.c.project_id, counters.c.metric, counters.c.key, counters.c.count]
+    for query in _rebuild_queries():
+        if project_ids:
+            query = query.where(query.selected_columns[0].in_(project_ids))
+        await db.execute(insert(counters).from_select(columns, query))
+
+
+async def main(project_ids: List[str]) -> None:
+    async with async_session() as session:
+        async with session.begin():
+            await rebuild(session, project_ids or None)
+    print(f"Rebuilt rollups for {', '.join(project_ids) if project_ids else 'all projects'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,395 @@
+"""Critical-path schedules of a project's stage and task dependency graphs.
+
+A project's two graphs are cached in the ``schedules`` cache and updated in place
+by the routes that add stages, tasks or dependencies instead of being reloaded:
+
+* the topological order is maintained with the Pearce-Kelly algorithm, so a new
+  edge only reorders the nodes between its endpoints, and a cycle is detected
+  by the same bounded search;
+* earliest start times are recomputed forward from the changed nodes and latest
+  start times backward, and propagation stops at nodes whose times are unchanged.
+
+Durations are in days: a stage lasts from start_date to end_date
+(SCHEDULE_DEFAULT_STAGE_DAYS when either is missing) and a task lasts
+SCHEDULE_TASK_DAYS. Times are offsets in days from the start of the project.
+"""
+import heapq
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.cache import TTLCache
+from models.project_models import Stage, StageDependency, Task, TaskDependency
+
+EPSILON = 1e-6
+
+
+class DependencyCycle(Exception):
+    """An edge would close a cycle; ``cycle`` lists it in dependency order, first node repeated last."""
+
+    def __init__(self, cycle: List[str]):
+        super().__init__(" -> ".join(cycle))
+        self.cycle = cycle
+
+
+def stage_days(start_date: Optional[datetime], end_date: Optional[datetime]) -> float:
+    if start_date is None or end_date is None or end_date <= start_date:
+        return settings.SCHEDULE_DEFAULT_STAGE_DAYS
+    return (end_date - start_date).total_seconds() / 86400
+
+
+class ScheduleGraph:
+    """Dependency graph with an incrementally maintained topological order and CPM times."""
+
+    def __init__(self):
+        self.duration: Dict[str, float] = {}
+        self.preds: Dict[str, Set[str]] = {}
+        self.succs: Dict[str, Set[str]] = {}
+        self.order: Dict[str, int] = {}
+        self.cycle: List[str] = []
+        self.earliest: Dict[str, float] = {}  # earliest start
+        self.latest: Dict[str, float] = {}  # latest start that keeps the makespan
+        self.makespan = 0.0
+        self.recomputed = 0  # nodes visited by the last compute()
+        self._next_order = 0
+        self._forward: Set[str] = set()
+        self._backward: Set[str] = set()
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def build(cls, durations: Dict[str, float], edges: Iterable[Tuple[str, str]]) -> "ScheduleGraph":
+        """Graph of ``durations`` with (depends_on, dependent) ``edges``; unknown nodes are ignored."""
+        graph = cls()
+        for node, duration in durations.items():
+            graph.duration[node] = duration
+            graph.preds[node] = set()
+            graph.succs[node] = set()
+        for before, after in edges:
+            if before in graph.duration and after in graph.duration:
+                graph.succs[before].add(after)
+                graph.preds[after].add(before)
+        graph._sort()
+        return graph
+
+    def _sort(self) -> None:
+        """Full topological sort, used on load and when a cycle may have been broken."""
+        indegree = {node: len(preds) for node, preds in self.preds.items()}
+        ready = [node for node, degree in indegree.items() if not degree]
+        order: Dict[str, int] = {}
+        while ready:
+            node = ready.pop()
+            order[node] = len(order)
+            for succ in self.succs[node]:
+                indegree[succ] -= 1
+                if not indegree[succ]:
+                    ready.append(succ)
+        self.order = order
+        self._next_order = len(order)
+        self.cycle = [] if len(order) == len(self.duration) else self._find_cycle(set(self.duration) - set(order))
+        self.earliest.clear()
+        self.latest.clear()
+        self._forward = set(self.duration)
+        self._backward = set(self.duration)
+        self._snapshot = None
+
+    def _find_cycle(self, remaining: Set[str]) -> List[str]:
+        # Every node left over by the sort has a predecessor that was left over
+        # too, so walking predecessors has to run into a node twice
+        node = min(remaining)
+        seen: Dict[str, int] = {}
+        walk: List[str] = []
+        while node not in seen:
+            seen[node] = len(walk)
+            walk.append(node)
+            node = min(pred for pred in self.preds[node] if pred in remaining)
+        cycle = walk[seen[node]:][::-1]
+        return cycle + cycle[:1]
+
+    def _changed(self, forward: Optional[str] = None, backward: Optional[str] = None) -> None:
+        if forward is not None:
+            self._forward.add(forward)
+        if backward is not None:
+            self._backward.add(backward)
+        self._snapshot = None
+
+    def add_node(self, node: str, duration: float) -> None:
+        if node in self.duration:
+            if self.duration[node] != duration:
+                self.duration[node] = duration
+                self._changed(node, node)
+            return
+        self.duration[node] = duration
+        self.preds[node] = set()
+        self.succs[node] = set()
+        self.order[node] = self._next_order
+        self._next_order += 1
+        self._changed(node, node)
+
+    def _reach(
+        self, start: str, edges: Dict[str, Set[str]], keep: Optional[Callable[[int], bool]] = None
+    ) -> Dict[str, Optional[str]]:
+        """Nodes reachable from ``start`` whose order passes ``keep``, mapped to the node they were reached from.
+
+        Without ``keep`` every reachable node counts; nodes on a cycle have no order.
+        """
+        parents: Dict[str, Optional[str]] = {start: None}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for other in edges[node]:
+                if other not in parents and (keep is None or keep(self.order[other])):
+                    parents[other] = node
+                    stack.append(other)
+        return parents
+
+    def cycle_for(self, before: str, after: str) -> Optional[List[str]]:
+        """The cycle the edge before -> after would close, or None."""
+        if before == after:
+            return [before, after]
+        if self.cycle:
+            parents = self._reach(after, self.succs)
+        elif self.order[before] < self.order[after]:
+            return None
+        else:
+            # Anything on a path from after to before sits between them in the order
+            upper = self.order[before]
+            parents = self._reach(after, self.succs, lambda order: order <= upper)
+        if before not in parents:
+            return None
+        path = [before]
+        while path[-1] != after:
+            path.append(parents[path[-1]])
+        return [before] + path[::-1]
+
+    def add_edge(self, before: str, after: str) -> None:
+        """Make ``after`` depend on ``before``; raises DependencyCycle and leaves the graph unchanged."""
+        if after in self.succs[before]:
+            return
+        if not self.cycle and self.order[before] >= self.order[after]:
+            lower, upper = self.order[after], self.order[before]
+            forward = self._reach(after, self.succs, lambda order: order <= upper)
+            if before in forward:
+                raise DependencyCycle(self.cycle_for(before, after))
+            backward = self._reach(before, self.preds, lambda order: order >= lower)
+            # Pearce-Kelly: the affected nodes keep their slots, ancestors of before first
+            nodes = sorted(backward, key=self.order.__getitem__) + sorted(forward, key=self.order.__getitem__)
+            for node, slot in zip(nodes, sorted(self.order[node] for node in nodes)):
+                self.order[node] = slot
+        self.succs[before].add(after)
+        self.preds[after].add(before)
+        self._changed(after, before)
+
+    def remove_edge(self, before: str, after: str) -> None:
+        if after not in self.succs.get(before, ()):
+            return
+        self.succs[before].discard(after)
+        self.preds[after].discard(before)
+        if self.cycle:
+            self._sort()
+        else:
+            self._changed(after, before)
+
+    def compute(self) -> None:
+        """Bring earliest/latest times up to date with the changes since the last call."""
+        if self.cycle or not (self._forward or self._backward):
+            return
+        order, duration, earliest, latest = self.order, self.duration, self.earliest, self.latest
+        visited = 0
+
+        # Popped nodes come in topological order: every push is a successor of the node just popped
+        seeds = self._forward
+        heap = [(order[node], node) for node in seeds]
+        heapq.heapify(heap)
+        done: Set[str] = set()
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            visited += 1
+            start = max((earliest[pred] + duration[pred] for pred in self.preds[node]), default=0.0)
+            if node in seeds or earliest.get(node) != start:
+                earliest[node] = start
+                for succ in self.succs[node]:
+                    heapq.heappush(heap, (order[succ], succ))
+
+        makespan = max((earliest[node] + duration[node] for node in duration), default=0.0)
+        if abs(makespan - self.makespan) > EPSILON or not latest:
+            # Every sink's latest finish is the makespan
+            self._backward.update(node for node, succs in self.succs.items() if not succs)
+        self.makespan = makespan
+
+        heap = [(-order[node], node) for node in self._backward]
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            visited += 1
+            finish = min((latest[succ] for succ in self.succs[node]), default=makespan)
+            start = finish - duration[node]
+            if latest.get(node) != start:
+                latest[node] = start
+                for pred in self.preds[node]:
+                    heapq.heappush(heap, (-order[pred], pred))
+
+        self._forward = set()
+        self._backward = set()
+        self.recomputed = visited
+
+    def _critical(self, node: str) -> bool:
+        return self.latest[node] - self.earliest[node] <= EPSILON
+
+    def critical_path(self) -> List[str]:
+        """One longest chain of zero-slack nodes, from a source to a node finishing at the makespan."""
+        sources = [node for node, preds in self.preds.items() if not preds and self._critical(node)]
+        if not sources:
+            return []
+        node = min(sources, key=self.order.__getitem__)
+        path = [node]
+        while True:
+            finish = self.earliest[node] + self.duration[node]
+            tight = [
+                succ for succ in self.succs[node]
+                if self._critical(succ) and abs(self.earliest[succ] - finish) <= EPSILON
+            ]
+            if not tight:
+                return path
+            node = min(tight, key=self.order.__getitem__)
+            path.append(node)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Response content of the schedule, kept until the graph changes again."""
+        if self._snapshot is not None:
+            return self._snapshot
+        if self.cycle:
+            self._snapshot = {"has_cycle": True, "cycle": list(self.cycle), "duration": None,
+                              "order": [], "critical_path": [], "nodes": []}
+            return self._snapshot
+
+        self.compute()
+        order = sorted(self.duration, key=self.order.__getitem__)
+        nodes = []
+        for node in order:
+            duration = self.duration[node]
+            earliest = self.earliest[node]
+            latest = self.latest[node]
+            nodes.append({
+                "id": node,
+                "depends_on": sorted(self.preds[node]),
+                "duration": round(duration, 4),
+                "earliest_start": round(earliest, 4),
+                "earliest_finish": round(earliest + duration, 4),
+                "latest_start": round(latest, 4),
+                "latest_finish": round(latest + duration, 4),
+                "slack": round(max(latest - earliest, 0.0), 4),
+                "critical": latest - earliest <= EPSILON,
+            })
+        self._snapshot = {
+            "has_cycle": False,
+            "cycle": [],
+            "duration": round(self.makespan, 4),
+            "order": order,
+            "critical_path": self.critical_path(),
+            "nodes": nodes,
+        }
+        return self._snapshot
+
+
+class ProjectSchedule:
+    def __init__(self, stages: ScheduleGraph, tasks: ScheduleGraph):
+        self.stages = stages
+        self.tasks = tasks
+
+
+def dependency_edges(kind: str, project_id: str):
+    """(depends_on, dependent) rows of a project's 'stages' or 'tasks' dependencies."""
+    if kind == "stages":
+        return select(StageDependency.depends_on_id, StageDependency.stage_id).where(StageDependency.project_id == project_id)
+    return select(TaskDependency.depends_on_id, TaskDependency.task_id).where(TaskDependency.project_id == project_id)
+
+
+async def load_schedule(db: AsyncSession, project_id: str) -> ProjectSchedule:
+    stages = await db.execute(
+        select(Stage.id, Stage.start_date, Stage.end_date).where(Stage.project_id == project_id)
+    )
+    stage_edges = await db.execute(dependency_edges("stages", project_id))
+    tasks = await db.execute(select(Task.id).where(Task.project_id == project_id))
+    task_edges = await db.execute(dependency_edges("tasks", project_id))
+    return ProjectSchedule(
+        ScheduleGraph.build({id: stage_days(start, end) for id, start, end in stages}, stage_edges.all()),
+        ScheduleGraph.build({id: settings.SCHEDULE_TASK_DAYS for id in tasks.scalars()}, task_edges.all())
+    )
+
+
+async def find_committed_cycle(db: AsyncSession, project_id: str, kind: str, before: str, after: str) -> Optional[List[str]]:
+    """The cycle the new edge before -> after closes among the dependency rows ``db`` sees, or None.
+
+    Call it after the new row is flushed: the transaction then holds the write lock,
+    so no other dependency can be committed between this check and the commit.
+    """
+    result = await db.execute(dependency_edges(kind, project_id))
+    edges = [(depends_on, dependent) for depends_on, dependent in result if (depends_on, dependent) != (before, after)]
+    nodes = {node for edge in edges for node in edge} | {before, after}
+    graph = ScheduleGraph.build(dict.fromkeys(nodes, 0.0), edges)
+    return graph.cycle_for(before, after)
+
+
+class ScheduleStore:
+    """Per-project schedules, loaded once and then kept current by committed writes.
+
+    Write routes call ``update`` after their commit. A generation counter per
+    project keeps a load that overlapped such a write from caching a graph
+    without it. Writes made by other processes show up once the entry expires.
+    """
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+        self._generations: Dict[str, int] = defaultdict(int)
+
+    async def get(self, db: AsyncSession, project_id: str) -> ProjectSchedule:
+        schedule = self.cache.get(project_id)
+        if schedule is None:
+            generation = self._generations[project_id]
+            schedule = await load_schedule(db, project_id)
+            if self._generations[project_id] == generation:
+                self.cache.set(project_id, schedule)
+        return schedule
+
+    async def find_cycle(self, db: AsyncSession, project_id: str, kind: str, before: str, after: str) -> Optional[List[str]]:
+        """The cycle a new ``kind`` ('stages' or 'tasks') edge before -> after would close, or None.
+
+        Answered from the cached graph, which may miss an edge committed concurrently;
+        writes confirm with find_committed_cycle() inside their transaction.
+        """
+        graph = getattr(await self.get(db, project_id), kind)
+        if before not in graph.duration or after not in graph.duration:
+            # Created by another process since the graph was cached
+            self.invalidate(project_id)
+            graph = getattr(await self.get(db, project_id), kind)
+        return graph.cycle_for(before, after)
+
+    def update(self, project_id: str, change: Callable[[ProjectSchedule], None]) -> None:
+        """Apply a committed change to the cached schedule of ``project_id``, if any."""
+        self._generations[project_id] += 1
+        schedule = self.cache.get(project_id)
+        if schedule is None:
+            return
+        try:
+            change(schedule)
+        except (KeyError, DependencyCycle):
+            # The cached graph missed writes of another process; reload it on the next read
+            self.cache.pop(project_id)
+
+    def invalidate(self, project_id: str) -> None:
+        self._generations[project_id] += 1
+        self.cache.pop(project_id)
+
+
+schedules = ScheduleStore(TTLCache("schedules", settings.SCHEDULE_CACHE_SIZE, settings.SCHEDULE_CACHE_TTL))
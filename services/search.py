@@ -0,0 +1,96 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Float, Integer, String, column, func, literal_column, select, table, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from models.project_models import SearchDocument
+from schemas import project_schemas as schemas
+
+# Full-text search over tasks and projects.
+# search_index is an FTS5 table kept in sync with tasks/projects by triggers (see
+# SEARCH_DDL in models/project_models.py), so a query is an index lookup however
+# many tasks exist, unlike LIKE '%term%'. Results are ordered by bm25 rank, then
+# rowid, and paged with a (rank, rowid) keyset cursor.
+
+search_index = table(
+    "search_index",
+    column("rowid", Integer),
+    column("title", String),
+    column("rank", Float),
+)
+fts = literal_column("search_index")
+
+# "exact phrase" or a bare word; everything else (operators, punctuation) is dropped
+TOKEN = re.compile(r'"([^"]*)"|(\w+)')
+WORD = re.compile(r"\w+")
+
+
+def build_match(q: str) -> str:
+    """Turn user input into an FTS5 query: all terms must match, the last bare word as a prefix."""
+    terms = []
+    prefix = False
+    for phrase, word in TOKEN.findall(q):
+        words = WORD.findall(phrase or word)
+        if words:
+            terms.append('"' + " ".join(words) + '"')
+            prefix = not phrase
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query has no searchable terms")
+    if prefix and not q.rstrip().endswith('"'):
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_statement(match: str, project_id: Optional[str], kind: Optional[str], page_size: int, cursor: Optional[str]):
+    query = (
+        select(
+            SearchDocument.kind,
+            SearchDocument.entity_id.label("id"),
+            SearchDocument.project_id,
+            search_index.c.title,
+            func.snippet(fts, -1, "<mark>", "</mark>", "…", 16).label("snippet"),
+            search_index.c.rank,
+            search_index.c.rowid,
+        )
+        .join_from(search_index, SearchDocument, SearchDocument.id == search_index.c.rowid)
+        .where(fts.op("MATCH")(match))
+    )
+    if project_id:
+        query = query.where(SearchDocument.project_id == project_id)
+    if kind:
+        query = query.where(SearchDocument.kind == kind)
+    if cursor:
+        rank, rowid = decode_cursor(cursor)
+        query = query.where(tuple_(search_index.c.rank, search_index.c.rowid) > tuple_(rank, rowid))
+    return query.order_by(search_index.c.rank, search_index.c.rowid).limit(page_size)
+
+
+async def search(
+    db: AsyncSession,
+    q: str,
+    project_id: Optional[str] = None,
+    kind: Optional[str] = None,
+    page_size: int = 20,
+    cursor: Optional[str] = None
+) -> Tuple[List[schemas.SearchHit], Dict[str, str]]:
+    """Return one page of hits and the headers carrying the next cursor."""
+    result = await db.execute(search_statement(build_match(q), project_id, kind, page_size, cursor))
+    rows = result.all()
+    headers = {}
+    if rows and len(rows) == page_size:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].rank, rows[-1].rowid)
+    hits = [
+        schemas.SearchHit(
+            kind=row.kind,
+            id=row.id,
+            project_id=row.project_id,
+            title=row.title,
+            snippet=row.snippet,
+            rank=row.rank
+        )
+        for row in rows
+    ]
+    return hits, headers
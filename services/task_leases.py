@@ -0,0 +1,202 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from config import settings
+from core.database import async_session
+from models.project_models import Task, TaskAssignee, ProjectEvent
+from schemas import project_schemas as schemas
+from services.change_feed import record_event, publish_events
+from services.rollups import RollupDelta
+
+# Work-queue claims.
+# A claim moves the best TODO task without assignees to IN_PROGRESS with a single
+# UPDATE ... WHERE id = (SELECT ...) RETURNING, so two workers can never win the
+# same task, and attaches a TaskAssignee whose lease_expires_at must be renewed.
+# Expired leases are swept and their tasks go back to TODO. A lease ends when its
+# task leaves IN_PROGRESS (see services/task_updates.py), so the assignees of
+# finished tasks stay in place.
+
+CLAIMABLE_STATUS = "TODO"
+CLAIMED_STATUS = "IN_PROGRESS"
+
+# New updated_at of a changed task. Millisecond precision, so a claim or requeue in
+# the same second as the read behind a PATCH /tasks:batch item still changes the
+# version that PATCH compares (see services/task_updates.py)
+NOW = func.strftime("%Y-%m-%d %H:%M:%f", "now")
+
+logger = logging.getLogger(__name__)
+
+
+def lease_expiry(lease_seconds: Optional[int] = None) -> datetime:
+    seconds = min(lease_seconds or settings.TASK_LEASE_SECONDS, settings.TASK_LEASE_MAX_SECONDS)
+    return datetime.utcnow() + timedelta(seconds=seconds)
+
+
+def _unassigned(task):
+    return ~exists().where(TaskAssignee.task_id == task.id)
+
+
+def _claimed():
+    """The assignee's task is still IN_PROGRESS, i.e. its lease still holds the task."""
+    return exists().where(Task.id == TaskAssignee.task_id).where(Task.status == CLAIMED_STATUS)
+
+
+async def reopen_tasks(db: AsyncSession, task_ids, event_type: str, rollup: RollupDelta) -> List[ProjectEvent]:
+    """Put claimed tasks whose lease was dropped back to TODO; returns the events to publish."""
+    # Only tasks that nobody else is assigned to go back to the queue
+    result = await db.execute(
+        update(Task)
+        .where(Task.id.in_(task_ids))
+        .where(Task.status == CLAIMED_STATUS)
+        .where(_unassigned(Task))
+        .values(status=CLAIMABLE_STATUS, updated_at=NOW)
+        .returning(Task.id, Task.project_id, Task.stage_id)
+        .execution_options(synchronize_session=False)
+    )
+    events = []
+    for row in result.all():
+        rollup.task_status(row.project_id, row.stage_id, CLAIMED_STATUS, CLAIMABLE_STATUS)
+        events.append(record_event(db, row.project_id, event_type, {"task_id": row.id}))
+    return events
+
+
+async def _task_projects(db: AsyncSession, task_ids) -> Dict[str, str]:
+    result = await db.execute(select(Task.id, Task.project_id).where(Task.id.in_(task_ids)))
+    return dict(result.all())
+
+
+async def sweep_expired_leases(db: AsyncSession) -> List[ProjectEvent]:
+    """Remove expired claims inside the caller's transaction; returns the events to publish."""
+    result = await db.execute(expired_leases_statement(datetime.utcnow()))
+    expired = result.all()
+    if not expired:
+        return []
+
+    rollup = RollupDelta()
+    projects = await _task_projects(db, {row.task_id for row in expired})
+    for row in expired:
+        rollup.assignee(projects[row.task_id], row.assignee_type, -1)
+    events = await reopen_tasks(db, set(projects), "task.lease_expired", rollup)
+    await rollup.apply(db)
+    return events
+
+
+def claim_statement(project_id: str):
+    candidate = aliased(Task)
+    next_task = (
+        select(candidate.id)
+        .where(candidate.project_id == project_id)
+        .where(candidate.status == CLAIMABLE_STATUS)
+        .where(_unassigned(candidate))
+        .order_by(candidate.priority.desc(), candidate.created_at, candidate.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    return (
+        update(Task)
+        .where(Task.id == next_task)
+        .where(Task.status == CLAIMABLE_STATUS)
+        .values(status=CLAIMED_STATUS, updated_at=NOW)
+        .returning(Task.id, Task.stage_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def expired_leases_statement(now: datetime):
+    return (
+        delete(TaskAssignee)
+        .where(TaskAssignee.lease_expires_at < now)
+        .where(_claimed())
+        .returning(TaskAssignee.task_id, TaskAssignee.assignee_type)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def end_leases_statement(task_ids):
+    """Turn the claims on tasks that left IN_PROGRESS into plain assignments."""
+    return (
+        update(TaskAssignee)
+        .where(TaskAssignee.task_id.in_(task_ids))
+        .where(TaskAssignee.lease_expires_at.is_not(None))
+        .values(lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def claim_next_task(db: AsyncSession, project_id: str, claim: schemas.TaskClaim) -> Optional[TaskAssignee]:
+    """Claim the highest-priority, oldest unassigned TODO task inside the caller's transaction."""
+    result = await db.execute(claim_statement(project_id))
+    claimed = result.one_or_none()
+    if claimed is None:
+        return None
+
+    db_assignee = TaskAssignee(
+        task_id=claimed.id,
+        assignee_id=claim.assignee_id,
+        assignee_type=claim.assignee_type,
+        role=claim.role,
+        lease_expires_at=lease_expiry(claim.lease_seconds)
+    )
+    db.add(db_assignee)
+    await db.flush()
+
+    rollup = RollupDelta()
+    rollup.task_status(project_id, claimed.stage_id, CLAIMABLE_STATUS, CLAIMED_STATUS)
+    rollup.assignee(project_id, claim.assignee_type)
+    await rollup.apply(db)
+    return db_assignee
+
+
+async def renew_lease(db: AsyncSession, task_id: str, assignee_id: str, lease_seconds: Optional[int]) -> bool:
+    """Extend a lease that has not expired yet."""
+    result = await db.execute(
+        update(TaskAssignee)
+        .where(TaskAssignee.id == assignee_id)
+        .where(TaskAssignee.task_id == task_id)
+        .where(TaskAssignee.lease_expires_at >= datetime.utcnow())
+        .values(lease_expires_at=lease_expiry(lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+async def release_lease(db: AsyncSession, task_id: str, assignee_id: str) -> Optional[List[ProjectEvent]]:
+    """Drop a claim and requeue its task; None when there was no such lease."""
+    result = await db.execute(
+        delete(TaskAssignee)
+        .where(TaskAssignee.id == assignee_id)
+        .where(TaskAssignee.task_id == task_id)
+        .where(TaskAssignee.lease_expires_at.is_not(None))
+        .where(_claimed())
+        .returning(TaskAssignee.assignee_type)
+        .execution_options(synchronize_session=False)
+    )
+    assignee_type = result.scalar_one_or_none()
+    if assignee_type is None:
+        return None
+
+    rollup = RollupDelta()
+    projects = await _task_projects(db, [task_id])
+    rollup.assignee(projects[task_id], assignee_type, -1)
+    events = await reopen_tasks(db, [task_id], "task.released", rollup)
+    await rollup.apply(db)
+    return events
+
+
+async def sweep_expired_leases_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.TASK_LEASE_SWEEP_SECONDS)
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    events = await sweep_expired_leases(session)
+            publish_events(*events)
+        except SQLAlchemyError:
+            logger.exception("Sweeping expired task leases failed")
@@ -0,0 +1,120 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import String, select, tuple_, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.project_models import Stage, Task, ProjectEvent
+from schemas import project_schemas as schemas
+from services.change_feed import record_event
+from services.rollups import RollupDelta
+from services.task_leases import CLAIMED_STATUS, NOW, end_leases_statement
+
+# Bulk task updates behind PATCH /api/tasks:batch.
+# The batch is read with one SELECT, checked against the versions the clients sent
+# and written with one UPDATE ... WHERE id IN (...) per distinct change (e.g. every
+# task moving to DONE shares a statement), so a burst of N changes costs a handful
+# of statements. Each UPDATE also matches the updated_at text it read, so a task
+# changed by someone else in between is reported as a conflict, not overwritten.
+
+FIELDS = ("status", "priority", "stage_id")
+
+# updated_at as stored, for exact comparison in the UPDATE guard
+version = type_coerce(Task.updated_at, String)
+
+
+def _error(index: int, field: str, message: str, kind: str) -> schemas.TaskBatchError:
+    return schemas.TaskBatchError(index=index, errors=[{"loc": [field], "msg": message, "type": kind}])
+
+
+async def update_tasks(
+    db: AsyncSession,
+    patches: Sequence[Tuple[int, schemas.TaskPatch]]
+) -> Tuple[List[schemas.TaskVersion], List[schemas.TaskBatchConflict], List[schemas.TaskBatchError], List[ProjectEvent]]:
+    """Apply ``(index, patch)`` pairs inside the caller's transaction.
+
+    Returns the new versions, the conflicts, the per-item errors and the events to publish.
+    """
+    conflicts: List[schemas.TaskBatchConflict] = []
+    errors: List[schemas.TaskBatchError] = []
+
+    result = await db.execute(
+        select(Task.id, Task.project_id, Task.status, Task.priority, Task.stage_id, Task.updated_at, version.label("version"))
+        .where(Task.id.in_({patch.id for _, patch in patches}))
+    )
+    current = {row.id: row for row in result}
+
+    stage_ids = {patch.stage_id for _, patch in patches if patch.stage_id}
+    stage_projects: Dict[str, str] = {}
+    if stage_ids:
+        result = await db.execute(select(Stage.id, Stage.project_id).where(Stage.id.in_(stage_ids)))
+        stage_projects = dict(result.all())
+
+    # change set -> task ids, and the (id, version) pairs each UPDATE must still match
+    groups: Dict[Tuple[Tuple[str, Any], ...], List[Tuple[str, str]]] = defaultdict(list)
+    indexes: Dict[str, int] = {}
+    for index, patch in patches:
+        row = current.get(patch.id)
+        if row is None:
+            errors.append(_error(index, "id", "task not found", "value_error.not_found"))
+            continue
+        if patch.id in indexes:
+            errors.append(_error(index, "id", "task already changed earlier in this batch", "value_error.duplicate"))
+            continue
+        changes = tuple((field, getattr(patch, field)) for field in FIELDS if field in patch.__fields_set__)
+        if not changes:
+            errors.append(_error(index, "__root__", "no status, priority or stage_id to change", "value_error.missing"))
+            continue
+        if patch.stage_id and stage_projects.get(patch.stage_id) != row.project_id:
+            errors.append(_error(index, "stage_id", "stage not found in project", "value_error.not_found"))
+            continue
+        if patch.updated_at is not None and patch.updated_at.replace(tzinfo=None) != row.updated_at:
+            conflicts.append(schemas.TaskBatchConflict(index=index, id=patch.id, updated_at=row.updated_at))
+            continue
+        indexes[patch.id] = index
+        groups[changes].append((row.id, row.version))
+
+    updated: Dict[str, Any] = {}
+    for changes, targets in groups.items():
+        result = await db.execute(
+            update(Task)
+            .where(Task.id.in_([task_id for task_id, _ in targets]))
+            .where(tuple_(Task.id, version).in_(targets))
+            .values(**dict(changes), updated_at=NOW)
+            .returning(Task.id, Task.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        updated.update(result.all())
+
+    rollup = RollupDelta()
+    changed: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    unclaimed: List[str] = []
+    for changes, targets in groups.items():
+        values = dict(changes)
+        for task_id, _ in targets:
+            row = current[task_id]
+            if task_id not in updated:
+                # Changed by another writer between our read and the UPDATE
+                conflicts.append(schemas.TaskBatchConflict(index=indexes[task_id], id=task_id))
+                continue
+            status = values.get("status", row.status)
+            priority = values.get("priority", row.priority)
+            stage_id = values.get("stage_id", row.stage_id)
+            rollup.task(row.project_id, row.status, row.priority, row.stage_id, -1)
+            rollup.task(row.project_id, status, priority, stage_id)
+            if row.status == CLAIMED_STATUS and status != CLAIMED_STATUS:
+                unclaimed.append(task_id)
+            changed[row.project_id].append({"task_id": task_id, **values})
+    await rollup.apply(db)
+    if unclaimed:
+        # Their claims are over: the sweep must not take the assignees off finished tasks
+        await db.execute(end_leases_statement(unclaimed))
+
+    events = [record_event(db, project_id, "tasks.updated", {"tasks": tasks}) for project_id, tasks in changed.items()]
+    versions = [
+        schemas.TaskVersion(id=task_id, updated_at=updated_at)
+        for task_id, updated_at in sorted(updated.items(), key=lambda item: indexes[item[0]])
+    ]
+    conflicts.sort(key=lambda conflict: conflict.index)
+    errors.sort(key=lambda error: error.index)
+    return versions, conflicts, errors, events
@@ -0,0 +1,89 @@
+from typing import Any, Dict, Hashable, Optional
+
+from fastapi_users.db import SQLAlchemyUserDatabase
+from sqlalchemy.orm import make_transient_to_detached
+
+from config import settings
+from core.cache import TTLCache
+from models.user_models import User
+from services.change_feed import record_event
+
+# Authenticated-user resolution cache.
+# Every authenticated request decodes its JWT and loads the user named by the
+# token subject through the user database's get(id). CachedUserDatabase serves
+# that lookup from a short-lived cache of the user's column values, so agents
+# reusing a few tokens do not pay a users query per request. Updates and
+# deletions through the /users routes go through the same user database and
+# evict the entry and log a change that evicts it in the other workers too (see
+# services/worker_sync.py); changes made elsewhere show up after USER_CACHE_TTL.
+
+# Project id of change-log rows that belong to no project; no event stream serves them
+NO_PROJECT = ""
+
+
+class UserCache:
+    """Column values of recently resolved users, keyed by user id (the token subject).
+
+    A per-user generation keeps a lookup that raced with an update from caching
+    the values it read before the update.
+    """
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+        self._generations: Dict[Hashable, int] = {}
+
+    def get(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        return self.cache.get(str(user_id))
+
+    def generation(self, user_id: Any) -> int:
+        return self._generations.get(str(user_id), 0)
+
+    def set(self, user_id: Any, values: Dict[str, Any], generation: int) -> None:
+        if self.generation(user_id) == generation:
+            self.cache.set(str(user_id), values)
+
+    def invalidate(self, user_id: Any) -> None:
+        key = str(user_id)
+        self._generations[key] = self._generations.get(key, 0) + 1
+        self.cache.pop(key)
+
+
+user_cache = UserCache(TTLCache("users", settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL))
+
+_COLUMNS = [attribute.key for attribute in User.__mapper__.column_attrs]
+
+
+class CachedUserDatabase(SQLAlchemyUserDatabase):
+    """SQLAlchemyUserDatabase whose get(id) is served from ``user_cache``."""
+
+    async def get(self, id):
+        values = user_cache.get(id)
+        if values is not None:
+            # A detached copy merged without loading: attached to this request's
+            # session like a queried user, but without a round trip
+            user = User(**values)
+            make_transient_to_detached(user)
+            return await self.session.merge(user, load=False)
+
+        generation = user_cache.generation(id)
+        user = await super().get(id)
+        if user is not None:
+            user_cache.set(id, {key: getattr(user, key) for key in _COLUMNS}, generation)
+        return user
+
+    async def update(self, user, *args, **kwargs):
+        user_cache.invalidate(user.id)
+        # Committed by the update itself
+        record_event(self.session, NO_PROJECT, "user.updated", {"user_id": str(user.id)})
+        try:
+            return await super().update(user, *args, **kwargs)
+        finally:
+            user_cache.invalidate(user.id)
+
+    async def delete(self, user):
+        user_cache.invalidate(user.id)
+        record_event(self.session, NO_PROJECT, "user.deleted", {"user_id": str(user.id)})
+        try:
+            await super().delete(user)
+        finally:
+            user_cache.invalidate(user.id)
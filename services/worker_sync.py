@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Sequence, Set
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.database import read_engine
+from models.project_models import ProjectEvent
+from services.archive import forget_project
+from services.change_feed import as_message, event_bus, forward_events
+from services.permission_resolver import permission_resolver
+from services.schedule import schedules
+from services.user_cache import user_cache
+
+# Cache invalidation across workers (WORKERS > 1).
+# Every worker keeps its own caches and event bus. The writes those caches depend
+# on add a ProjectEvent row in their transaction, so the change log doubles as the
+# invalidation log: each worker polls PRAGMA data_version on a connection of its
+# own, which changes whenever another connection commits, then reads the events
+# added since. Events of other workers invalidate what they touch; all events,
+# including this worker's own, go to the local subscribers in commit order.
+# While nothing is written a check is a single PRAGMA that reads no pages, and a
+# worker serves data another worker changed for at most WORKER_SYNC_INTERVAL.
+
+logger = logging.getLogger(__name__)
+
+# Events that change a project's stage or task graph
+SCHEDULE_EVENTS = {
+    "stage.created",
+    "stage.dependency_added",
+    "stage.dependency_removed",
+    "task.created",
+    "tasks.created",
+    "task.dependency_added",
+    "task.dependency_removed",
+}
+
+
+def invalidate(project_id: str, event_type: str, payload: str) -> None:
+    """Drop what this worker cached about a change made by another worker."""
+    if event_type.startswith("user."):
+        user_cache.invalidate(json.loads(payload)["user_id"])
+    elif event_type in ("project.archived", "project.imported"):
+        forget_project(project_id)
+    elif event_type.startswith("member."):
+        permission_resolver.invalidate_project(project_id)
+    elif event_type in SCHEDULE_EVENTS:
+        schedules.invalidate(project_id)
+
+
+class WorkerSync:
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_id = 0
+        self.applied = 0  # events of other workers
+        self._own: Set[int] = set()  # published here, not yet read back
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def forward(self, events: Sequence[ProjectEvent]) -> None:
+        """publish_events() of this worker: remember the ids and read them back now."""
+        # Events read back between their commit and this call were treated as foreign
+        self._own.update(event.id for event in events if event.id > self.last_id)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def apply(self, message: Dict[str, Any]) -> None:
+        if message["id"] in self._own:
+            self._own.discard(message["id"])
+        else:
+            invalidate(message["project_id"], message["type"], message["data"])
+            self.applied += 1
+        event_bus.publish(message)
+
+    async def _read(self, db: AsyncSession) -> None:
+        while True:
+            result = await db.execute(
+                select(ProjectEvent)
+                .where(ProjectEvent.id > self.last_id)
+                .order_by(ProjectEvent.id)
+                .limit(self.batch_size)
+            )
+            events = result.scalars().all()
+            for event in events:
+                self.apply(as_message(event))
+                self.last_id = event.id
+            db.expunge_all()
+            if len(events) < self.batch_size:
+                return
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        forward_events(self.forward)
+        try:
+            while True:
+                try:
+                    await self._watch()
+                except SQLAlchemyError:
+                    logger.exception("Reading the change log of other workers failed")
+                    await asyncio.sleep(self.interval)
+        finally:
+            forward_events(None)
+
+    async def _watch(self) -> None:
+        async with read_engine.connect() as connection:
+            db = AsyncSession(bind=connection)
+            if not self.last_id:
+                self.last_id = (await db.execute(select(ProjectEvent.id).order_by(ProjectEvent.id.desc()).limit(1))).scalar() or 0
+            version = None
+            while True:
+                current = (await connection.exec_driver_sql("PRAGMA data_version")).scalar()
+                # data_version only moves on commits of other connections, which
+                # includes this worker's writer pool
+                if current != version or self._wakeup.is_set():
+                    self._wakeup.clear()
+                    version = current
+                    await self._read(db)
+                await connection.rollback()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"last_event_id": self.last_id, "applied": self.applied, "pending_own": len(self._own)}
+
+
+worker_sync = WorkerSync(settings.WORKER_SYNC_INTERVAL, settings.WORKER_SYNC_BATCH_SIZE)
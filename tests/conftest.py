@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+# Tests run against a scratch database; set before config is imported
+DATA_DIR = tempfile.mkdtemp(prefix="project-api-tests-")
+os.environ["DB_PATH"] = os.path.join(DATA_DIR, "test.db")
+os.environ["ARCHIVE_DB_PATH"] = os.path.join(DATA_DIR, "archive.db")
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from config import settings
+from core.database import async_session, create_schema, engine, read_engine
+from routers import project_router
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def reset_database():
+    await engine.dispose()
+    await read_engine.dispose()
+    for path in (settings.DB_PATH, settings.ARCHIVE_DB_PATH):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    await create_schema()
+
+
+@pytest.fixture
+async def db():
+    """Session on a freshly created database."""
+    await reset_database()
+    async with async_session() as session:
+        yield session
+
+
+@pytest.fixture
+async def client(db):
+    app = FastAPI()
+    app.include_router(project_router.router)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        yield http
+
+
+@pytest.fixture
+def fresh_database():
+    """Start over on an empty database in the middle of a test."""
+    return reset_database
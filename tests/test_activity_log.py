@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from models.project_models import ProjectEvent
+from services.activity_log import ActivityLog, activity_log
+
+pytestmark = pytest.mark.anyio
+
+
+def events(count, project_id="p", payload="{}"):
+    return [ProjectEvent(project_id=project_id, event_type=f"test.{n}", payload=payload) for n in range(count)]
+
+
+async def wait_until(condition, timeout=2.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_close_writes_everything_queued_in_batches(db):
+    log = ActivityLog(queue_size=100, batch_size=3, flush_interval=60)
+    log.record(events(7))
+
+    log.start()
+    await log.close()
+
+    stats = log.stats()
+    assert (stats["queued"], stats["written"], stats["batches"], stats["pending"]) == (7, 7, 3, 0)
+
+
+async def test_full_batch_is_written_without_waiting_for_the_interval(db):
+    log = ActivityLog(queue_size=100, batch_size=3, flush_interval=60)
+    log.start()
+    try:
+        log.record(events(4))
+        await wait_until(lambda: log.written == 3)
+        assert log.batches == 1
+    finally:
+        await log.close()
+    assert log.written == 4
+
+
+async def test_close_does_not_wait_for_the_flush_interval(db):
+    log = ActivityLog(queue_size=100, batch_size=10, flush_interval=60)
+    log.start()
+    log.record(events(1))
+    # The writer has the entry and waits for more
+    await asyncio.sleep(0.05)
+
+    await asyncio.wait_for(log.close(), 1)
+
+    assert (log.written, log.batches) == (1, 1)
+
+
+async def test_partial_batch_is_written_after_the_interval(db):
+    log = ActivityLog(queue_size=100, batch_size=100, flush_interval=0.05)
+    log.start()
+    try:
+        log.record(events(2))
+        await wait_until(lambda: log.written == 2)
+        assert log.batches == 1
+    finally:
+        await log.close()
+
+
+async def test_entries_beyond_the_queue_size_are_dropped(db):
+    log = ActivityLog(queue_size=3, batch_size=10, flush_interval=60)
+
+    log.record(events(2))
+    log.record(events(3))
+
+    stats = log.stats()
+    assert (stats["queued"], stats["dropped"], stats["pending"]) == (3, 2, 3)
+    assert stats["record_avg_us"] > 0
+    log.start()
+    await log.close()
+    assert (log.written, log.dropped) == (3, 2)
+
+
+async def test_failed_batch_is_counted_and_the_writer_goes_on(db):
+    log = ActivityLog(queue_size=100, batch_size=2, flush_interval=60)
+    # details is NOT NULL
+    log.record(events(2, payload=None))
+    log.record(events(1))
+
+    log.start()
+    await log.close()
+
+    assert (log.failed, log.written, log.batches) == (2, 1, 1)
+
+
+async def test_published_changes_appear_in_the_project_activity(client, monkeypatch):
+    # Entries queued by earlier tests are not part of this database
+    monkeypatch.setattr(activity_log, "queue", asyncio.Queue(100))
+    project_id = (await client.post("/api/projects", json={"name": "Audited"})).json()["id"]
+    task_id = (await client.post(f"/api/projects/{project_id}/tasks", json={"name": "Task"})).json()["id"]
+    assert (await client.get(f"/api/projects/{project_id}/activity")).json() == []
+
+    activity_log.start()
+    await activity_log.close()
+    entries = (await client.get(f"/api/projects/{project_id}/activity")).json()
+
+    assert [entry["action"] for entry in entries] == ["project.created", "task.created"]
+    assert entries[1]["details"]["task_id"] == task_id
+    # Only the project route authenticates
+    assert entries[0]["actor_id"] is not None
+    assert entries[1]["actor_id"] is None
+    assert entries[0]["details"] == {"name": "Audited"}
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from config import settings
+from models.project_models import Project
+from services.archive import archive_stale_projects
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_project(client, name, tasks=0):
+    project_id = (await client.post("/api/projects", json={"name": name})).json()["id"]
+    await client.post(f"/api/projects/{project_id}/stages", json={"name": "Build"})
+    for n in range(tasks):
+        await client.post(f"/api/projects/{project_id}/tasks", json={
+            "name": f"{name} task {n}",
+            "assignees": [{"assignee_id": "agent-1", "assignee_type": "AGENT", "role": "worker"}],
+        })
+    return project_id
+
+
+async def list_projects(client, **params):
+    names, cursor = [], None
+    while True:
+        response = await client.get("/api/projects", params={**params, "pageSize": 2, **({"cursor": cursor} if cursor else {})})
+        names += [project["name"] for project in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return names
+
+
+async def test_archive_moves_the_project_out_of_the_live_tables(client):
+    project_id = await create_project(client, "Old", tasks=2)
+
+    response = await client.post(f"/api/projects/{project_id}/archive")
+
+    assert response.status_code == 200
+    assert response.json() == {"project_id": project_id, "stages": 1, "tasks": 2, "assignees": 2, "members": 0}
+    assert (await client.get(f"/api/projects/{project_id}/tasks")).json() == []
+    archived = (await client.get(f"/api/projects/{project_id}/tasks", params={"include_archived": True})).json()
+    assert sorted(task["name"] for task in archived) == ["Old task 0", "Old task 1"]
+    assert len(archived[0]["assignees"]) == 1
+    stages = (await client.get(f"/api/projects/{project_id}/stages", params={"include_archived": True})).json()
+    assert [stage["name"] for stage in stages] == ["Build"]
+    assert (await client.get("/api/search", params={"q": "task"})).json() == []
+
+
+async def test_archiving_twice_or_an_unknown_project_fails(client):
+    project_id = await create_project(client, "Old")
+    await client.post(f"/api/projects/{project_id}/archive")
+
+    assert (await client.post(f"/api/projects/{project_id}/archive")).status_code == 409
+    assert (await client.post("/api/projects/missing/archive")).status_code == 404
+
+
+async def test_include_archived_pages_over_live_and_archived_projects(client):
+    names = [f"Project {n}" for n in range(5)]
+    project_ids = [await create_project(client, name) for name in names]
+    for project_id in project_ids[1::2]:
+        await client.post(f"/api/projects/{project_id}/archive")
+
+    assert sorted(await list_projects(client)) == names[0::2]
+    assert sorted(await list_projects(client, include_archived=True)) == names
+
+
+async def test_periodic_job_archives_stale_finished_projects(client, db, monkeypatch):
+    project_ids = {name: await create_project(client, name) for name in ("stale", "stale too", "recent", "active")}
+    old = datetime.utcnow() - timedelta(days=settings.ARCHIVE_AFTER_DAYS + 1)
+    for name, status, created_at, updated_at in [
+        ("stale", settings.ARCHIVE_PROJECT_STATUS, old - timedelta(days=2), old),
+        ("stale too", settings.ARCHIVE_PROJECT_STATUS, old - timedelta(days=1), old),
+        ("recent", settings.ARCHIVE_PROJECT_STATUS, old, datetime.utcnow()),
+        ("active", "ACTIVE", old, old),
+    ]:
+        await db.execute(
+            update(Project)
+            .where(Project.id == project_ids[name])
+            .values(status=status, created_at=created_at, updated_at=updated_at)
+        )
+    await db.commit()
+    monkeypatch.setattr(settings, "ARCHIVE_SWEEP_BATCH_SIZE", 1)
+
+    # Oldest first, at most ARCHIVE_SWEEP_BATCH_SIZE per run
+    assert await archive_stale_projects() == 1
+    assert sorted(await list_projects(client)) == ["active", "recent", "stale too"]
+    assert await archive_stale_projects() == 1
+    assert await archive_stale_projects() == 0
+    assert sorted(await list_projects(client)) == ["active", "recent"]
+
+
+async def test_export_of_an_archived_project_is_not_imported(client):
+    project_id = await create_project(client, "Old", tasks=1)
+    exported = (await client.get(f"/api/projects/{project_id}/export")).content
+    await client.post(f"/api/projects/{project_id}/archive")
+
+    job = (await client.post("/api/projects/import", content=exported)).json()
+
+    assert job["status"] == "FAILED"
+    assert f"project {project_id} is archived" in job["error"]
+    assert job["lines_committed"] == 0
+    assert await list_projects(client, include_archived=True) == ["Old"]
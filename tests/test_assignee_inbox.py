@@ -0,0 +1,73 @@
+import pytest
+
+from config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+def agent(role="worker"):
+    return {"assignee_id": "agent-1", "assignee_type": "AGENT", "role": role}
+
+
+def user(role="reviewer"):
+    return {"assignee_id": "agent-1", "assignee_type": "USER", "role": role}
+
+
+@pytest.fixture(params=[False, True], ids=["orm", "fast"])
+def fast_serialization(request, monkeypatch):
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", request.param)
+
+
+@pytest.fixture
+async def assigned_tasks(client):
+    project_id = (await client.post("/api/projects", json={"name": "Inbox"})).json()["id"]
+    assignees = [
+        [agent()],
+        [agent(), user()],
+        [agent(), agent("reviewer")],  # listed twice under the same type
+        [user()],
+        [],
+    ]
+    for n, task_assignees in enumerate(assignees):
+        await client.post(f"/api/projects/{project_id}/tasks", json={"name": f"Task {n}", "assignees": task_assignees})
+
+
+async def read_pages(client, params):
+    names, cursor = [], None
+    while True:
+        response = await client.get("/api/assignees/agent-1/tasks", params={**params, "pageSize": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        names += [task["name"] for task in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return names
+
+
+@pytest.mark.parametrize("assignee_type, expected", [
+    (None, {"Task 0", "Task 1", "Task 2", "Task 3"}),
+    ("AGENT", {"Task 0", "Task 1", "Task 2"}),
+    ("USER", {"Task 1", "Task 3"}),
+])
+async def test_every_task_is_listed_once(client, fast_serialization, assigned_tasks, assignee_type, expected):
+    params = {"assignee_type": assignee_type} if assignee_type else {}
+
+    names = await read_pages(client, params)
+
+    assert sorted(names) == sorted(expected)
+
+
+async def test_cursor_pages_match_offset_pages(client, fast_serialization, assigned_tasks):
+    by_cursor = await read_pages(client, {})
+    by_offset = []
+    for page in (1, 2, 3):
+        response = await client.get("/api/assignees/agent-1/tasks", params={"page": page, "pageSize": 2})
+        by_offset += [task["name"] for task in response.json()]
+
+    assert by_cursor == by_offset
+
+
+async def test_tasks_carry_all_their_assignees(client, fast_serialization, assigned_tasks):
+    response = await client.get("/api/assignees/agent-1/tasks", params={"assignee_type": "USER"})
+
+    assignees = {task["name"]: len(task["assignees"]) for task in response.json()}
+    assert assignees == {"Task 1": 2, "Task 3": 1}
@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import select
+
+from models.project_models import Project, Task, TaskAssignee
+from schemas import project_schemas as schemas
+from services.assignee_sync import diff_assignees
+
+pytestmark = pytest.mark.anyio
+
+CLAIM = {"assignee_id": "agent-1", "assignee_type": "AGENT"}
+
+
+def agent(name, role="worker"):
+    return {"assignee_id": name, "assignee_type": "AGENT", "role": role}
+
+
+@pytest.fixture
+async def project_id(db):
+    project = Project(name="Assignees")
+    db.add(project)
+    await db.commit()
+    return project.id
+
+
+async def create_task(client, project_id, assignees):
+    response = await client.post(f"/api/projects/{project_id}/tasks", json={"name": "Work", "assignees": assignees})
+    return response.json()
+
+
+async def task_status(db, task_id):
+    result = await db.execute(select(Task.status).where(Task.id == task_id).execution_options(populate_existing=True))
+    return result.scalar_one()
+
+
+async def test_batch_reports_added_updated_and_removed(client, project_id):
+    first = await create_task(client, project_id, [agent("a"), agent("b"), agent("c")])
+    second = await create_task(client, project_id, [])
+
+    response = await client.put("/api/tasks/assignees:batch", json=[
+        {"task_id": first["id"], "assignees": [agent("a"), agent("b", "reviewer"), agent("d")]},
+        {"task_id": second["id"], "assignees": [agent("a")]},
+    ])
+
+    assert response.status_code == 200
+    assert response.json() == {"tasks": [
+        {"task_id": first["id"], "added": 1, "updated": 1, "removed": 1},
+        {"task_id": second["id"], "added": 1, "updated": 0, "removed": 0},
+    ], "errors": []}
+
+
+async def test_replace_keeps_matching_rows(client, project_id):
+    task = await create_task(client, project_id, [agent("a"), agent("b")])
+    before = {a["assignee_id"]: a for a in task["assignees"]}
+
+    response = await client.put(f"/api/tasks/{task['id']}/assignees", json=[agent("a", "reviewer"), agent("c")])
+
+    after = {a["assignee_id"]: a for a in response.json()}
+    assert set(after) == {"a", "c"}
+    assert after["a"]["id"] == before["a"]["id"]
+    assert after["a"]["created_at"] == before["a"]["created_at"]
+    assert after["a"]["role"] == "reviewer"
+
+
+async def test_replace_keeps_the_lease_of_a_kept_worker(client, db, project_id):
+    await create_task(client, project_id, [])
+    claimed = (await client.post(f"/api/projects/{project_id}/tasks:claim", json=CLAIM)).json()
+    lease = claimed["assignees"][0]
+
+    response = await client.put(f"/api/tasks/{claimed['id']}/assignees", json=[agent("agent-1"), agent("b", "reviewer")])
+
+    kept = next(a for a in response.json() if a["assignee_id"] == "agent-1")
+    assert (kept["id"], kept["lease_expires_at"]) == (lease["id"], lease["lease_expires_at"])
+    assert await task_status(db, claimed["id"]) == "IN_PROGRESS"
+
+
+async def test_removing_the_lease_holder_requeues_the_task(client, db, project_id):
+    await create_task(client, project_id, [])
+    claimed = (await client.post(f"/api/projects/{project_id}/tasks:claim", json=CLAIM)).json()
+
+    response = await client.put(f"/api/tasks/{claimed['id']}/assignees", json=[])
+
+    assert response.json() == []
+    assert await task_status(db, claimed["id"]) == "TODO"
+    # Claimable again
+    reclaimed = await client.post(f"/api/projects/{project_id}/tasks:claim", json={**CLAIM, "assignee_id": "agent-2"})
+    assert reclaimed.json()["id"] == claimed["id"]
+
+
+async def test_removing_the_lease_holder_keeps_a_task_assigned_to_others(client, db, project_id):
+    await create_task(client, project_id, [])
+    claimed = (await client.post(f"/api/projects/{project_id}/tasks:claim", json=CLAIM)).json()
+
+    await client.put(f"/api/tasks/{claimed['id']}/assignees", json=[agent("b")])
+
+    assert await task_status(db, claimed["id"]) == "IN_PROGRESS"
+
+
+async def test_batch_reports_invalid_items_and_applies_the_rest(client, db, project_id):
+    task = await create_task(client, project_id, [agent("a")])
+    other = await create_task(client, project_id, [agent("a")])
+
+    response = await client.put("/api/tasks/assignees:batch", json=[
+        {"task_id": task["id"], "assignees": [agent("b")]},
+        {"task_id": "missing", "assignees": []},
+        {"task_id": task["id"], "assignees": []},
+        {"task_id": other["id"], "assignees": [agent("c"), agent("c", "reviewer")]},
+        {"task_id": other["id"]},
+    ])
+
+    result = response.json()
+    assert [summary["task_id"] for summary in result["tasks"]] == [task["id"]]
+    errors = {error["index"]: (error["errors"][0]["loc"][0], error["errors"][0]["type"]) for error in result["errors"]}
+    assert errors == {
+        1: ("task_id", "value_error.not_found"),
+        2: ("task_id", "value_error.duplicate"),
+        3: ("assignees", "value_error.duplicate"),
+        4: ("assignees", "value_error.missing"),
+    }
+    rows = await db.execute(select(TaskAssignee.assignee_id).where(TaskAssignee.task_id == other["id"]))
+    assert rows.scalars().all() == ["a"]
+
+
+async def test_single_replace_rejects_duplicates_and_unknown_tasks(client, project_id):
+    task = await create_task(client, project_id, [])
+
+    duplicate = await client.put(f"/api/tasks/{task['id']}/assignees", json=[agent("a"), agent("a", "reviewer")])
+    missing = await client.put("/api/tasks/missing/assignees", json=[])
+
+    assert duplicate.status_code == 400
+    assert missing.status_code == 404
+
+
+def test_diff_keeps_the_oldest_of_duplicated_rows():
+    current = [
+        {"id": "old", "assignee_id": "a", "assignee_type": "AGENT", "role": "worker"},
+        {"id": "new", "assignee_id": "a", "assignee_type": "AGENT", "role": "worker"},
+    ]
+
+    added, updated, removed = diff_assignees(current, [schemas.TaskAssigneeCreate(**agent("a"))])
+
+    assert (added, updated, [row["id"] for row in removed]) == ([], [], ["new"])
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+
+from routers import project_router
+from services.change_feed import _LAGGING, EventBus, event_bus, stream_events
+
+pytestmark = pytest.mark.anyio
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def parse_events(text):
+    events = []
+    for block in text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "id" in fields:
+            events.append({"id": int(fields["id"]), "type": fields["event"], "data": json.loads(fields["data"])})
+    return events
+
+
+async def read_stream(path, count, headers=(), query=""):
+    """The first ``count`` events the SSE route sends, then disconnect."""
+    app = FastAPI()
+    app.include_router(project_router.router)
+    chunks, received = [], asyncio.Event()
+
+    async def receive():
+        await received.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message["body"].decode())
+            if len(parse_events("".join(chunks))) >= count:
+                received.set()
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http", "server": ("test", 80),
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+    }
+    await asyncio.wait_for(app(scope, receive, send), 5)
+    return parse_events("".join(chunks))
+
+
+async def add_stages(client, project_id, names):
+    for name in names:
+        response = await client.post(f"/api/projects/{project_id}/stages", json={"name": name})
+        assert response.status_code == 201
+
+
+async def test_stream_replays_events_after_last_event_id(client):
+    project_id = (await client.post("/api/projects", json={"name": "Feed"})).json()["id"]
+    await add_stages(client, project_id, ["Plan", "Build", "Ship"])
+    created, plan, build, ship = await read_stream(f"/api/projects/{project_id}/events", 4, query="lastEventId=0")
+    assert [event["type"] for event in (created, plan, build, ship)] == ["project.created"] + ["stage.created"] * 3
+
+    resumed = await read_stream(f"/api/projects/{project_id}/events", 2, headers=[("Last-Event-ID", str(plan["id"]))])
+
+    assert resumed == [build, ship]
+    assert [event["data"]["name"] for event in resumed] == ["Build", "Ship"]
+
+
+async def test_stream_sends_only_the_projects_events(client):
+    project_id = (await client.post("/api/projects", json={"name": "Feed"})).json()["id"]
+    other_id = (await client.post("/api/projects", json={"name": "Other"})).json()["id"]
+    await add_stages(client, other_id, ["Elsewhere"])
+    await add_stages(client, project_id, ["Plan"])
+
+    events = await read_stream(f"/api/projects/{project_id}/events", 2, query="lastEventId=0")
+
+    assert [event["type"] for event in events] == ["project.created", "stage.created"]
+    assert events[1]["data"]["name"] == "Plan"
+
+
+async def test_lagging_subscriber_catches_up_from_the_change_log(client, monkeypatch):
+    monkeypatch.setattr(event_bus, "queue_size", 2)
+    dropped = event_bus.dropped
+    project_id = (await client.post("/api/projects", json={"name": "Feed"})).json()["id"]
+    stream = stream_events(ConnectedRequest(), project_id, 0)
+    try:
+        # Subscribed and paused after the replayed project.created
+        first = await stream.__anext__()
+        names = [f"Stage {n}" for n in range(5)]
+        await add_stages(client, project_id, names)
+        assert event_bus.dropped > dropped
+
+        events = parse_events(first + "".join([await stream.__anext__() for _ in names]))
+    finally:
+        await stream.aclose()
+
+    assert [event["data"].get("name") for event in events[1:]] == names
+    assert [event["id"] for event in events] == sorted({event["id"] for event in events})
+    assert event_bus.stats()["subscribers"] == 0
+
+
+def test_full_queue_is_replaced_by_a_replay_marker():
+    bus = EventBus(queue_size=2)
+    subscriber = bus.subscribe("p")
+    other = bus.subscribe("q")
+
+    for n in range(4):
+        bus.publish({"id": n, "project_id": "p"})
+
+    assert subscriber.lagging
+    assert subscriber.queue.get_nowait() is _LAGGING
+    assert subscriber.queue.empty()
+    # Two queued and dropped when the third arrived, then the fourth
+    assert subscriber.dropped == bus.dropped == 4
+    assert other.queue.empty() and not other.lagging
+    assert bus.stats() == {"projects": 2, "subscribers": 2, "published": 4, "dropped": 4}
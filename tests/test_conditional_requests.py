@@ -0,0 +1,42 @@
+import pytest
+
+from core.http_cache import collection_versions, response_cache
+from models.project_models import Project
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def project_id(db):
+    project = Project(name="Cached")
+    db.add(project)
+    await db.commit()
+    return project.id
+
+
+async def test_unchanged_collection_answers_304(client, project_id):
+    first = await client.get(f"/api/projects/{project_id}/stages")
+    etag = first.headers["etag"]
+
+    again = await client.get(f"/api/projects/{project_id}/stages", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+
+async def test_etag_does_not_depend_on_process_state(client, project_id):
+    etag = (await client.get(f"/api/projects/{project_id}/stages")).headers["etag"]
+    # Another worker, or this one after a restart, has an empty response cache
+    response_cache.clear()
+
+    response = await client.get(f"/api/projects/{project_id}/stages", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+async def test_write_in_another_process_changes_the_etag(client, db, project_id):
+    etag = (await client.get(f"/api/projects/{project_id}/stages")).headers["etag"]
+    # What a stage write on any worker commits along with the stage
+    await collection_versions.bump(db, ("stages", project_id))
+    await db.commit()
+
+    response = await client.get(f"/api/projects/{project_id}/stages", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
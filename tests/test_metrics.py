@@ -0,0 +1,101 @@
+import re
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from config import settings
+from core.metrics import RequestMetricsMiddleware
+from routers import metrics_router, project_router
+
+pytestmark = pytest.mark.anyio
+
+ROUTE = 'method="GET",route="/api/projects/{project_id}/tasks"'
+
+
+@pytest.fixture
+async def metrics_client(db):
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+    app.include_router(project_router.router)
+    app.include_router(metrics_router.router)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        yield http
+
+
+async def create_project(client, tasks):
+    project_id = (await client.post("/api/projects", json={"name": "Metrics"})).json()["id"]
+    for n in range(tasks):
+        await client.post(f"/api/projects/{project_id}/tasks", json={
+            "name": f"Task {n}",
+            "assignees": [{"assignee_id": "agent-1", "assignee_type": "AGENT", "role": "worker"}],
+        })
+    return project_id
+
+
+def server_timing(response):
+    """Metric name -> (duration, description) of the Server-Timing header."""
+    timings = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, *params = entry.split(";")
+        values = dict(param.split("=", 1) for param in params)
+        timings[name] = (float(values["dur"]), values.get("desc", "").strip('"'))
+    return timings
+
+
+async def test_server_timing_splits_the_request(metrics_client):
+    project_id = await create_project(metrics_client, tasks=3)
+
+    response = await metrics_client.get(f"/api/projects/{project_id}/tasks")
+
+    timings = server_timing(response)
+    assert list(timings) == ["db", "orm", "deps", "serialize", "total"]
+    # The tasks and their assignees (selectinload)
+    assert timings["db"][1] == "2 queries"
+    assert timings["db"][0] > 0
+    assert timings["orm"][0] > 0
+    parts = sum(timings[name][0] for name in ("db", "orm", "deps", "serialize"))
+    # Rounded to hundredths of a millisecond each
+    assert parts <= timings["total"][0] + 0.05
+
+
+async def test_server_timing_can_be_turned_off(metrics_client, monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_TIMING", False)
+
+    response = await metrics_client.get("/api/projects")
+
+    assert "server-timing" not in response.headers
+
+
+async def test_metrics_aggregates_requests_by_route(metrics_client):
+    project_id = await create_project(metrics_client, tasks=1)
+
+    before = (await metrics_client.get("/metrics")).text
+    for _ in range(2):
+        await metrics_client.get(f"/api/projects/{project_id}/tasks")
+    await metrics_client.get("/api/projects/missing/tasks/missing")
+    response = await metrics_client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    def value(text, series):
+        match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+        return float(match.group(1)) if match else 0.0
+
+    requests = f'http_requests_total{{{ROUTE},status="200"}}'
+    assert value(text, requests) - value(before, requests) == 2
+    for histogram in (
+        "http_request_duration_seconds", "http_request_sql_duration_seconds", "http_request_sql_queries",
+        "http_request_orm_seconds", "http_request_serialization_seconds", "http_request_dependencies_seconds",
+    ):
+        assert f"# TYPE {histogram} histogram" in text
+        count = f"{histogram}_count{{{ROUTE}}}"
+        assert value(text, count) - value(before, count) == 2
+        assert value(text, f'{histogram}_bucket{{{ROUTE},le="+Inf"}}') == value(text, count)
+    # Two statements per listing
+    sql_queries = f"http_request_sql_queries_sum{{{ROUTE}}}"
+    assert value(text, sql_queries) - value(before, sql_queries) == 4
+    assert value(text, f'http_requests_total{{method="GET",route="unmatched",status="404"}}') >= 1
+    assert "# TYPE cache_hits_total counter" in text
+    assert re.search(r'^cache_size\{cache="\w+"\} \d+$', text, re.MULTILINE)
@@ -0,0 +1,47 @@
+import pytest
+
+from config import settings
+from models.project_models import Project
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def project_id(db):
+    project = Project(name="Paged")
+    db.add(project)
+    await db.commit()
+    return project.id
+
+
+LIST_PATHS = [
+    "/api/projects",
+    "/api/projects/{project_id}/stages",
+    "/api/projects/{project_id}/tasks",
+    "/api/projects/{project_id}/members",
+    "/api/projects/{project_id}/activity",
+    "/api/permissions",
+]
+
+
+@pytest.mark.parametrize("path", LIST_PATHS)
+@pytest.mark.parametrize("params", [
+    {"pageSize": 0},
+    {"pageSize": -1},
+    {"pageSize": settings.MAX_PAGE_SIZE + 1},
+    {"page": 0},
+])
+async def test_out_of_range_page_parameters_are_rejected(client, project_id, path, params):
+    response = await client.get(path.format(project_id=project_id), params=params)
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("path", LIST_PATHS)
+async def test_largest_page_size_is_accepted(client, project_id, path):
+    response = await client.get(path.format(project_id=project_id), params={"pageSize": settings.MAX_PAGE_SIZE})
+    assert response.status_code == 200
+
+
+async def test_search_page_size_is_bounded(client):
+    response = await client.get("/api/search", params={"q": "x", "pageSize": 0})
+    assert response.status_code == 422
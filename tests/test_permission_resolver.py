@@ -0,0 +1,76 @@
+import pytest
+
+from models.project_models import Project, ProjectMember, ProjectMemberPermission, ProjectPermission
+from models.user_models import User
+from services.permission_resolver import permission_resolver
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def resolver():
+    # Entries of earlier tests' databases would answer for this one
+    permission_resolver.cache.pop_where(lambda key: True)
+    return permission_resolver
+
+
+@pytest.fixture
+async def member(db):
+    project = Project(name="Permissions")
+    user = User(id="user-1", username="user-1", email="user-1@example.com", hashed_password="x")
+    permissions = [ProjectPermission(name="task_create"), ProjectPermission(name="task_update")]
+    db.add_all([project, user, *permissions])
+    await db.flush()
+    member = ProjectMember(project_id=project.id, member_id=user.id, member_type="USER", role="developer")
+    member.permissions = [ProjectMemberPermission(permission_id=permissions[0].id)]
+    db.add(member)
+    await db.commit()
+    return {"project_id": project.id, "member_id": user.id, "row_id": member.id, "update_id": permissions[1].id}
+
+
+async def grant_update(db, member):
+    db.add(ProjectMemberPermission(member_id=member["row_id"], permission_id=member["update_id"]))
+    await db.commit()
+
+
+async def test_resolved_permissions_are_cached_until_invalidated(db, resolver, member):
+    key = (member["project_id"], member["member_id"])
+    assert await resolver.resolve(db, *key) == {"task_create"}
+
+    await grant_update(db, member)
+    assert await resolver.resolve(db, *key) == {"task_create"}
+
+    resolver.invalidate(*key)
+    assert await resolver.resolve(db, *key) == {"task_create", "task_update"}
+
+
+async def test_invalidate_project_drops_every_member(db, resolver, member):
+    key = (member["project_id"], member["member_id"])
+    await resolver.resolve(db, *key)
+    await grant_update(db, member)
+
+    resolver.invalidate_project(member["project_id"])
+
+    assert await resolver.has_permission(db, *key, "task_update")
+
+
+@pytest.mark.parametrize("invalidate", ["member", "project"])
+async def test_lookup_overlapping_an_invalidation_is_not_cached(db, resolver, member, invalidate):
+    key = (member["project_id"], member["member_id"])
+    execute = db.execute
+
+    async def execute_then_change(statement, *args, **kwargs):
+        # The lookup has read the old permissions when a change commits and invalidates
+        result = await execute(statement, *args, **kwargs)
+        db.execute = execute
+        await grant_update(db, member)
+        if invalidate == "member":
+            resolver.invalidate(*key)
+        else:
+            resolver.invalidate_project(member["project_id"])
+        return result
+
+    db.execute = execute_then_change
+    assert await resolver.resolve(db, *key) == {"task_create"}
+
+    assert await resolver.resolve(db, *key) == {"task_create", "task_update"}
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from config import settings
+from models.user_models import User
+from services.project_export import export_project
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def project_id(client, db):
+    db.add(User(id="user-1", username="user-1", email="user-1@example.com", hashed_password="x"))
+    await db.commit()
+    project_id = (await client.post("/api/projects", json={"name": "Exported"})).json()["id"]
+    used = (await client.post("/api/permissions", json={"name": "deploy"})).json()["id"]
+    await client.post("/api/permissions", json={"name": "unused"})
+    stage_id = (await client.post(f"/api/projects/{project_id}/stages", json={"name": "Build"})).json()["id"]
+    await client.post(f"/api/projects/{project_id}/members", json={
+        "member_id": "user-1", "member_type": "USER", "role": "worker", "permissions": [{"permission_id": used}],
+    })
+    for n in range(5):
+        await client.post(f"/api/projects/{project_id}/tasks", json={
+            "name": f"Task {n}",
+            "stage_id": stage_id,
+            "assignees": [{"assignee_id": f"agent-{m}", "assignee_type": "AGENT", "role": "worker"} for m in range(n % 3)],
+        })
+    other_id = (await client.post("/api/projects", json={"name": "Other"})).json()["id"]
+    await client.post(f"/api/projects/{other_id}/tasks", json={"name": "Not exported"})
+    return project_id
+
+
+def parse(content):
+    return [json.loads(line) for line in content.decode().splitlines()]
+
+
+async def test_export_writes_parents_before_children(client, project_id):
+    response = await client.get(f"/api/projects/{project_id}/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == f'attachment; filename="project-{project_id}.ndjson"'
+    records = parse(response.content)
+    assert [record["type"] for record in records] == ["project", "permission", "stage", "member"] + ["task"] * 5
+    assert [record["data"]["name"] for record in records[:3]] == ["Exported", "deploy", "Build"]
+
+
+async def test_records_have_the_shape_of_the_responses(client, project_id):
+    records = parse((await client.get(f"/api/projects/{project_id}/export")).content)
+    by_type = {}
+    for record in records:
+        by_type.setdefault(record["type"], []).append(record["data"])
+
+    projects = (await client.get("/api/projects")).json()
+    assert by_type["project"] == [project for project in projects if project["id"] == project_id]
+    assert by_type["stage"] == (await client.get(f"/api/projects/{project_id}/stages")).json()
+    assert by_type["member"] == (await client.get(f"/api/projects/{project_id}/members")).json()
+    tasks = (await client.get(f"/api/projects/{project_id}/tasks")).json()
+    key = lambda task: task["name"]
+    assert sorted(by_type["task"], key=key) == sorted(tasks, key=key)
+    assert all(len(task["assignees"]) == int(task["name"][-1]) % 3 for task in by_type["task"])
+
+
+async def test_tasks_are_streamed_in_chunks(project_id, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 2)
+
+    chunks = [chunk async for chunk in export_project(project_id)]
+
+    task_chunks = [parse(chunk) for chunk in chunks if b'"type": "task"' in chunk]
+    assert [len(chunk) for chunk in task_chunks] == [2, 2, 1]
+    tasks = [task["data"] for chunk in task_chunks for task in chunk]
+    assert sorted(task["name"] for task in tasks) == [f"Task {n}" for n in range(5)]
+    # Each chunk carries the assignees of its own tasks
+    assert all(len(task["assignees"]) == int(task["name"][-1]) % 3 for task in tasks)
+
+
+async def test_unknown_project_is_not_found(client):
+    assert (await client.get("/api/projects/missing/export")).status_code == 404
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from models.user_models import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_member_user(db):
+    # Users are not part of an export; members need theirs in the target database
+    db.add(User(id="user-1", username="user-1", email="user-1@example.com", hashed_password="x"))
+    await db.commit()
+
+
+@pytest.fixture
+async def project_id(client, db):
+    await add_member_user(db)
+    project_id = (await client.post("/api/projects", json={"name": "Exported", "description": "Round trip"})).json()["id"]
+    permission_id = (await client.post("/api/permissions", json={"name": "deploy"})).json()["id"]
+    stage_id = (await client.post(f"/api/projects/{project_id}/stages", json={"name": "Build"})).json()["id"]
+    await client.post(f"/api/projects/{project_id}/members", json={
+        "member_id": "user-1", "member_type": "USER", "role": "worker",
+        "permissions": [{"permission_id": permission_id}],
+    })
+    for n in range(5):
+        await client.post(f"/api/projects/{project_id}/tasks", json={
+            "name": f"Task {n}",
+            "priority": n + 1,
+            "stage_id": stage_id if n % 2 else None,
+            "assignees": [{"assignee_id": "agent-1", "assignee_type": "AGENT", "role": "worker"}],
+        })
+    return project_id
+
+
+async def export(client, project_id):
+    response = await client.get(f"/api/projects/{project_id}/export")
+    assert response.status_code == 200
+    return response.content
+
+
+async def import_file(client, content, **params):
+    response = await client.post("/api/projects/import", content=content, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_export_imports_into_an_empty_database(client, db, fresh_database, project_id):
+    exported = await export(client, project_id)
+    summary = (await client.get(f"/api/projects/{project_id}/summary")).json()
+    await fresh_database()
+    await add_member_user(db)
+
+    job = await import_file(client, exported, chunkSize=3)
+
+    lines = exported.splitlines()
+    assert (job["status"], job["lines_committed"], job["records_committed"]) == ("COMPLETED", len(lines), len(lines))
+    assert await export(client, project_id) == exported
+    # The rollup counters are rebuilt from the imported rows
+    assert (await client.get(f"/api/projects/{project_id}/summary")).json() == summary
+
+
+async def test_failed_import_resumes_after_the_committed_lines(client, db, fresh_database, project_id):
+    lines = (await export(client, project_id)).splitlines()
+    await fresh_database()
+    await add_member_user(db)
+    broken = lines[:]
+    broken[5] = b'{"type": "task", "data": '
+
+    job = await import_file(client, b"\n".join(broken), chunkSize=2)
+
+    assert job["status"] == "FAILED"
+    assert job["error"].startswith("line 6: ")
+    assert job["lines_committed"] == 5
+    assert (await client.get(f"/api/projects/import/{job['id']}")).json() == job
+
+    job = await import_file(client, b"\n".join(lines), chunkSize=2, job_id=job["id"])
+
+    assert (job["status"], job["error"], job["lines_committed"], job["records_committed"]) == (
+        "COMPLETED", None, len(lines), len(lines)
+    )
+    tasks = (await client.get(f"/api/projects/{project_id}/tasks", params={"pageSize": 100})).json()
+    assert sorted(task["name"] for task in tasks) == [f"Task {n}" for n in range(5)]
+
+
+async def test_unknown_record_types_fail_the_import(client, db, fresh_database, project_id):
+    lines = (await export(client, project_id)).splitlines()
+    await fresh_database()
+    await add_member_user(db)
+    lines.insert(1, json.dumps({"type": "comment", "data": {}}).encode())
+
+    job = await import_file(client, b"\n".join(lines))
+
+    assert (job["status"], job["lines_committed"]) == ("FAILED", 1)
+    assert "unknown record type 'comment'" in job["error"]
+
+
+async def test_completed_job_is_not_run_again(client, db, fresh_database, project_id):
+    exported = await export(client, project_id)
+    await fresh_database()
+    await add_member_user(db)
+    job = await import_file(client, exported)
+
+    again = await import_file(client, exported, job_id=job["id"])
+
+    assert again == job
+
+
+async def test_unknown_job_is_not_found(client):
+    assert (await client.get("/api/projects/import/missing")).status_code == 404
+    assert (await client.post("/api/projects/import", content=b"", params={"job_id": "missing"})).status_code == 404
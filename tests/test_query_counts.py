@@ -0,0 +1,65 @@
+import pytest
+
+from config import settings
+from core.database import read_engine
+from core.query_counter import QueryCounter
+from models.project_models import (
+    Project,
+    Task,
+    TaskAssignee,
+    ProjectMember,
+    ProjectMemberPermission,
+    ProjectPermission
+)
+from models.user_models import User
+
+pytestmark = pytest.mark.anyio
+
+MANY = 25
+
+
+@pytest.fixture(params=[False, True], ids=["orm", "fast"])
+def fast_serialization(request, monkeypatch):
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", request.param)
+
+
+async def seed_project(db, items: int, permissions) -> str:
+    """A project with ``items`` tasks and members, each with two assignees or permissions."""
+    project = Project(name=f"{items} items")
+    db.add(project)
+    await db.flush()
+    for i in range(items):
+        task = Task(project_id=project.id, name=f"Task {i}")
+        task.assignees = [
+            TaskAssignee(assignee_id=f"agent-{i}-{n}", assignee_type="AGENT", role="worker") for n in range(2)
+        ]
+        user = User(username=f"{project.id}-{i}", email=f"{project.id}-{i}@example.com", hashed_password="x")
+        db.add_all([task, user])
+        await db.flush()
+        member = ProjectMember(project_id=project.id, member_id=user.id, member_type="USER", role="member")
+        member.permissions = [ProjectMemberPermission(permission_id=permission.id) for permission in permissions]
+        db.add(member)
+    await db.commit()
+    return project.id
+
+
+async def count_queries(client, path: str) -> int:
+    with QueryCounter(read_engine) as counter:
+        response = await client.get(path)
+    assert response.status_code == 200
+    return counter.count
+
+
+@pytest.mark.parametrize("collection", ["tasks", "members"])
+async def test_list_queries_do_not_grow_with_rows(client, db, fast_serialization, collection):
+    permissions = [ProjectPermission(name="task_create"), ProjectPermission(name="task_update")]
+    db.add_all(permissions)
+    await db.flush()
+    one = await seed_project(db, 1, permissions)
+    many = await seed_project(db, MANY, permissions)
+
+    queries_one = await count_queries(client, f"/api/projects/{one}/{collection}")
+    queries_many = await count_queries(client, f"/api/projects/{many}/{collection}")
+
+    # Children are loaded with one IN query per page, never one query per row
+    assert queries_many == queries_one
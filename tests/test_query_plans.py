@@ -0,0 +1,72 @@
+import pytest
+
+from benchmarks.load import uncovered_routes
+from benchmarks.query_plans import full_scans, record_plans, scenario_names
+from conftest import reset_database
+
+pytestmark = pytest.mark.anyio
+
+NAMES = scenario_names()
+
+# Index each hot route must be served by
+EXPECTED_INDEXES = [
+    ("GET /api/projects?cursor", "idx_projects_created"),
+    ("GET /api/projects?status", "idx_projects_status"),
+    ("GET /api/projects/{project_id}/stages?cursor", "idx_stages_project"),
+    ("GET /api/projects/{project_id}/tasks?cursor", "idx_tasks_project"),
+    ("GET /api/projects/{project_id}/tasks?cursor (fast)", "idx_tasks_project"),
+    ("GET /api/projects/{project_id}/tasks", "idx_task_assignees_task"),
+    ("GET /api/tasks/{task_id}/assignees?cursor", "idx_task_assignees_task"),
+    ("GET /api/projects/{project_id}/members?cursor", "idx_members_project"),
+    ("GET /api/projects/{project_id}/members", "idx_member_permissions_member"),
+    ("GET /api/permissions?cursor", "idx_permissions_created"),
+    ("GET /api/members/{member_id}/permissions?cursor", "idx_member_permissions_member"),
+    ("GET /api/assignees/{assignee_id}/tasks?cursor", "idx_task_assignees_inbox"),
+    ("GET /api/assignees/{assignee_id}/tasks?assignee_type&cursor", "idx_task_assignees_inbox"),
+    ("GET /api/projects/{project_id}/effective-permissions/{member_id}", "idx_members_member"),
+    ("GET /api/projects/{project_id}/activity?cursor", "idx_activity_log_project"),
+    ("GET /api/projects/{project_id}/schedule", "idx_stage_dependencies_project"),
+    ("GET /api/projects/{project_id}/schedule", "idx_task_dependencies_project"),
+    ("POST /api/projects/{project_id}/tasks:claim", "idx_tasks_claim"),
+    ("event replay", "idx_project_events_project"),
+    ("lease sweep", "idx_task_assignees_lease"),
+    ("archive sweep", "idx_projects_status"),
+]
+
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="module")
+async def plans(anyio_backend):
+    await reset_database()
+    return await record_plans()
+
+
+def test_every_route_has_a_scenario():
+    assert uncovered_routes() == []
+
+
+@pytest.mark.parametrize("name", NAMES)
+async def test_route_does_not_scan_a_table(plans, name):
+    for statement, plan in plans[name]:
+        assert not full_scans(plan), f"{name} scans a whole table: {statement}\n{plan}"
+
+
+@pytest.mark.parametrize("name, index", EXPECTED_INDEXES)
+async def test_hot_route_uses_its_index(plans, name, index):
+    details = [detail for _, plan in plans[name] for detail in plan]
+    assert any(f"INDEX {index} " in detail for detail in details), f"{name} does not use {index}: {details}"
+
+
+@pytest.mark.parametrize("name", [name for name in NAMES if name.startswith("GET /api/assignees/")])
+async def test_assignee_inbox_reads_its_page_in_index_order(plans, name):
+    # Sorting every assignment of the assignee would make each page cost O(assignments);
+    # the assignees of the page's tasks are few and may be sorted
+    pages = [(statement, plan) for statement, plan in plans[name] if any("idx_task_assignees_inbox" in detail for detail in plan)]
+    assert pages, f"{name} does not read idx_task_assignees_inbox"
+    for statement, plan in pages:
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan, f"{name} sorts all rows: {statement}\n{plan}"
+        assert not any("FOR GROUP BY" in detail for detail in plan), f"{name} sorts all rows: {statement}\n{plan}"
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from config import settings
+from core.database import engine, get_read_db, read_engine
+from core.query_counter import QueryCounter
+from models.project_models import Project
+
+pytestmark = pytest.mark.anyio
+
+
+async def read_session():
+    sessions = get_read_db()
+    return await sessions.__anext__(), sessions
+
+
+async def test_write_through_the_reader_pool_fails(db):
+    session, sessions = await read_session()
+    try:
+        with pytest.raises(OperationalError, match="readonly|read-only"):
+            await session.execute(insert(Project).values(id="p", name="Written by a reader"))
+            await session.commit()
+        await session.rollback()
+    finally:
+        await sessions.aclose()
+
+    assert (await db.execute(select(func.count()).select_from(Project))).scalar_one() == 0
+
+
+async def test_reader_sees_committed_writes(client):
+    project_id = (await client.post("/api/projects", json={"name": "Visible"})).json()["id"]
+
+    session, sessions = await read_session()
+    try:
+        name = (await session.execute(select(Project.name).where(Project.id == project_id))).scalar_one()
+    finally:
+        await sessions.aclose()
+
+    assert name == "Visible"
+
+
+async def test_get_routes_read_from_the_reader_pool(client):
+    project_id = (await client.post("/api/projects", json={"name": "Routed"})).json()["id"]
+
+    with QueryCounter(engine) as writer, QueryCounter(read_engine) as reader:
+        for path in ("/api/projects", f"/api/projects/{project_id}/tasks", f"/api/projects/{project_id}/summary"):
+            assert (await client.get(path)).status_code == 200
+
+    assert writer.count == 0
+    assert reader.count >= 3
+
+
+async def test_reader_does_not_create_the_archive_database(db):
+    await read_engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(settings.ARCHIVE_DB_PATH + suffix):
+            os.remove(settings.ARCHIVE_DB_PATH + suffix)
+
+    session, sessions = await read_session()
+    try:
+        # Opened read-only like the main database, so only the writer creates it
+        with pytest.raises(OperationalError, match="unable to open"):
+            await session.execute(select(Project.id))
+    finally:
+        await sessions.aclose()
+        await read_engine.dispose()
+
+    assert not os.path.exists(settings.ARCHIVE_DB_PATH)
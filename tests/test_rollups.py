@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from core.database import async_session
+from models.project_models import TaskAssignee
+from models.user_models import User
+from services.rollups import load_summaries, rebuild
+from services.task_leases import sweep_expired_leases
+
+pytestmark = pytest.mark.anyio
+
+AGENT = {"assignee_id": "agent-1", "assignee_type": "AGENT", "role": "worker"}
+USER = {"assignee_id": "user-1", "assignee_type": "USER", "role": "reviewer"}
+
+
+async def recount(project_id):
+    """The summary the counters would hold if rebuilt from the source tables."""
+    async with async_session() as session:
+        async with session.begin():
+            await rebuild(session, [project_id])
+            summary = (await load_summaries(session, [project_id]))[0]
+            await session.rollback()
+    return summary.dict()
+
+
+async def assert_counters_match_recount(client, project_id):
+    summary = (await client.get(f"/api/projects/{project_id}/summary")).json()
+    assert summary == await recount(project_id)
+    return summary
+
+
+@pytest.fixture
+async def project(client, db):
+    db.add(User(id="user-1", username="user-1", email="user-1@example.com", hashed_password="x"))
+    await db.commit()
+    project_id = (await client.post("/api/projects", json={"name": "Rollups"})).json()["id"]
+    stage_id = (await client.post(f"/api/projects/{project_id}/stages", json={"name": "Build"})).json()["id"]
+    return {"id": project_id, "stage_id": stage_id}
+
+
+async def test_counters_follow_task_writes(client, project):
+    project_id, stage_id = project["id"], project["stage_id"]
+    assert (await assert_counters_match_recount(client, project_id))["tasks"] == 0
+
+    task = (await client.post(f"/api/projects/{project_id}/tasks", json={
+        "name": "Single", "priority": 3, "stage_id": stage_id, "assignees": [AGENT, USER],
+    })).json()
+    await assert_counters_match_recount(client, project_id)
+
+    response = await client.post(f"/api/projects/{project_id}/tasks:batch", json=[
+        {"name": "Batch 0", "assignees": [AGENT]},
+        {"name": "Batch 1", "priority": 5, "stage_id": stage_id},
+        {"name": ""},
+    ])
+    assert len(response.json()["created"]) == 2
+    await assert_counters_match_recount(client, project_id)
+
+    await client.patch("/api/tasks:batch", json=[
+        {"id": task["id"], "status": "DONE", "priority": None},
+        {"id": response.json()["created"][0], "stage_id": stage_id, "priority": 1},
+    ])
+    summary = await assert_counters_match_recount(client, project_id)
+    assert summary["tasks"] == 3
+    assert summary["by_status"] == {"TODO": 2, "DONE": 1}
+    assert summary["stages"][0]["done"] == 1
+
+
+async def test_counters_follow_assignee_and_member_writes(client, project):
+    project_id = project["id"]
+    task = (await client.post(f"/api/projects/{project_id}/tasks", json={"name": "Task", "assignees": [AGENT]})).json()
+    assignee_id = task["assignees"][0]["id"]
+
+    added = (await client.post(f"/api/tasks/{task['id']}/assignees", json=USER)).json()
+    await assert_counters_match_recount(client, project_id)
+
+    await client.put(f"/api/tasks/{task['id']}/assignees/{assignee_id}", json={**USER, "assignee_id": "user-2"})
+    assert (await assert_counters_match_recount(client, project_id))["assignees_by_type"] == {"USER": 2}
+
+    assert (await client.delete(f"/api/tasks/{task['id']}/assignees/{added['id']}")).status_code == 204
+    await assert_counters_match_recount(client, project_id)
+
+    await client.put(f"/api/tasks/{task['id']}/assignees", json=[AGENT])
+    assert (await assert_counters_match_recount(client, project_id))["assignees_by_type"] == {"AGENT": 1}
+
+    member = (await client.post(f"/api/projects/{project_id}/members", json={
+        "member_id": "user-1", "member_type": "USER", "role": "developer",
+    })).json()
+    assert (await assert_counters_match_recount(client, project_id))["members"] == 1
+
+    assert (await client.delete(f"/api/projects/{project_id}/members/{member['id']}")).status_code == 204
+    assert (await assert_counters_match_recount(client, project_id))["members"] == 0
+
+
+async def test_counters_follow_claims_and_expired_leases(client, db, project):
+    project_id = project["id"]
+    for n in range(2):
+        await client.post(f"/api/projects/{project_id}/tasks", json={"name": f"Task {n}"})
+
+    await client.post(f"/api/projects/{project_id}/tasks:claim", json={"assignee_id": "agent-1", "assignee_type": "AGENT"})
+    assert (await assert_counters_match_recount(client, project_id))["by_status"] == {"TODO": 1, "IN_PROGRESS": 1}
+
+    await db.execute(update(TaskAssignee).values(lease_expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    await db.commit()
+    async with async_session() as session:
+        async with session.begin():
+            await sweep_expired_leases(session)
+    summary = await assert_counters_match_recount(client, project_id)
+    assert summary["by_status"] == {"TODO": 2}
+    assert summary["assignees_by_type"] == {}
+
+
+async def test_dashboard_summaries_match_recounts(client, project):
+    other_id = (await client.post("/api/projects", json={"name": "Other"})).json()["id"]
+    await client.post(f"/api/projects/{project['id']}/tasks", json={"name": "Task", "assignees": [AGENT]})
+    await client.post(f"/api/projects/{other_id}/tasks", json={"name": "Task", "priority": 2})
+
+    response = await client.get("/api/projects:summary", params={"project_id": [other_id, "missing", project["id"]]})
+
+    assert response.json() == [await recount(other_id), await recount(project["id"])]
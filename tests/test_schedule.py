@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from models.project_models import Project, Stage, StageDependency
+from services.schedule import ScheduleGraph
+
+
+def test_cycle_for_on_a_graph_with_a_cycle():
+    # a and b already depend on each other, e.g. rows written before the cycle check existed
+    graph = ScheduleGraph.build({"a": 1.0, "b": 1.0, "c": 1.0}, [("a", "b"), ("b", "a"), ("b", "c")])
+    assert graph.cycle
+
+    assert graph.cycle_for("c", "a") == ["c", "a", "b", "c"]
+    assert graph.cycle_for("c", "c") == ["c", "c"]
+    assert graph.cycle_for("a", "c") is None
+
+
+def test_add_node_and_edge_on_a_graph_with_a_cycle():
+    graph = ScheduleGraph.build({"a": 1.0, "b": 1.0}, [("a", "b"), ("b", "a")])
+    graph.add_node("c", 1.0)
+    graph.add_edge("c", "a")
+
+    assert graph.cycle_for("a", "c") == ["a", "c", "a"]
+    assert graph.snapshot()["has_cycle"]
+
+
+@pytest.mark.anyio
+async def test_concurrent_dependencies_cannot_close_a_cycle(client, db):
+    project = Project(name="Plan")
+    db.add(project)
+    await db.flush()
+    first, second = Stage(project_id=project.id, name="First"), Stage(project_id=project.id, name="Second")
+    db.add_all([first, second])
+    await db.commit()
+    base = f"/api/projects/{project.id}/stages"
+
+    responses = await asyncio.gather(
+        client.post(f"{base}/{second.id}/dependencies", json={"depends_on_id": first.id}),
+        client.post(f"{base}/{first.id}/dependencies", json={"depends_on_id": second.id}),
+    )
+
+    assert sorted(response.status_code for response in responses) == [201, 409]
+    rows = await db.execute(select(StageDependency).where(StageDependency.project_id == project.id))
+    assert len(rows.all()) == 1
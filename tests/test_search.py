@@ -0,0 +1,110 @@
+import pytest
+from sqlalchemy import delete, func, select, update
+
+from models.project_models import Project, SearchDocument, Task
+from services.search import build_match
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def project_id(client):
+    project_id = (await client.post("/api/projects", json={"name": "Website relaunch"})).json()["id"]
+    for name, description in [
+        ("Deploy the staging server", "Blue green deployment"),
+        ("Write release notes", "Mention the new deployment pipeline"),
+        ("Server migration", "Move the database server"),
+        ("Design review", None),
+    ]:
+        await client.post(f"/api/projects/{project_id}/tasks", json={"name": name, "description": description})
+    return project_id
+
+
+async def titles(client, q, **params):
+    response = await client.get("/api/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return [hit["title"] for hit in response.json()]
+
+
+@pytest.mark.parametrize("q, match", [
+    ("deploy", '"deploy"*'),
+    ("deploy server", '"deploy" "server"*'),
+    ('"release notes"', '"release notes"'),
+    ('"release notes" writ', '"release notes" "writ"*'),
+    ("server OR -x:(", '"server" "OR" "x"*'),
+])
+def test_build_match_quotes_every_term(q, match):
+    assert build_match(q) == match
+
+
+async def test_last_word_matches_as_a_prefix(client, project_id):
+    # "deploy" also finds "deployment" in a description
+    assert await titles(client, "deploy") == ["Deploy the staging server", "Write release notes"]
+    assert await titles(client, "deploy serv") == ["Deploy the staging server"]
+    assert await titles(client, "relea") == ["Write release notes"]
+
+
+async def test_phrase_matches_adjacent_words(client, project_id):
+    assert await titles(client, '"staging server"') == ["Deploy the staging server"]
+    assert await titles(client, '"server staging"') == []
+    # A closing quote turns off the prefix match
+    assert await titles(client, '"relea"') == []
+
+
+async def test_titles_rank_above_descriptions(client, project_id):
+    assert await titles(client, "server", kind="task") == ["Server migration", "Deploy the staging server"]
+
+
+async def test_filters_by_project_and_kind(client, project_id):
+    other_id = (await client.post("/api/projects", json={"name": "Server farm"})).json()["id"]
+    await client.post(f"/api/projects/{other_id}/tasks", json={"name": "Server racks"})
+
+    assert sorted(await titles(client, "server", project_id=other_id)) == ["Server farm", "Server racks"]
+    assert await titles(client, "server", kind="project") == ["Server farm"]
+    assert len(await titles(client, "server")) == 4
+
+
+async def test_cursor_pages_through_every_hit_once(client, project_id):
+    for n in range(5):
+        await client.post(f"/api/projects/{project_id}/tasks", json={"name": f"Server {n}"})
+    expected = await titles(client, "server", pageSize=100)
+
+    pages, cursor = [], None
+    while True:
+        response = await client.get("/api/search", params={"q": "server", "pageSize": 3, **({"cursor": cursor} if cursor else {})})
+        pages.append([hit["title"] for hit in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(expected) == 7
+    assert [title for page in pages for title in page] == expected
+    assert all(len(page) == 3 for page in pages[:-1])
+
+
+@pytest.mark.parametrize("q", ['-:', '""', '"" -:'])
+async def test_query_without_terms_is_rejected(client, q):
+    assert (await client.get("/api/search", params={"q": q})).status_code == 400
+
+
+async def test_triggers_keep_the_index_in_sync(client, db, project_id):
+    task_id = (await client.post(f"/api/projects/{project_id}/tasks", json={"name": "Quarterly budget"})).json()["id"]
+    hits = (await client.get("/api/search", params={"q": "budget"})).json()
+    assert [(hit["kind"], hit["id"], hit["project_id"]) for hit in hits] == [("task", task_id, project_id)]
+
+    await db.execute(update(Task).where(Task.id == task_id).values(name="Annual forecast", description="Was the budget"))
+    await db.commit()
+    assert await titles(client, "quarterly") == []
+    assert await titles(client, "forecast") == ["Annual forecast"]
+    hits = (await client.get("/api/search", params={"q": "budget"})).json()
+    assert hits[0]["snippet"] == "Was the <mark>budget</mark>"
+
+    await db.execute(update(Project).where(Project.id == project_id).values(name="Intranet relaunch"))
+    await db.commit()
+    assert await titles(client, "relaunch", kind="project") == ["Intranet relaunch"]
+
+    await db.execute(delete(Task).where(Task.id == task_id))
+    await db.commit()
+    assert await titles(client, "forecast") == []
+    documents = await db.execute(select(func.count()).select_from(SearchDocument).where(SearchDocument.entity_id == task_id))
+    assert documents.scalar_one() == 0
@@ -0,0 +1,80 @@
+import pytest
+
+from config import settings
+from core.database import engine
+from core.query_counter import QueryCounter
+
+pytestmark = pytest.mark.anyio
+
+AGENT = {"assignee_id": "agent-1", "assignee_type": "AGENT", "role": "worker"}
+
+
+@pytest.fixture
+async def project(client):
+    project_id = (await client.post("/api/projects", json={"name": "Batch"})).json()["id"]
+    other_id = (await client.post("/api/projects", json={"name": "Other"})).json()["id"]
+    stage_id = (await client.post(f"/api/projects/{project_id}/stages", json={"name": "Build"})).json()["id"]
+    foreign_stage_id = (await client.post(f"/api/projects/{other_id}/stages", json={"name": "Elsewhere"})).json()["id"]
+    return {"id": project_id, "stage_id": stage_id, "foreign_stage_id": foreign_stage_id}
+
+
+async def create_batch(client, project_id, items):
+    response = await client.post(f"/api/projects/{project_id}/tasks:batch", json=items)
+    assert response.status_code == 201
+    return response.json()
+
+
+async def test_valid_items_are_created_and_bad_ones_reported(client, project):
+    result = await create_batch(client, project["id"], [
+        {"name": "First", "stage_id": project["stage_id"], "assignees": [AGENT]},
+        {"name": ""},
+        {"name": "Foreign stage", "stage_id": project["foreign_stage_id"]},
+        {"name": "Second", "priority": 5},
+        {"name": "Bad priority", "priority": 9},
+        {"name": "Bad assignee", "assignees": [{**AGENT, "assignee_type": "ROBOT"}]},
+    ])
+
+    assert [(error["index"], error["errors"][0]["loc"]) for error in result["errors"]] == [
+        (1, ["name"]),
+        (2, ["stage_id"]),
+        (4, ["priority"]),
+        (5, ["assignees", 0, "assignee_type"]),
+    ]
+    assert result["errors"][1]["errors"][0]["type"] == "value_error.not_found"
+    tasks = {task["id"]: task for task in (await client.get(f"/api/projects/{project['id']}/tasks")).json()}
+    assert set(tasks) == set(result["created"])
+    first, second = (tasks[task_id] for task_id in result["created"])
+    assert (first["name"], first["stage_id"], first["status"]) == ("First", project["stage_id"], "TODO")
+    assert [(a["assignee_id"], a["role"]) for a in first["assignees"]] == [("agent-1", "worker")]
+    assert (second["name"], second["priority"], second["assignees"]) == ("Second", 5, [])
+
+
+@pytest.mark.parametrize("size", [1, 50])
+async def test_one_insert_per_table_whatever_the_batch_size(client, project, size):
+    items = [{"name": f"Task {n}", "assignees": [AGENT, {**AGENT, "assignee_id": "agent-2"}]} for n in range(size)]
+
+    with QueryCounter(engine) as counter:
+        result = await create_batch(client, project["id"], items)
+
+    assert len(result["created"]) == size
+    inserts = [statement.split("(")[0].strip() for statement in counter.statements if statement.startswith("INSERT")]
+    assert inserts.count("INSERT INTO tasks") == 1
+    assert inserts.count("INSERT INTO task_assignees") == 1
+
+
+async def test_batch_with_only_bad_items_creates_nothing(client, project):
+    result = await create_batch(client, project["id"], [{"name": ""}, {"priority": 1}])
+
+    assert result["created"] == []
+    assert [error["index"] for error in result["errors"]] == [0, 1]
+    assert (await client.get(f"/api/projects/{project['id']}/tasks")).json() == []
+
+
+async def test_oversized_batch_or_unknown_project_is_rejected(client, project, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_BATCH_MAX_SIZE", 2)
+
+    response = await client.post(f"/api/projects/{project['id']}/tasks:batch", json=[{"name": "Task"}] * 3)
+    assert response.status_code == 413
+
+    response = await client.post("/api/projects/missing/tasks:batch", json=[{"name": "Task"}])
+    assert response.status_code == 404
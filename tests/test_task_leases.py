@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from core.database import async_session
+from models.project_models import Project, Task, TaskAssignee
+from services.task_leases import sweep_expired_leases
+
+pytestmark = pytest.mark.anyio
+
+CLAIM = {"assignee_id": "agent-1", "assignee_type": "AGENT"}
+
+
+@pytest.fixture
+async def project_id(db):
+    project = Project(name="Queue")
+    db.add(project)
+    await db.flush()
+    db.add(Task(project_id=project.id, name="Work", status="TODO"))
+    await db.commit()
+    return project.id
+
+
+async def expire_leases(db) -> None:
+    await db.execute(update(TaskAssignee).values(lease_expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    await db.commit()
+
+
+async def sweep() -> None:
+    async with async_session() as session:
+        async with session.begin():
+            await sweep_expired_leases(session)
+
+
+async def assignees(db, task_id: str):
+    result = await db.execute(select(TaskAssignee.assignee_id).where(TaskAssignee.task_id == task_id))
+    return result.scalars().all()
+
+
+async def test_expired_claim_is_requeued(client, db, project_id):
+    task = (await client.post(f"/api/projects/{project_id}/tasks:claim", json=CLAIM)).json()
+    await expire_leases(db)
+
+    await sweep()
+
+    assert await assignees(db, task["id"]) == []
+    assert (await db.execute(select(Task.status).where(Task.id == task["id"]))).scalar_one() == "TODO"
+
+
+async def test_completed_task_keeps_its_assignee_after_the_lease_expires(client, db, project_id):
+    task = (await client.post(f"/api/projects/{project_id}/tasks:claim", json=CLAIM)).json()
+    response = await client.patch("/api/tasks:batch", json=[{"id": task["id"], "status": "DONE"}])
+    assert response.json()["updated"]
+    # Completing the task ended the lease
+    lease = await db.execute(select(TaskAssignee.lease_expires_at).where(TaskAssignee.task_id == task["id"]))
+    assert lease.scalar_one() is None
+
+    await sweep()
+
+    assert await assignees(db, task["id"]) == ["agent-1"]
+
+
+async def test_sweep_skips_tasks_that_left_in_progress(client, db, project_id):
+    task = (await client.post(f"/api/projects/{project_id}/tasks:claim", json=CLAIM)).json()
+    # e.g. a task completed before leases were ended on status changes
+    await db.execute(update(Task).where(Task.id == task["id"]).values(status="DONE"))
+    await expire_leases(db)
+
+    await sweep()
+
+    assert await assignees(db, task["id"]) == ["agent-1"]
+    assert (await db.execute(select(Task.status).where(Task.id == task["id"]))).scalar_one() == "DONE"
+
+
+
+async def patch_from(client, task):
+    item = {"id": task["id"], "status": "DONE", "updated_at": task["updated_at"]}
+    return (await client.patch("/api/tasks:batch", json=[item])).json()
+
+
+async def test_patch_based_on_the_version_before_a_claim_conflicts(client, project_id):
+    # Read within the same second as the claim
+    task = (await client.get(f"/api/projects/{project_id}/tasks")).json()[0]
+    await client.post(f"/api/projects/{project_id}/tasks:claim", json=CLAIM)
+
+    result = await patch_from(client, task)
+
+    assert result["updated"] == []
+    assert [conflict["id"] for conflict in result["conflicts"]] == [task["id"]]
+
+
+async def test_patch_based_on_the_version_before_a_release_conflicts(client, project_id):
+    claimed = (await client.post(f"/api/projects/{project_id}/tasks:claim", json=CLAIM)).json()
+    lease = next(assignee for assignee in claimed["assignees"] if assignee["lease_expires_at"])
+    task = (await client.get(f"/api/projects/{project_id}/tasks")).json()[0]
+    await client.delete(f"/api/tasks/{task['id']}/assignees/{lease['id']}/lease")
+
+    result = await patch_from(client, task)
+
+    assert result["updated"] == []
+    assert [conflict["id"] for conflict in result["conflicts"]] == [task["id"]]
@@ -0,0 +1,143 @@
+import pytest
+from sqlalchemy import select, update
+
+from models.project_models import Project, Stage, Task, TaskAssignee
+from services.task_updates import NOW, update_tasks
+from schemas import project_schemas as schemas
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def project(db):
+    project = Project(name="Updates")
+    other = Project(name="Other")
+    db.add_all([project, other])
+    await db.flush()
+    stage = Stage(project_id=project.id, name="Build")
+    foreign_stage = Stage(project_id=other.id, name="Elsewhere")
+    tasks = [Task(project_id=project.id, name=f"Task {n}", priority=1) for n in range(3)]
+    db.add_all([stage, foreign_stage, *tasks])
+    await db.commit()
+    return {
+        "id": project.id,
+        "stage_id": stage.id,
+        "foreign_stage_id": foreign_stage.id,
+        "task_ids": [task.id for task in tasks],
+    }
+
+
+async def patch(client, items):
+    response = await client.patch("/api/tasks:batch", json=items)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def read_task(db, task_id):
+    result = await db.execute(select(Task).where(Task.id == task_id).execution_options(populate_existing=True))
+    return result.scalar_one()
+
+
+async def test_changes_are_applied_and_versions_returned(client, db, project):
+    first, second, _ = project["task_ids"]
+
+    result = await patch(client, [
+        {"id": first, "status": "DONE", "priority": 5},
+        {"id": second, "stage_id": project["stage_id"]},
+    ])
+
+    assert [item["id"] for item in result["updated"]] == [first, second]
+    assert result["conflicts"] == [] and result["errors"] == []
+    task = await read_task(db, first)
+    assert (task.status, task.priority) == ("DONE", 5)
+    assert (await read_task(db, second)).stage_id == project["stage_id"]
+    # Versions have millisecond precision
+    assert "." in result["updated"][0]["updated_at"]
+
+
+async def test_returned_version_is_accepted_by_the_next_patch(client, project):
+    task_id = project["task_ids"][0]
+    result = await patch(client, [{"id": task_id, "status": "IN_PROGRESS"}])
+    version = result["updated"][0]["updated_at"]
+
+    result = await patch(client, [{"id": task_id, "status": "DONE", "updated_at": version}])
+
+    assert [item["id"] for item in result["updated"]] == [task_id]
+    assert result["conflicts"] == []
+
+
+async def test_stale_version_is_a_conflict_carrying_the_current_version(client, db, project):
+    task_id = project["task_ids"][0]
+    stale = (await client.get(f"/api/projects/{project['id']}/tasks")).json()[0]["updated_at"]
+    current = (await patch(client, [{"id": task_id, "priority": 3}]))["updated"][0]["updated_at"]
+
+    result = await patch(client, [{"id": task_id, "status": "DONE", "updated_at": stale}])
+
+    assert result["updated"] == []
+    assert result["conflicts"] == [{"index": 0, "id": task_id, "updated_at": current}]
+    assert (await read_task(db, task_id)).status == "TODO"
+
+
+async def test_task_changed_after_the_read_is_a_conflict(db, project):
+    task_id = project["task_ids"][0]
+    execute = db.execute
+    interfered = []
+
+    async def execute_and_interfere(statement, *args, **kwargs):
+        result = await execute(statement, *args, **kwargs)
+        if not interfered:
+            # Another writer commits between the version check and the UPDATE
+            interfered.append(statement)
+            await execute(update(Task).where(Task.id == task_id).values(updated_at=NOW))
+        return result
+
+    db.execute = execute_and_interfere
+    async with db.begin():
+        updated, conflicts, errors, events = await update_tasks(db, [(0, schemas.TaskPatch(id=task_id, status="DONE"))])
+
+    assert updated == [] and errors == [] and events == []
+    assert [(conflict.index, conflict.id) for conflict in conflicts] == [(0, task_id)]
+    assert (await read_task(db, task_id)).status == "TODO"
+
+
+async def test_invalid_items_are_reported_and_the_rest_applied(client, db, project):
+    first, second, third = project["task_ids"]
+
+    result = await patch(client, [
+        {"id": first, "status": "DONE"},
+        {"id": "missing", "status": "DONE"},
+        {"id": first, "priority": 2},
+        {"id": second},
+        {"id": second, "stage_id": project["foreign_stage_id"]},
+        {"id": third, "priority": 9},
+        {"id": third, "status": None},
+    ])
+
+    assert [item["id"] for item in result["updated"]] == [first]
+    errors = {error["index"]: (error["errors"][0]["loc"][-1], error["errors"][0]["type"]) for error in result["errors"]}
+    assert errors == {
+        1: ("id", "value_error.not_found"),
+        2: ("id", "value_error.duplicate"),
+        3: ("__root__", "value_error.missing"),
+        4: ("stage_id", "value_error.not_found"),
+        5: ("priority", "value_error.number.not_le"),
+        6: ("status", "value_error"),
+    }
+    assert (await read_task(db, second)).stage_id is None
+    assert (await read_task(db, third)).priority == 1
+
+
+async def test_leaving_in_progress_ends_the_lease(client, db, project):
+    claim = {"assignee_id": "agent-1", "assignee_type": "AGENT"}
+    claimed = []
+    for _ in range(2):
+        claimed.append((await client.post(f"/api/projects/{project['id']}/tasks:claim", json=claim)).json()["id"])
+
+    await patch(client, [{"id": claimed[0], "status": "REVIEW"}, {"id": claimed[1], "priority": 4}])
+
+    result = await db.execute(
+        select(TaskAssignee.task_id, TaskAssignee.lease_expires_at).where(TaskAssignee.task_id.in_(claimed))
+    )
+    leases = dict(result.all())
+    assert leases[claimed[0]] is None
+    assert leases[claimed[1]] is not None
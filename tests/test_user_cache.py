@@ -0,0 +1,77 @@
+import pytest
+from fastapi_users.db import SQLAlchemyUserDatabase
+from sqlalchemy import select
+
+from core.database import engine
+from core.query_counter import QueryCounter
+from models.project_models import ProjectEvent
+from models.user_models import User
+from services.user_cache import NO_PROJECT, CachedUserDatabase, user_cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def user_db(db):
+    # Entries of earlier tests' databases would answer for this one
+    user_cache.cache.clear()
+    db.add(User(id="user-1", username="user-1", email="user-1@example.com", hashed_password="x"))
+    await db.commit()
+    db.expunge_all()
+    return CachedUserDatabase(db, User)
+
+
+async def test_resolved_user_is_served_from_the_cache(user_db):
+    hits = user_cache.cache.hits
+    first = await user_db.get("user-1")
+    user_db.session.expunge_all()
+
+    with QueryCounter(engine) as counter:
+        cached = await user_db.get("user-1")
+
+    assert counter.count == 0
+    assert user_cache.cache.hits == hits + 1
+    assert cached is not first
+    assert cached in user_db.session
+    assert (cached.id, cached.username, cached.email, cached.is_active) == ("user-1", "user-1", "user-1@example.com", True)
+
+
+async def test_unknown_user_is_not_cached(user_db):
+    assert await user_db.get("missing") is None
+    assert user_cache.get("missing") is None
+
+
+async def test_update_evicts_the_user_and_logs_the_change(user_db):
+    user = await user_db.get("user-1")
+
+    await user_db.update(user, {"is_active": False})
+
+    assert user_cache.get("user-1") is None
+    user_db.session.expunge_all()
+    assert (await user_db.get("user-1")).is_active is False
+    events = await user_db.session.execute(select(ProjectEvent.project_id, ProjectEvent.event_type))
+    assert events.all() == [(NO_PROJECT, "user.updated")]
+
+
+async def test_delete_evicts_the_user(user_db):
+    user = await user_db.get("user-1")
+
+    await user_db.delete(user)
+
+    assert user_cache.get("user-1") is None
+    assert await user_db.get("user-1") is None
+
+
+async def test_lookup_overlapping_an_invalidation_is_not_cached(user_db, monkeypatch):
+    get = SQLAlchemyUserDatabase.get
+
+    async def get_then_invalidate(self, id):
+        # The lookup has read the old values when an update commits and evicts
+        user = await get(self, id)
+        user_cache.invalidate(id)
+        return user
+
+    monkeypatch.setattr(SQLAlchemyUserDatabase, "get", get_then_invalidate)
+    assert await user_db.get("user-1") is not None
+
+    assert user_cache.get("user-1") is None